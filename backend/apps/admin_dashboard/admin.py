@@ -1,4 +1,17 @@
 """
 Admin configuration for admin dashboard app.
-This app doesn't have models, so no admin configuration needed.
-"""
\ No newline at end of file
+"""
+from django.contrib import admin
+from .models import DashboardStatsSnapshot
+
+
+@admin.register(DashboardStatsSnapshot)
+class DashboardStatsSnapshotAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for DashboardStatsSnapshot model.
+    """
+    list_display = ['key', 'generated_at', 'updated_at']
+    readonly_fields = ['key', 'payload', 'generated_at', 'updated_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -3,4 +3,10 @@ from django.apps import AppConfig
 
 class AdminDashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.admin_dashboard'
\ No newline at end of file
+    name = 'apps.admin_dashboard'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .stats import start_refresher
+
+        start_refresher()
@@ -0,0 +1,164 @@
+"""
+Report how the database executes the hot list and dashboard queries.
+
+Runs EXPLAIN on the canonical query of every list and dashboard endpoint
+and flags sequential scans of tables larger than --min-rows. Small tables
+are scanned whatever indexes exist, so they are not flagged.
+"""
+import json
+import re
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from apps.authentication.models import LoginLog
+from apps.companies.models import Company
+from apps.documents.models import Document, DocumentDownloadLog
+from apps.ipos.models import IPO, IPOSubscriptionSnapshot
+
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)(?: AS \w+)?$')
+SQLITE_INDEX_SCAN = re.compile(r'\bSCAN (\w+)(?: AS \w+)? USING (?:COVERING )?INDEX')
+SQLITE_ACCESS = re.compile(r'\b(SCAN|SEARCH) (\w+)')
+
+
+def canonical_queries():
+    """(name, queryset) for the queries behind each hot endpoint."""
+    today = timezone.localdate()
+    since = timezone.now() - timedelta(days=30)
+    ipos = IPO.objects.select_related('company')
+
+    return [
+        ('ipos.list', ipos.order_by('-ipo_open_date')[:20]),
+        ('ipos.list?status=open', ipos.filter(status='open').order_by('-ipo_open_date')[:20]),
+        ('ipos.list?is_active=true', ipos.filter(is_active=True).order_by('-ipo_open_date', '-id')[:20]),
+        ('ipos.list?sector=technology', ipos.filter(company__sector='technology').order_by('-ipo_open_date')[:20]),
+        ('ipos.list?ordering=ipo_close_date', ipos.order_by('ipo_close_date', 'id')[:20]),
+        ('ipos.list?ordering=-issue_size', ipos.order_by('-issue_size', '-id')[:20]),
+        ('ipos.list?ordering=-created_at', ipos.order_by('-created_at', '-id')[:20]),
+        ('ipos.list?cursor=', ipos.filter(
+            Q(ipo_open_date__lt=today) | Q(ipo_open_date=today, id__lt=1000)
+        ).order_by('-ipo_open_date', '-id')[:21]),
+        ('ipos.scheduler.open', IPO.objects.filter(
+            status='upcoming', ipo_open_date__lte=today, ipo_close_date__gte=today
+        ).values_list('pk', 'company_id')),
+        ('ipos.scheduler.close', IPO.objects.filter(
+            status='open', ipo_close_date__lt=today
+        ).values_list('pk', 'company_id')),
+        ('ipos.subscription_history', IPOSubscriptionSnapshot.objects.filter(
+            ipo_id=1
+        ).order_by('category', 'recorded_at')),
+        ('companies.list?sector=technology', Company.objects.filter(sector='technology').order_by('name')[:20]),
+        ('companies.list?ordering=-created_at', Company.objects.order_by('-created_at', '-id')[:20]),
+        ('dashboard.recent.new_companies', Company.objects.filter(created_at__gte=since).order_by().values('id')),
+        ('dashboard.recent.new_ipos', IPO.objects.filter(created_at__gte=since).order_by().values('id')),
+        ('dashboard.recent.document_downloads', DocumentDownloadLog.objects.filter(
+            downloaded_at__gte=since
+        ).order_by().values('id')),
+        ('dashboard.recent.user_logins', LoginLog.objects.filter(login_time__gte=since).order_by().values('id')),
+        ('dashboard.timeline.documents_uploaded', Document.objects.filter(
+            uploaded_at__gte=since
+        ).order_by().values('uploaded_at')),
+        ('admin_logs', LoginLog.objects.select_related('user').filter(
+            login_time__gte=since
+        ).order_by('-login_time', '-id')[:20]),
+    ]
+
+
+def table_sizes(tables):
+    """Approximate row counts of the given tables."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(%s)',
+                [list(tables)]
+            )
+            return dict(cursor.fetchall())
+
+        sizes = {}
+        for table in tables:
+            cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+            sizes[table] = cursor.fetchone()[0]
+        return sizes
+
+
+def _postgres_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _postgres_nodes(child)
+
+
+def analyze(queryset):
+    """
+    Return (plan text, access paths, sequentially scanned tables).
+    """
+    if connection.vendor == 'postgresql':
+        plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+        access, scanned = [], []
+        for node in _postgres_nodes(plan):
+            relation = node.get('Relation Name')
+            if relation is None:
+                continue
+            if node['Node Type'] == 'Seq Scan':
+                scanned.append(relation)
+                access.append(f'Seq Scan on {relation}')
+            else:
+                access.append(f'{node["Node Type"]} using {node.get("Index Name", "?")} on {relation}')
+        return json.dumps(plan, indent=2), access, scanned
+
+    # A full index scan is fine when LIMIT stops it early, not otherwise
+    limited = queryset.query.high_mark is not None
+    plan = queryset.explain()
+    access, scanned = [], []
+    for line in plan.splitlines():
+        line = line.strip()
+        match = SQLITE_SCAN.search(line) or (not limited and SQLITE_INDEX_SCAN.search(line))
+        if match:
+            scanned.append(match.group(1))
+        if SQLITE_ACCESS.search(line):
+            access.append(line[SQLITE_ACCESS.search(line).start():])
+    return plan, access, scanned
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the hot list and dashboard queries and flag sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=10000,
+            help='Flag sequential scans of tables with at least this many rows',
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Print the full plan of every query',
+        )
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Exit with an error if any query is flagged (for CI)',
+        )
+
+    def handle(self, *args, **options):
+        queries = canonical_queries()
+        results = [(name, *analyze(queryset)) for name, queryset in queries]
+        sizes = table_sizes({table for *_, scanned in results for table in scanned})
+
+        flagged = 0
+        for name, plan, access, scanned in results:
+            large = [table for table in scanned if sizes.get(table, 0) >= options['min_rows']]
+            if large:
+                flagged += 1
+                tables = ', '.join(f'{table} (~{sizes[table]} rows)' for table in large)
+                self.stdout.write(self.style.WARNING(f'SEQ SCAN  {name}: {tables}'))
+            else:
+                self.stdout.write(f'ok        {name}: {"; ".join(access) or "no table access"}')
+            if options['plans']:
+                self.stdout.write(plan + '\n')
+
+        summary = f'{flagged} of {len(results)} queries scan tables with {options["min_rows"]}+ rows'
+        if flagged and options['fail']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not flagged else self.style.WARNING(summary))
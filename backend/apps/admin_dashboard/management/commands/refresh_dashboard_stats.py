@@ -0,0 +1,29 @@
+"""
+Rebuild the materialized dashboard statistics snapshot.
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.admin_dashboard.stats import refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard statistics snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep running and rebuild every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['loop']
+        while True:
+            snapshot = refresh_snapshot()
+            self.stdout.write(self.style.SUCCESS(
+                f'Dashboard stats snapshot rebuilt at {snapshot.generated_at.isoformat()}'
+            ))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,27 @@
+"""
+Admin dashboard models for the Bluestock IPO platform.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class DashboardStatsSnapshot(models.Model):
+    """
+    Precomputed dashboard statistics payload.
+
+    Rebuilt in full by the refresh command or the in-process refresher, and
+    bumped incrementally when companies, IPOs or documents are created or
+    deleted.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    generated_at = models.DateTimeField(help_text="When the payload was last rebuilt in full")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'dashboard_stats_snapshots'
+        verbose_name = 'Dashboard Stats Snapshot'
+        verbose_name_plural = 'Dashboard Stats Snapshots'
+    
+    def __str__(self):
+        return f"{self.key} - {self.generated_at}"
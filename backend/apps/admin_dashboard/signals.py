@@ -0,0 +1,145 @@
+"""
+Signal handlers that keep the dashboard stats snapshot up to date.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.companies.models import Company
+from apps.ipos.models import IPO
+from apps.ipos.signals import ipo_status_changed
+from apps.documents.models import Document
+from .stats import net_changes, schedule_bump, RECENT_ACTIVITY_DAYS
+
+IPO_STATUS_COUNTERS = ['upcoming', 'open', 'closed', 'listed']
+
+# Fields each model's snapshot changes are computed from
+TRACKED_FIELDS = {
+    Company: ['sector', 'is_active', 'created_at'],
+    IPO: ['status', 'issue_size', 'created_at'],
+    Document: ['document_type', 'download_count'],
+}
+
+
+def _is_recent(created_at):
+    """Check if a timestamp falls in the recent activity window."""
+    if created_at is None:
+        return False
+    return created_at >= timezone.now() - timedelta(days=RECENT_ACTIVITY_DAYS)
+
+
+def company_changes(company, sign):
+    """Snapshot changes for a company being added (1) or removed (-1)."""
+    changes = [
+        (('companies', 'total'), sign),
+        (('companies', 'by_sector', company.sector), sign),
+    ]
+    if company.is_active:
+        changes.append((('companies', 'active'), sign))
+    if _is_recent(company.created_at):
+        changes.append((('recent_activity', 'new_companies'), sign))
+    return changes
+
+
+def ipo_changes(ipo, sign):
+    """Snapshot changes for an IPO being added (1) or removed (-1)."""
+    changes = [
+        (('ipos', 'total'), sign),
+        (('ipos', 'total_issue_size'), Decimal(str(ipo.issue_size or 0)) * sign),
+    ]
+    if ipo.status in IPO_STATUS_COUNTERS:
+        changes.append((('ipos', ipo.status), sign))
+    if _is_recent(ipo.created_at):
+        changes.append((('recent_activity', 'new_ipos'), sign))
+    return changes
+
+
+def document_changes(document, sign):
+    """Snapshot changes for a document being added (1) or removed (-1)."""
+    changes = [
+        (('documents', 'total'), sign),
+        (('documents', 'by_type', document.document_type), sign),
+    ]
+    if document.download_count:
+        changes.append((('documents', 'total_downloads'), document.download_count * sign))
+    return changes
+
+
+@receiver(pre_save, sender=Company)
+@receiver(pre_save, sender=IPO)
+@receiver(pre_save, sender=Document)
+def remember_previous(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Updates are applied as removing the old row and adding the new one
+    fields = TRACKED_FIELDS[sender]
+    if raw or instance.pk is None or (update_fields and not set(update_fields) & set(fields)):
+        return
+
+    loaded = instance.__dict__.get('_loaded_values', {})
+    if all(field in loaded for field in fields):
+        # Compare with the values the instance was loaded with instead of
+        # reading the row again; saves that leave them alone bump nothing
+        if any(instance.__dict__.get(field) != loaded[field] for field in fields):
+            instance._dashboard_previous = SimpleNamespace(**{field: loaded[field] for field in fields})
+        return
+    instance._dashboard_previous = sender.objects.only(*fields).filter(pk=instance.pk).first()
+
+
+def schedule_save_bump(instance, created, changes, update_fields=None):
+    """Bump the snapshot for a created or updated row."""
+    if created:
+        schedule_bump(changes(instance, 1))
+    else:
+        previous = instance.__dict__.pop('_dashboard_previous', None)
+        if previous is not None:
+            schedule_bump(net_changes(changes(previous, -1) + changes(instance, 1)))
+
+    # The saved values are what a later save of this instance replaces
+    loaded = instance.__dict__.setdefault('_loaded_values', {})
+    for field in TRACKED_FIELDS[type(instance)]:
+        if field in instance.__dict__ and (not update_fields or field in update_fields):
+            loaded[field] = instance.__dict__[field]
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule_save_bump(instance, created, company_changes, update_fields)
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted(sender, instance, **kwargs):
+    schedule_bump(company_changes(instance, -1))
+
+
+@receiver(post_save, sender=IPO)
+def ipo_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule_save_bump(instance, created, ipo_changes, update_fields)
+
+
+@receiver(post_delete, sender=IPO)
+def ipo_deleted(sender, instance, **kwargs):
+    schedule_bump(ipo_changes(instance, -1))
+
+
+@receiver(ipo_status_changed)
+def ipo_statuses_changed(sender, ipo_ids, old_status, new_status, **kwargs):
+    changes = []
+    if old_status in IPO_STATUS_COUNTERS:
+        changes.append((('ipos', old_status), -len(ipo_ids)))
+    if new_status in IPO_STATUS_COUNTERS:
+        changes.append((('ipos', new_status), len(ipo_ids)))
+    schedule_bump(changes)
+
+
+@receiver(post_save, sender=Document)
+def document_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        schedule_save_bump(instance, created, document_changes, update_fields)
+
+
+@receiver(post_delete, sender=Document)
+def document_deleted(sender, instance, **kwargs):
+    schedule_bump(document_changes(instance, -1))
@@ -0,0 +1,281 @@
+"""
+Materialized dashboard statistics for the Bluestock IPO platform.
+
+The admin dashboard reads a precomputed payload from DashboardStatsSnapshot
+instead of running a dozen aggregates on every page load. The payload is
+rebuilt in full by ``manage.py refresh_dashboard_stats`` (or the in-process
+SnapshotRefresher started at app load when DASHBOARD_STATS_REFRESH_INTERVAL
+is set), and kept close to live between rebuilds by incremental bumps from
+model signals, merged into one bump per transaction.
+"""
+import logging
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum, Q
+from django.utils import timezone
+from apps.companies.models import Company
+from apps.ipos.models import IPO
+from apps.documents.models import Document, DocumentDownloadLog
+from apps.authentication.models import LoginLog, User
+from .models import DashboardStatsSnapshot
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = 'dashboard_stats'
+RECENT_ACTIVITY_DAYS = 30
+
+
+def compute_dashboard_stats():
+    """
+    Compute the full dashboard statistics payload.
+    """
+    # Company statistics
+    company_stats = Company.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True))
+    )
+
+    # Companies by sector
+    companies_by_sector = dict(
+        Company.objects.values('sector').annotate(
+            count=Count('id')
+        ).values_list('sector', 'count')
+    )
+
+    # IPO statistics
+    ipo_stats = IPO.objects.aggregate(
+        total=Count('id'),
+        upcoming=Count('id', filter=Q(status='upcoming')),
+        open=Count('id', filter=Q(status='open')),
+        closed=Count('id', filter=Q(status='closed')),
+        listed=Count('id', filter=Q(status='listed')),
+        total_issue_size=Sum('issue_size')
+    )
+    ipo_stats['total_issue_size'] = str(ipo_stats['total_issue_size'] or Decimal('0'))
+
+    # Document statistics
+    document_stats = Document.objects.aggregate(
+        total=Count('id'),
+        total_downloads=Sum('download_count')
+    )
+    document_stats['total_downloads'] = document_stats['total_downloads'] or 0
+
+    # Documents by type
+    documents_by_type = dict(
+        Document.objects.values('document_type').annotate(
+            count=Count('id')
+        ).values_list('document_type', 'count')
+    )
+
+    # User statistics
+    user_stats = User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        admins=Count('id', filter=Q(role='admin'))
+    )
+
+    # Recent activity
+    since = timezone.now() - timedelta(days=RECENT_ACTIVITY_DAYS)
+    recent_stats = {
+        'new_companies': Company.objects.filter(created_at__gte=since).count(),
+        'new_ipos': IPO.objects.filter(created_at__gte=since).count(),
+        'document_downloads': DocumentDownloadLog.objects.filter(downloaded_at__gte=since).count(),
+        'user_logins': LoginLog.objects.filter(login_time__gte=since).count(),
+    }
+
+    return {
+        'companies': {
+            **company_stats,
+            'by_sector': companies_by_sector
+        },
+        'ipos': ipo_stats,
+        'documents': {
+            **document_stats,
+            'by_type': documents_by_type
+        },
+        'users': user_stats,
+        'recent_activity': recent_stats,
+    }
+
+
+def refresh_snapshot():
+    """
+    Rebuild the snapshot from scratch and return it.
+    """
+    payload = compute_dashboard_stats()
+    snapshot, _ = DashboardStatsSnapshot.objects.update_or_create(
+        key=SNAPSHOT_KEY,
+        defaults={'payload': payload, 'generated_at': timezone.now()}
+    )
+    return snapshot
+
+
+def get_snapshot(fresh=False):
+    """
+    Return the current snapshot, building it if missing or if fresh is set.
+    """
+    if not fresh:
+        snapshot = DashboardStatsSnapshot.objects.filter(key=SNAPSHOT_KEY).first()
+        if snapshot is not None:
+            return snapshot
+    return refresh_snapshot()
+
+
+def render_snapshot(snapshot):
+    """
+    Build the API response body for a snapshot.
+    """
+    payload = snapshot.payload
+    ipo_stats = dict(payload['ipos'])
+    ipo_stats['total_issue_size'] = f"₹{Decimal(ipo_stats['total_issue_size']):,.2f} Cr"
+
+    return {
+        **payload,
+        'ipos': ipo_stats,
+        'generated_at': snapshot.generated_at,
+        'updated_at': snapshot.updated_at,
+        'age_seconds': int((timezone.now() - snapshot.generated_at).total_seconds()),
+    }
+
+
+def _apply_change(payload, path, delta):
+    """Add delta to the value at path, dropping mapping entries that reach zero."""
+    *parents, leaf = path
+    target = payload
+    for key in parents:
+        target = target.setdefault(key, {})
+
+    current = target.get(leaf, 0)
+    if isinstance(delta, Decimal):
+        value = Decimal(str(current)) + delta
+        target[leaf] = str(value)
+        return
+
+    value = current + delta
+    if len(path) > 2 and value <= 0:
+        target.pop(leaf, None)
+    else:
+        target[leaf] = max(value, 0)
+
+
+def bump_snapshot(changes):
+    """
+    Apply incremental changes to the stored snapshot.
+
+    ``changes`` is a list of (path, delta) pairs such as
+    ``(('ipos', 'open'), 1)``. Nothing happens until a snapshot exists; the
+    first read builds it from scratch.
+    """
+    if not changes:
+        return
+
+    with transaction.atomic():
+        snapshot = DashboardStatsSnapshot.objects.select_for_update().filter(
+            key=SNAPSHOT_KEY
+        ).first()
+        if snapshot is None:
+            return
+
+        for path, delta in changes:
+            _apply_change(snapshot.payload, path, delta)
+        snapshot.save(update_fields=['payload', 'updated_at'])
+
+
+def net_changes(changes):
+    """Sum deltas per path, dropping paths that cancel out."""
+    totals = {}
+    for path, delta in changes:
+        totals[path] = totals.get(path, 0) + delta
+    return [(path, delta) for path, delta in totals.items() if delta]
+
+
+class PendingBump:
+    """
+    Snapshot changes of one transaction, applied in a single bump on commit.
+    """
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.applied = False
+
+    def __call__(self):
+        self.applied = True
+        try:
+            bump_snapshot(net_changes(self.changes))
+        except Exception as e:
+            logger.error(f"Error bumping dashboard stats snapshot: {str(e)}")
+
+
+def schedule_bump(changes):
+    """
+    Bump the snapshot once the current transaction commits.
+
+    Bumps scheduled at the same savepoint of a transaction are merged, so
+    a bulk delete or an import locks the snapshot row once rather than
+    once per row.
+    """
+    if not changes:
+        return
+
+    connection = transaction.get_connection()
+    # None marks an atomic block without a savepoint, which can't roll back alone
+    savepoint_ids = set(connection.savepoint_ids) - {None}
+    for callback_savepoint_ids, callback, *_ in reversed(connection.run_on_commit):
+        # Callbacks of a rolled back savepoint are dropped together
+        if (
+            isinstance(callback, PendingBump)
+            and not callback.applied
+            and callback_savepoint_ids - {None} == savepoint_ids
+        ):
+            callback.changes.extend(changes)
+            return
+    transaction.on_commit(PendingBump(changes))
+
+
+class SnapshotRefresher(threading.Thread):
+    """
+    Daemon thread that rebuilds the snapshot on a fixed interval.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='dashboard-stats-refresher', daemon=True)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                refresh_snapshot()
+            except Exception as e:
+                logger.error(f"Error refreshing dashboard stats snapshot: {str(e)}")
+            finally:
+                # Connections are per-thread; don't hold one between runs
+                connection.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def start_refresher(interval=None):
+    """
+    Start the process-wide refresher once; a zero interval disables it.
+    """
+    global _refresher
+
+    if interval is None:
+        interval = settings.DASHBOARD_STATS_REFRESH_INTERVAL
+    if interval <= 0:
+        return None
+
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = SnapshotRefresher(interval)
+            _refresher.start()
+        return _refresher
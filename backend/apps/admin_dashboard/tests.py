@@ -0,0 +1,292 @@
+"""
+Tests for the admin dashboard app.
+"""
+import io
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.authentication.authentication import JWTTokenGenerator
+from apps.authentication.models import LoginLog, User
+from apps.companies.models import Company
+from apps.documents.models import Document
+from apps.ipos.models import IPO
+from apps.ipos.scheduler import advance_statuses
+from apps.ipos.tests import create_document, create_ipo
+from bluestock_backend.pagination import CursorPaginator
+from .models import DashboardStatsSnapshot
+from .signals import net_changes
+from .stats import PendingBump, _apply_change, compute_dashboard_stats, get_snapshot
+from .management.commands.index_report import analyze
+
+
+class IndexReportTests(TestCase):
+    """
+    Every hot list and dashboard query is served by an index.
+    """
+
+    def test_canonical_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command('index_report', '--min-rows', '0', '--fail', stdout=out)
+        self.assertIn('0 of', out.getvalue())
+
+    def test_unindexed_filter_is_flagged(self):
+        _, _, scanned = analyze(Company.objects.filter(ceo_name='A. Kumar'))
+        self.assertEqual(scanned, ['companies'])
+
+
+class AdminLogsCursorTests(TestCase):
+    """
+    Cursor pages of the admin logs are stable across duplicate timestamps.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {JWTTokenGenerator.generate_access_token(self.admin)}'}
+        now = timezone.now()
+        # Three rows share the newest timestamp and two the next one
+        for minutes in [0, 0, 0, 1, 1, 2, 3]:
+            LoginLog.objects.create(
+                user=self.admin, ip_address='10.0.0.1', user_agent='test',
+                login_time=now - timedelta(minutes=minutes)
+            )
+        self.expected = list(LoginLog.objects.order_by('-login_time', '-id').values_list('id', flat=True))
+
+    def get(self, **params):
+        response = self.client.get('/api/admin/logs/', {'limit': 2, **params}, **self.auth)
+        return response.status_code, response.json()
+
+    def test_pages_forward_and_back(self):
+        pages = []
+        cursor = ''
+        while cursor is not None:
+            _, page = self.get(cursor=cursor)
+            pages.append([row['id'] for row in page['results']])
+            cursor = page['next_cursor']
+        self.assertEqual([row_id for ids in pages for row_id in ids], self.expected)
+        self.assertEqual([len(ids) for ids in pages], [2, 2, 2, 1])
+        self.assertFalse(page['has_next'])
+
+        back = []
+        cursor = page['previous_cursor']
+        while cursor is not None:
+            _, page = self.get(cursor=cursor)
+            back.append([row['id'] for row in page['results']])
+            cursor = page['previous_cursor']
+        self.assertEqual(back, pages[-2::-1])
+        self.assertFalse(page['has_previous'])
+        self.assertTrue(page['has_next'])
+
+    def test_invalid_cursors_are_rejected(self):
+        self.assertEqual(self.get(cursor='not-a-cursor')[0], 400)
+
+        other_ordering = CursorPaginator(LoginLog.objects.all(), ['login_time'], 2)
+        cursor = other_ordering.encode_cursor(LoginLog.objects.first())
+        status, body = self.get(cursor=cursor)
+        self.assertEqual(status, 400)
+        self.assertEqual(body['error'], 'Cursor does not match the requested ordering')
+
+    def test_statistics_are_opt_in_with_cursors(self):
+        self.assertIsNone(self.get(cursor='')[1]['statistics'])
+        self.assertEqual(self.get(cursor='', stats=1)[1]['statistics']['total_logs'], 7)
+        self.assertEqual(self.get()[1]['count'], 7)
+
+
+class ActivityTimelineTests(TestCase):
+    """
+    The activity timeline counts whole buckets and zero-fills empty ones.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {JWTTokenGenerator.generate_access_token(self.admin)}'}
+        self.today = timezone.localdate()
+
+    def login_on(self, day):
+        LoginLog.objects.create(
+            user=self.admin, ip_address='10.0.0.1', user_agent='test',
+            login_time=timezone.make_aware(datetime.combine(day, time(0, 1)))
+        )
+
+    def timeline(self, **params):
+        response = self.client.get('/api/admin/activity/', params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_daily_buckets_are_zero_filled(self):
+        for days_ago in [0, 2, 2, 5]:
+            self.login_on(self.today - timedelta(days=days_ago))
+
+        timeline = self.timeline(days=3)['timeline']
+        self.assertEqual(
+            [(entry['date'], entry['user_logins']) for entry in timeline],
+            [((self.today - timedelta(days=2)).isoformat(), 2),
+             ((self.today - timedelta(days=1)).isoformat(), 0),
+             (self.today.isoformat(), 1)]
+        )
+        self.assertEqual(timeline[1]['ipos_created'], 0)
+
+    def test_first_week_is_counted_in_full(self):
+        week_start = self.today - timedelta(days=self.today.weekday())
+        self.login_on(week_start)
+        self.login_on(week_start - timedelta(days=1))
+
+        timeline = self.timeline(days=1, bucket='week')['timeline']
+        self.assertEqual([entry['date'] for entry in timeline], [week_start.isoformat()])
+        self.assertEqual(timeline[0]['user_logins'], 1)
+
+    def test_monthly_buckets(self):
+        month_start = self.today.replace(day=1)
+        previous_month = (month_start - timedelta(days=1)).replace(day=1)
+        self.login_on(month_start)
+        self.login_on(previous_month)
+
+        timeline = self.timeline(days=1, bucket='month')['timeline']
+        self.assertEqual([(entry['date'], entry['user_logins']) for entry in timeline], [(month_start.isoformat(), 1)])
+
+        timeline = self.timeline(days=60, bucket='month')['timeline']
+        self.assertEqual(timeline[-2:], [
+            {**timeline[-2], 'date': previous_month.isoformat(), 'user_logins': 1},
+            {**timeline[-1], 'date': month_start.isoformat(), 'user_logins': 1},
+        ])
+        self.assertTrue(all(entry['user_logins'] == 0 for entry in timeline[:-2]))
+
+    @override_settings(ACTIVITY_TIMELINE_MAX_DAYS=10)
+    def test_window_is_bounded(self):
+        data = self.timeline(days=1000)
+        self.assertEqual(data['period_days'], 10)
+        self.assertEqual(len(data['timeline']), 10)
+
+        response = self.client.get('/api/admin/activity/', {'bucket': 'year'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class DashboardSnapshotTests(TestCase):
+    """
+    Incremental snapshot bumps agree with a full rebuild.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {JWTTokenGenerator.generate_access_token(self.admin)}'}
+        # A test is one transaction, so apply its setup bumps before rebuilding
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ipo = create_ipo(0, issue_size=Decimal('1250.75'))
+            self.document = create_document(self.ipo, 'rhp')
+        get_snapshot(fresh=True)
+
+    def assertSnapshotMatchesRebuild(self):
+        bumped = get_snapshot().payload
+        fresh = compute_dashboard_stats()
+        self.maxDiff = None
+        for payload in (bumped, fresh):
+            payload['ipos']['total_issue_size'] = Decimal(payload['ipos']['total_issue_size'])
+        self.assertEqual(bumped, fresh)
+
+    def test_apply_change(self):
+        payload = {'ipos': {'open': 1, 'total_issue_size': '10.50'}, 'companies': {'by_sector': {'it': 1}}}
+        _apply_change(payload, ('ipos', 'open'), -2)
+        _apply_change(payload, ('ipos', 'total_issue_size'), Decimal('0.25'))
+        _apply_change(payload, ('companies', 'by_sector', 'it'), -1)
+        _apply_change(payload, ('companies', 'by_sector', 'energy'), 1)
+
+        self.assertEqual(payload, {
+            'ipos': {'open': 0, 'total_issue_size': '10.75'},
+            'companies': {'by_sector': {'energy': 1}},
+        })
+        self.assertEqual(
+            net_changes([(('ipos', 'open'), -1), (('ipos', 'open'), 1), (('ipos', 'total'), 1)]),
+            [(('ipos', 'total'), 1)]
+        )
+
+    def test_creates_match_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ipo = create_ipo(1, issue_size=Decimal('99.99'), status='open')
+            create_document(ipo, 'drhp')
+            Company.objects.create(name='Energy Co', sector='energy', cin='U00002MH2020PTC000002', is_active=False)
+        self.assertSnapshotMatchesRebuild()
+
+    def test_updates_match_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ipo.status = 'closed'
+            self.ipo.issue_size = Decimal('800.10')
+            self.ipo.save()
+            company = self.ipo.company
+            company.sector = 'energy'
+            company.is_active = False
+            company.save()
+            self.document.document_type = 'drhp'
+            self.document.save()
+        self.assertSnapshotMatchesRebuild()
+
+        # Scheduled status moves are bumped through ipo_status_changed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ipo.status = 'upcoming'
+            self.ipo.save()
+            advance_statuses(self.ipo.ipo_open_date)
+        self.assertSnapshotMatchesRebuild()
+        self.assertEqual(get_snapshot().payload['ipos']['open'], 1)
+
+    def test_saving_a_loaded_row_reads_nothing_back(self):
+        ipo = IPO.objects.get(pk=self.ipo.pk)
+        ipo.status = 'open'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with CaptureQueriesContext(connection) as queries:
+                ipo.save()
+            ipo.status = 'closed'
+            ipo.save()
+            # Saves that leave the tracked fields alone bump nothing
+            ipo.ipo_name = 'Renamed'
+            ipo.save()
+
+        # The save starts with its UPDATE instead of reading the row first
+        self.assertEqual(queries[0]['sql'].split()[0], 'UPDATE')
+        self.assertEqual(len([callback for callback in callbacks if isinstance(callback, PendingBump)]), 1)
+        self.assertSnapshotMatchesRebuild()
+        self.assertEqual(get_snapshot().payload['ipos']['closed'], 1)
+
+    def test_bumps_are_merged_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for index in range(1, 4):
+                create_document(create_ipo(index), 'drhp')
+            Document.objects.filter(ipo__ipo_name__isnull=False).delete()
+            # Bumps of a rolled back savepoint are dropped with it
+            with transaction.atomic():
+                create_ipo(9, status='open')
+                transaction.set_rollback(True)
+        self.assertEqual(len([callback for callback in callbacks if isinstance(callback, PendingBump)]), 1)
+        self.assertSnapshotMatchesRebuild()
+
+    def test_deletes_match_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other = create_ipo(1, issue_size=Decimal('10.01'))
+            create_document(other, 'drhp')
+        get_snapshot(fresh=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Document.objects.filter(pk=self.document.pk).delete()
+            # Cascades to the company's IPO and its document
+            other.company.delete()
+        self.assertSnapshotMatchesRebuild()
+        self.assertEqual(Decimal(get_snapshot().payload['ipos']['total_issue_size']), Decimal('1250.75'))
+
+    def test_fresh_rebuilds_snapshot(self):
+        DashboardStatsSnapshot.objects.update(payload={**get_snapshot().payload, 'ipos': {
+            'total': 99, 'upcoming': 99, 'open': 0, 'closed': 0, 'listed': 0, 'total_issue_size': '0',
+        }})
+        stale = self.client.get('/api/admin/stats/', **self.auth).json()
+        fresh = self.client.get('/api/admin/stats/', {'fresh': 1}, **self.auth).json()
+
+        self.assertEqual(stale['ipos']['total'], 99)
+        self.assertEqual(fresh['ipos']['total'], 1)
+        self.assertEqual(fresh['ipos']['total_issue_size'], '₹1,250.75 Cr')
+        self.assertSnapshotMatchesRebuild()
@@ -8,4 +8,5 @@ urlpatterns = [
     path('stats/', views.dashboard_stats, name='dashboard-stats'),
     path('logs/', views.admin_logs, name='admin-logs'),
     path('activity/', views.activity_timeline, name='activity-timeline'),
+    path('cache/', views.response_cache_stats, name='response-cache-stats'),
 ]
\ No newline at end of file
@@ -4,16 +4,22 @@ Admin dashboard views for the Bluestock IPO platform.
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Count, Sum, Q
+from django.conf import settings
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from apps.companies.models import Company
 from apps.ipos.models import IPO
 from apps.documents.models import Document, DocumentDownloadLog
 from apps.authentication.models import LoginLog, User
+from apps.authentication.audit import get_login_log_writer
 from apps.authentication.serializers import LoginLogSerializer
+from bluestock_backend.pagination import CursorPaginator, InvalidCursor
+from bluestock_backend.response_cache import counters as response_cache_counters
+from .stats import get_snapshot, render_snapshot
 
 
 class IsAdmin(permissions.BasePermission):
@@ -66,9 +72,14 @@ class IsAdmin(permissions.BasePermission):
                         'admins': openapi.Schema(type=openapi.TYPE_INTEGER),
                     }
                 ),
+                'generated_at': openapi.Schema(type=openapi.TYPE_STRING),
+                'age_seconds': openapi.Schema(type=openapi.TYPE_INTEGER),
             }
         )
     )},
+    manual_parameters=[
+        openapi.Parameter('fresh', openapi.IN_QUERY, description="Recompute the statistics instead of serving the snapshot", type=openapi.TYPE_BOOLEAN),
+    ],
     operation_description="Get dashboard statistics (Admin only)"
 )
 @api_view(['GET'])
@@ -76,77 +87,14 @@ class IsAdmin(permissions.BasePermission):
 def dashboard_stats(request):
     """
     Get comprehensive dashboard statistics.
-    """
-    # Company statistics
-    company_stats = Company.objects.aggregate(
-        total=Count('id'),
-        active=Count('id', filter=Q(is_active=True))
-    )
-    
-    # Companies by sector
-    companies_by_sector = dict(
-        Company.objects.values('sector').annotate(
-            count=Count('id')
-        ).values_list('sector', 'count')
-    )
-    
-    # IPO statistics
-    ipo_stats = IPO.objects.aggregate(
-        total=Count('id'),
-        upcoming=Count('id', filter=Q(status='upcoming')),
-        open=Count('id', filter=Q(status='open')),
-        closed=Count('id', filter=Q(status='closed')),
-        listed=Count('id', filter=Q(status='listed')),
-        total_issue_size=Sum('issue_size')
-    )
-    
-    # Format issue size
-    total_issue_size = ipo_stats['total_issue_size'] or 0
-    ipo_stats['total_issue_size'] = f"₹{total_issue_size:,.2f} Cr"
-    
-    # Document statistics
-    document_stats = Document.objects.aggregate(
-        total=Count('id'),
-        total_downloads=Sum('download_count')
-    )
     
-    # Documents by type
-    documents_by_type = dict(
-        Document.objects.values('document_type').annotate(
-            count=Count('id')
-        ).values_list('document_type', 'count')
-    )
-    
-    # User statistics
-    user_stats = User.objects.aggregate(
-        total=Count('id'),
-        active=Count('id', filter=Q(is_active=True)),
-        admins=Count('id', filter=Q(role='admin'))
-    )
+    Serves the materialized snapshot; pass ?fresh=1 to rebuild it first.
+    """
+    fresh = request.query_params.get('fresh', '').lower() in ('1', 'true')
     
-    # Recent activity (last 30 days)
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    recent_stats = {
-        'new_companies': Company.objects.filter(created_at__gte=thirty_days_ago).count(),
-        'new_ipos': IPO.objects.filter(created_at__gte=thirty_days_ago).count(),
-        'document_downloads': DocumentDownloadLog.objects.filter(downloaded_at__gte=thirty_days_ago).count(),
-        'user_logins': LoginLog.objects.filter(login_time__gte=thirty_days_ago).count(),
-    }
+    snapshot = get_snapshot(fresh=fresh)
     
-    return Response({
-        'companies': {
-            **company_stats,
-            'by_sector': companies_by_sector
-        },
-        'ipos': ipo_stats,
-        'documents': {
-            **document_stats,
-            'by_type': documents_by_type
-        },
-        'users': user_stats,
-        'recent_activity': recent_stats,
-        'generated_at': timezone.now()
-    })
+    return Response(render_snapshot(snapshot))
 
 
 @swagger_auto_schema(
@@ -156,6 +104,8 @@ def dashboard_stats(request):
         openapi.Parameter('limit', openapi.IN_QUERY, description="Items per page", type=openapi.TYPE_INTEGER),
         openapi.Parameter('user', openapi.IN_QUERY, description="Filter by username", type=openapi.TYPE_STRING),
         openapi.Parameter('days', openapi.IN_QUERY, description="Filter by days (default: 30)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor for keyset pagination; pass an empty value for the first page", type=openapi.TYPE_STRING),
+        openapi.Parameter('stats', openapi.IN_QUERY, description="Include statistics with cursor pagination (1)", type=openapi.TYPE_STRING),
     ],
     responses={200: LoginLogSerializer(many=True)},
     operation_description="Get login logs and activities (Admin only)"
@@ -165,6 +115,8 @@ def dashboard_stats(request):
 def admin_logs(request):
     """
     Get login logs and user activities.
+    
+    Also reports this process's login log writer queue metrics.
     """
     # Get query parameters
     page = int(request.query_params.get('page', 1))
@@ -187,23 +139,51 @@ def admin_logs(request):
     # Order by most recent
     logs = logs.order_by('-login_time')
     
+    def statistics():
+        return logs.aggregate(
+            total_logs=Count('id'),
+            successful_logins=Count('id', filter=Q(is_successful=True)),
+            failed_logins=Count('id', filter=Q(is_successful=False)),
+            unique_users=Count('user', distinct=True),
+            unique_ips=Count('ip_address', distinct=True),
+        )
+    
+    # Keyset pagination when a cursor is passed; statistics scan every
+    # filtered row, so they are only computed on request (?stats=1)
+    cursor = request.query_params.get('cursor')
+    if cursor is not None:
+        try:
+            page = CursorPaginator(logs, ['-login_time'], limit).page(cursor)
+        except InvalidCursor as e:
+            return Response(
+                {'error': str(e)}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = LoginLogSerializer(page.items, many=True)
+        
+        return Response({
+            'results': serializer.data,
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+            'has_next': page.has_next(),
+            'has_previous': page.has_previous(),
+            'statistics': statistics() if request.query_params.get('stats') == '1' else None,
+            'log_writer': get_login_log_writer().stats()
+        })
+    
+    # Additional statistics
+    stats = statistics()
+    
     # Pagination
     from django.core.paginator import Paginator
     paginator = Paginator(logs, limit)
+    paginator.count = stats['total_logs']
     page_obj = paginator.get_page(page)
     
     # Serialize data
     serializer = LoginLogSerializer(page_obj, many=True)
     
-    # Additional statistics
-    stats = {
-        'total_logs': paginator.count,
-        'successful_logins': logs.filter(is_successful=True).count(),
-        'failed_logins': logs.filter(is_successful=False).count(),
-        'unique_users': logs.values('user').distinct().count(),
-        'unique_ips': logs.values('ip_address').distinct().count(),
-    }
-    
     return Response({
         'results': serializer.data,
         'count': paginator.count,
@@ -211,14 +191,71 @@ def admin_logs(request):
         'current_page': page_obj.number,
         'has_next': page_obj.has_next(),
         'has_previous': page_obj.has_previous(),
-        'statistics': stats
+        'statistics': stats,
+        'log_writer': get_login_log_writer().stats()
     })
 
 
+# Sources for the activity timeline: (response key, model, timestamp field)
+TIMELINE_SOURCES = [
+    ('companies_created', Company, 'created_at'),
+    ('ipos_created', IPO, 'created_at'),
+    ('documents_uploaded', Document, 'uploaded_at'),
+    ('document_downloads', DocumentDownloadLog, 'downloaded_at'),
+    ('user_logins', LoginLog, 'login_time'),
+]
+
+TIMELINE_BUCKETS = {
+    'day': TruncDate,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _bucket_start(day, bucket):
+    """Return the first date of the bucket containing the given date."""
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day, bucket):
+    """Return the first date of the bucket following the given bucket start."""
+    if bucket == 'week':
+        return day + timedelta(days=7)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _bucket_counts(model, field, bucket, since):
+    """
+    Count rows per bucket with a single GROUP BY query.
+    """
+    tzinfo = timezone.get_current_timezone()
+    if bucket == 'day':
+        trunc = TruncDate(field, tzinfo=tzinfo)
+    else:
+        trunc = TIMELINE_BUCKETS[bucket](field, output_field=DateField(), tzinfo=tzinfo)
+    
+    rows = model.objects.filter(
+        **{f'{field}__gte': since}
+    ).order_by().annotate(
+        bucket=trunc
+    ).values('bucket').annotate(
+        count=Count('id')
+    ).values_list('bucket', 'count')
+    
+    return dict(rows)
+
+
 @swagger_auto_schema(
     method='get',
     manual_parameters=[
-        openapi.Parameter('days', openapi.IN_QUERY, description="Number of days (default: 30)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('days', openapi.IN_QUERY, description="Number of days (default: 30, max: ACTIVITY_TIMELINE_MAX_DAYS)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('bucket', openapi.IN_QUERY, description="Bucket size: day, week or month (default: day)", type=openapi.TYPE_STRING),
     ],
     responses={200: openapi.Response(
         description="Activity timeline",
@@ -238,7 +275,9 @@ def admin_logs(request):
                             'user_logins': openapi.Schema(type=openapi.TYPE_INTEGER),
                         }
                     )
-                )
+                ),
+                'period_days': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'bucket': openapi.Schema(type=openapi.TYPE_STRING),
             }
         )
     )},
@@ -249,48 +288,83 @@ def admin_logs(request):
 def activity_timeline(request):
     """
     Get activity timeline for the dashboard.
+    
+    Runs one grouped query per source model, whatever the window size,
+    and zero-fills the buckets in Python. The window is widened to the
+    start of the first week or month so that bucket is counted in full.
     """
-    days = int(request.query_params.get('days', 30))
+    try:
+        days = int(request.query_params.get('days', 30))
+    except ValueError:
+        return Response(
+            {'error': 'days must be an integer'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    days = max(1, min(days, settings.ACTIVITY_TIMELINE_MAX_DAYS))
     
-    timeline = []
-    for i in range(days):
-        date = timezone.now().date() - timedelta(days=i)
-        next_date = date + timedelta(days=1)
-        
-        # Count activities for this date
-        companies_created = Company.objects.filter(
-            created_at__date=date
-        ).count()
-        
-        ipos_created = IPO.objects.filter(
-            created_at__date=date
-        ).count()
-        
-        documents_uploaded = Document.objects.filter(
-            uploaded_at__date=date
-        ).count()
-        
-        document_downloads = DocumentDownloadLog.objects.filter(
-            downloaded_at__date=date
-        ).count()
-        
-        user_logins = LoginLog.objects.filter(
-            login_time__date=date
-        ).count()
-        
-        timeline.append({
-            'date': date.isoformat(),
-            'companies_created': companies_created,
-            'ipos_created': ipos_created,
-            'documents_uploaded': documents_uploaded,
-            'document_downloads': document_downloads,
-            'user_logins': user_logins,
-        })
+    bucket = request.query_params.get('bucket', 'day')
+    if bucket not in TIMELINE_BUCKETS:
+        return Response(
+            {'error': f"bucket must be one of: {', '.join(TIMELINE_BUCKETS)}"}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    today = timezone.localdate()
+    start_date = _bucket_start(today - timedelta(days=days - 1), bucket)
+    since = timezone.make_aware(datetime.combine(start_date, time.min))
     
-    # Reverse to show oldest first
-    timeline.reverse()
+    counts = {
+        key: _bucket_counts(model, field, bucket, since)
+        for key, model, field in TIMELINE_SOURCES
+    }
+    
+    # Zero-filled series, oldest first
+    timeline = []
+    current = start_date
+    while current <= today:
+        entry = {'date': current.isoformat()}
+        for key, _, _ in TIMELINE_SOURCES:
+            entry[key] = counts[key].get(current, 0)
+        timeline.append(entry)
+        current = _next_bucket(current, bucket)
     
     return Response({
         'timeline': timeline,
-        'period_days': days
-    })
\ No newline at end of file
+        'period_days': days,
+        'bucket': bucket
+    })
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={200: openapi.Response(
+        description="Response cache counters",
+        schema=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'hits': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'misses': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'hit_rate': openapi.Schema(type=openapi.TYPE_NUMBER),
+                'views': openapi.Schema(type=openapi.TYPE_OBJECT),
+            }
+        )
+    )},
+    manual_parameters=[
+        openapi.Parameter('reset', openapi.IN_QUERY, description="Reset the counters after reading them", type=openapi.TYPE_BOOLEAN),
+    ],
+    operation_description="Get response cache hit/miss counters for this process (Admin only)"
+)
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def response_cache_stats(request):
+    """
+    Get hit/miss counters of the public response cache.
+    
+    Counters are kept per worker process.
+    """
+    stats = response_cache_counters.snapshot()
+    
+    if request.query_params.get('reset', '').lower() in ('1', 'true'):
+        response_cache_counters.reset()
+    
+    return Response(stats)
@@ -3,7 +3,7 @@ Admin configuration for authentication app.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, LoginLog, RefreshToken
+from .models import User, LoginLog, RefreshToken, RevokedAccessToken
 
 
 @admin.register(User)
@@ -52,7 +52,21 @@ class RefreshTokenAdmin(admin.ModelAdmin):
     list_filter = ['is_revoked', 'created_at', 'expires_at']
     search_fields = ['user__username', 'user__email']
     ordering = ['-created_at']
-    readonly_fields = ['user', 'token', 'created_at', 'expires_at']
+    readonly_fields = ['user', 'token_hash', 'created_at', 'expires_at']
     
     def has_add_permission(self, request):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(RevokedAccessToken)
+class RevokedAccessTokenAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for RevokedAccessToken model.
+    """
+    list_display = ['user', 'jti', 'revoked_at', 'expires_at']
+    search_fields = ['user__username', 'jti']
+    ordering = ['-revoked_at']
+    readonly_fields = ['user', 'jti', 'revoked_at', 'expires_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,146 @@
+"""
+Asynchronous login audit log for the Bluestock IPO platform.
+
+Login events are put on a bounded queue and written by a background thread
+with ``bulk_create``, so the login response never waits for an audit
+insert. When the queue is full the event is written by the caller instead
+of being dropped; the overflow counter shows how often that happens.
+"""
+import atexit
+import logging
+import queue
+import threading
+from django.conf import settings
+from django.db import connection
+from .models import LoginLog
+
+logger = logging.getLogger(__name__)
+
+
+class LoginLogWriter:
+    """
+    Bounded queue of unsaved LoginLog rows drained by a daemon thread.
+    """
+
+    def __init__(self, max_queue, batch_size):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'overflow': 0,
+            'failed': 0,
+            'max_depth': 0,
+        }
+
+    def stats(self):
+        """Return counters plus the current queue depth."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['depth'] = self._queue.qsize()
+        stats['capacity'] = self._queue.maxsize
+        return stats
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def submit(self, entry):
+        """Queue a LoginLog for writing, or write it now if the queue is full."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count('overflow')
+            self._write([entry])
+            return
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats['enqueued'] += 1
+            self._stats['max_depth'] = max(self._stats['max_depth'], depth)
+
+    def _drain(self, first=None):
+        batch = [] if first is None else [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            with self._write_lock:
+                LoginLog.objects.bulk_create(batch)
+        except Exception as e:
+            self._count('failed', len(batch))
+            logger.error(f"Error writing {len(batch)} login log entries: {str(e)}")
+        else:
+            self._count('written', len(batch))
+
+    def flush(self):
+        """Write every queued entry from the calling thread."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            self._write(batch)
+
+    def _ensure_thread(self):
+        # Started lazily so pre-fork servers get one thread per worker
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='login-log-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._drain(self._queue.get())
+            try:
+                self._write(batch)
+            finally:
+                # Connections are per-thread; don't hold one between batches
+                connection.close()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_login_log_writer():
+    """Return the process-wide writer, creating it on first use."""
+    global _writer
+
+    with _writer_lock:
+        if _writer is None:
+            _writer = LoginLogWriter(
+                max_queue=settings.LOGIN_LOG_QUEUE_SIZE,
+                batch_size=settings.LOGIN_LOG_BATCH_SIZE,
+            )
+            atexit.register(_writer.flush)
+        return _writer
+
+
+def record_login(user, ip_address, user_agent, is_successful=True):
+    """
+    Record a login attempt, asynchronously unless LOGIN_LOG_ASYNC is off.
+    """
+    entry = LoginLog(
+        user=user,
+        ip_address=ip_address,
+        user_agent=user_agent,
+        is_successful=is_successful,
+    )
+    if settings.LOGIN_LOG_ASYNC:
+        get_login_log_writer().submit(entry)
+    else:
+        entry.save()
@@ -1,13 +1,18 @@
 """
 JWT Authentication implementation for the Bluestock IPO platform.
 """
+import uuid
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from .models import RefreshToken
+from .revocation import revocation_list, revoke_access_token
+from .tokens import decode_access_token, decode_token, encode_token
+from .user_cache import get_active_user
 
 User = get_user_model()
 
@@ -28,17 +33,17 @@ class JWTAuthentication(BaseAuthentication):
         
         try:
             token = auth_header.split(' ')[1]
-            payload = jwt.decode(
-                token, 
-                settings.JWT_SECRET_KEY, 
-                algorithms=[settings.JWT_ALGORITHM]
-            )
+            payload = decode_access_token(token)
             
             user_id = payload.get('user_id')
             if not user_id:
                 raise AuthenticationFailed('Invalid token payload')
             
-            user = User.objects.get(id=user_id, is_active=True)
+            jti = payload.get('jti')
+            if jti and revocation_list.is_revoked(jti):
+                raise AuthenticationFailed('Token has been revoked')
+            
+            user = get_active_user(user_id)
             return (user, token)
             
         except jwt.ExpiredSignatureError:
@@ -47,6 +52,8 @@ class JWTAuthentication(BaseAuthentication):
             raise AuthenticationFailed('Invalid token')
         except User.DoesNotExist:
             raise AuthenticationFailed('User not found')
+        except AuthenticationFailed:
+            raise
         except Exception as e:
             raise AuthenticationFailed(f'Authentication failed: {str(e)}')
     
@@ -75,41 +82,38 @@ class JWTTokenGenerator:
             'role': user.role,
             'exp': datetime.utcnow() + timedelta(seconds=settings.JWT_ACCESS_TOKEN_LIFETIME),
             'iat': datetime.utcnow(),
+            'jti': uuid.uuid4().hex,
             'type': 'access'
         }
         
-        return jwt.encode(
-            payload, 
-            settings.JWT_SECRET_KEY, 
-            algorithm=settings.JWT_ALGORITHM
-        )
+        return encode_token(payload)
     
     @staticmethod
     def generate_refresh_token(user):
         """
         Generate a refresh token for the given user.
         """
-        # Revoke existing refresh tokens
-        RefreshToken.objects.filter(user=user, is_revoked=False).update(is_revoked=True)
+        # Revoke existing refresh tokens (expired ones are left to the pruner)
+        RefreshToken.objects.filter(
+            user=user, is_revoked=False, expires_at__gt=timezone.now()
+        ).update(is_revoked=True)
         
         payload = {
             'user_id': user.id,
             'exp': datetime.utcnow() + timedelta(seconds=settings.JWT_REFRESH_TOKEN_LIFETIME),
             'iat': datetime.utcnow(),
+            # Unique per token, so two logins in the same second differ
+            'jti': uuid.uuid4().hex,
             'type': 'refresh'
         }
         
-        token = jwt.encode(
-            payload, 
-            settings.JWT_SECRET_KEY, 
-            algorithm=settings.JWT_ALGORITHM
-        )
+        token = encode_token(payload)
         
-        # Store refresh token in database
+        # Store the refresh token digest in database
         RefreshToken.objects.create(
             user=user,
-            token=token,
-            expires_at=datetime.utcnow() + timedelta(seconds=settings.JWT_REFRESH_TOKEN_LIFETIME)
+            token_hash=RefreshToken.hash_token(token),
+            expires_at=timezone.now() + timedelta(seconds=settings.JWT_REFRESH_TOKEN_LIFETIME)
         )
         
         return token
@@ -120,17 +124,15 @@ class JWTTokenGenerator:
         Verify and decode a refresh token.
         """
         try:
-            payload = jwt.decode(
-                token, 
-                settings.JWT_SECRET_KEY, 
-                algorithms=[settings.JWT_ALGORITHM]
-            )
+            payload = decode_token(token)
             
             if payload.get('type') != 'refresh':
                 raise jwt.InvalidTokenError('Invalid token type')
             
             # Check if token exists in database and is valid
-            refresh_token = RefreshToken.objects.get(token=token, is_revoked=False)
+            refresh_token = RefreshToken.objects.get(
+                token_hash=RefreshToken.hash_token(token), is_revoked=False
+            )
             if refresh_token.is_expired:
                 raise jwt.ExpiredSignatureError('Token has expired')
             
@@ -140,12 +142,44 @@ class JWTTokenGenerator:
         except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, RefreshToken.DoesNotExist, User.DoesNotExist):
             raise AuthenticationFailed('Invalid or expired refresh token')
     
+    @staticmethod
+    def revoke_access_token(token, user):
+        """
+        Revoke an access token before it expires.
+        """
+        try:
+            payload = decode_token(token)
+        except jwt.InvalidTokenError:
+            return False
+        return revoke_access_token(payload, user)
+    
     @staticmethod
     def revoke_refresh_token(token):
         """
         Revoke a refresh token.
         """
         try:
-            RefreshToken.objects.filter(token=token).update(is_revoked=True)
+            RefreshToken.objects.filter(
+                token_hash=RefreshToken.hash_token(token)
+            ).update(is_revoked=True)
         except RefreshToken.DoesNotExist:
-            pass
\ No newline at end of file
+            pass
+
+
+def prune_refresh_tokens(batch_size=5000, now=None):
+    """
+    Delete expired and revoked refresh tokens in batches.
+    
+    Each batch is a separate short DELETE by primary key so the table is
+    never locked for long. Returns the number of rows deleted.
+    """
+    now = now or timezone.now()
+    stale = RefreshToken.objects.filter(expires_at__lte=now) | RefreshToken.objects.filter(is_revoked=True)
+    
+    deleted = 0
+    while True:
+        ids = list(stale.order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        RefreshToken.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
@@ -0,0 +1,67 @@
+"""
+Benchmark access-token verification: HS256, RS256 and EdDSA decoding
+against the memoized path used by JWTAuthentication.
+
+Keys are generated in memory, so the configured keyset is not touched.
+"""
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand
+from apps.authentication.tokens import KeySet, VerifiedTokenCache
+
+
+class Command(BaseCommand):
+    help = 'Compare JWT verification cost per algorithm with and without memoization'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=5000,
+            help='Decodes per measurement',
+        )
+
+    def handle(self, *args, **options):
+        from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+
+        iterations = options['iterations']
+        rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        ed_key = ed25519.Ed25519PrivateKey.generate()
+        keysets = [
+            KeySet('HS256', 'bench', 'benchmark-secret', {'bench': 'benchmark-secret'}),
+            KeySet('RS256', 'bench', rsa_key, {'bench': rsa_key.public_key()}),
+            KeySet('EdDSA', 'bench', ed_key, {'bench': ed_key.public_key()}),
+        ]
+        payload = {
+            'user_id': 1,
+            'username': 'benchmark',
+            'role': 'user',
+            'exp': datetime.utcnow() + timedelta(hours=1),
+            'jti': 'benchmark',
+            'type': 'access',
+        }
+
+        self.stdout.write(f'{"algorithm":<10} {"decode":>12} {"memoized":>12}  speedup')
+        for keyset in keysets:
+            token = keyset.encode(payload)
+            cache = VerifiedTokenCache(max_size=1024)
+
+            def memoized():
+                result = cache.get(token)
+                if result is None:
+                    result = keyset.decode(token)
+                    cache.set(token, result)
+                return result
+
+            decode_us = self._time(lambda: keyset.decode(token), iterations)
+            memoized_us = self._time(memoized, iterations)
+            speedup = decode_us / memoized_us if memoized_us else float('inf')
+            self.stdout.write(
+                f'{keyset.algorithm:<10} {decode_us:>10.2f}us {memoized_us:>10.2f}us  {speedup:6.1f}x'
+            )
+
+    def _time(self, func, iterations):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations * 1_000_000
@@ -0,0 +1,37 @@
+"""
+Delete expired and revoked refresh tokens, and lapsed access-token revocations.
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.authentication.authentication import prune_refresh_tokens
+from apps.authentication.revocation import prune_revoked_access_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired and revoked refresh tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows deleted per statement',
+        )
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep running and prune every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['loop']
+        while True:
+            deleted = prune_refresh_tokens(batch_size=options['batch_size'])
+            revocations = prune_revoked_access_tokens()
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {deleted} refresh tokens and {revocations} access token revocations'
+            ))
+            if interval <= 0:
+                break
+            time.sleep(interval)
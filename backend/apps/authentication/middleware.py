@@ -2,49 +2,37 @@
 Authentication middleware for the Bluestock IPO platform.
 """
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib.auth import get_user_model
-from .models import LoginLog
+from bluestock_backend.request_info import client_ip, user_agent
+from .audit import record_login
 
-User = get_user_model()
+LOGIN_PATH = '/api/auth/login/'
 
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
     """
-    Middleware to handle JWT authentication and logging.
-    """
+    Middleware to log successful logins.
     
-    def process_request(self, request):
-        """
-        Process the request to extract user information from JWT token.
-        """
-        # Get client IP address
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        
-        request.client_ip = ip
-        request.user_agent = request.META.get('HTTP_USER_AGENT', '')
-        
-        return None
+    Only login requests are inspected; client details are read from the
+    request when a login is actually recorded, and the log row is written
+    off the response path.
+    """
     
     def process_response(self, request, response):
         """
         Process the response to log authentication events.
         """
         # Log successful login attempts
-        if (hasattr(request, 'user') and 
-            request.user.is_authenticated and 
-            request.path == '/api/auth/login/' and 
+        if (request.path == LOGIN_PATH and 
             request.method == 'POST' and 
-            response.status_code == 200):
+            response.status_code == 200 and 
+            hasattr(request, 'user') and 
+            request.user.is_authenticated):
             
-            LoginLog.objects.create(
+            record_login(
                 user=request.user,
-                ip_address=getattr(request, 'client_ip', '127.0.0.1'),
-                user_agent=getattr(request, 'user_agent', ''),
+                ip_address=client_ip(request),
+                user_agent=user_agent(request),
                 is_successful=True
             )
         
-        return response
\ No newline at end of file
+        return response
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:05
+
+import hashlib
+from django.db import migrations, models
+
+
+def hash_existing_tokens(apps, schema_editor):
+    RefreshToken = apps.get_model('authentication', 'RefreshToken')
+    batch = []
+    for refresh_token in RefreshToken.objects.only('id', 'token').iterator(chunk_size=2000):
+        refresh_token.token_hash = hashlib.sha256(refresh_token.token.encode()).hexdigest()
+        batch.append(refresh_token)
+        if len(batch) >= 2000:
+            RefreshToken.objects.bulk_update(batch, ['token_hash'])
+            batch = []
+    if batch:
+        RefreshToken.objects.bulk_update(batch, ['token_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='refreshtoken',
+            name='token_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_existing_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='refreshtoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='refreshtoken',
+            name='token_hash',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['user', 'is_revoked'], name='auth_refresh_user_revoked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['expires_at'], name='auth_refresh_expires_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0003_revoked_access_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loginlog',
+            index=models.Index(fields=['login_time', 'id'], name='auth_login_time_id_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 """
 Authentication models for the Bluestock IPO platform.
 """
+import hashlib
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
@@ -53,6 +54,10 @@ class LoginLog(models.Model):
         verbose_name = 'Login Log'
         verbose_name_plural = 'Login Logs'
         ordering = ['-login_time']
+        indexes = [
+            # admin_logs window and keyset pages
+            models.Index(fields=['login_time', 'id'], name='auth_login_time_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.login_time}"
@@ -61,9 +66,12 @@ class LoginLog(models.Model):
 class RefreshToken(models.Model):
     """
     Model to store refresh tokens for JWT authentication.
+    
+    Only a SHA-256 digest of each token is stored, so lookups hit a
+    fixed-width unique index and a leaked table cannot be replayed.
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='refresh_tokens')
-    token = models.TextField(unique=True)
+    token_hash = models.CharField(max_length=64, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_revoked = models.BooleanField(default=False)
@@ -73,14 +81,44 @@ class RefreshToken(models.Model):
         verbose_name = 'Refresh Token'
         verbose_name_plural = 'Refresh Tokens'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_revoked'], name='auth_refresh_user_revoked_idx'),
+            models.Index(fields=['expires_at'], name='auth_refresh_expires_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.created_at}"
     
+    @staticmethod
+    def hash_token(token):
+        """Return the stored digest of a refresh token."""
+        return hashlib.sha256(token.encode()).hexdigest()
+    
     @property
     def is_expired(self):
         return timezone.now() > self.expires_at
     
     @property
     def is_valid(self):
-        return not self.is_revoked and not self.is_expired
\ No newline at end of file
+        return not self.is_revoked and not self.is_expired
+
+
+class RevokedAccessToken(models.Model):
+    """
+    Access tokens revoked before they expire, by their ``jti`` claim.
+    
+    Rows are only needed until the token would have expired anyway.
+    """
+    jti = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='revoked_access_tokens')
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'auth_revoked_access_token'
+        verbose_name = 'Revoked Access Token'
+        verbose_name_plural = 'Revoked Access Tokens'
+        ordering = ['-revoked_at']
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.jti}"
@@ -0,0 +1,174 @@
+"""
+Access-token revocation for the Bluestock IPO platform.
+
+Access tokens carry a ``jti`` claim; revoking one stores the jti in
+RevokedAccessToken until the token would have expired. Checking the table on
+every request would add a query to each authenticated call, so each process
+keeps a bloom filter of revoked jtis: a miss proves the token is not revoked
+and needs no I/O, and only filter hits (real revocations or rare false
+positives) are confirmed against the database.
+
+The filter is rebuilt from the table every AUTH_REVOCATION_REFRESH_INTERVAL
+seconds on a background thread, while requests keep using the previous
+filter. Revocations made in this process are added to it immediately;
+those made by other processes take effect here at the next rebuild.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .models import RevokedAccessToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings.
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationList:
+    """
+    Process-wide view of revoked access tokens.
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._built_at = None
+        self._generation = 0
+        self._refreshing = None
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self.database_checks = 0
+
+    def _build(self):
+        jtis = list(
+            RevokedAccessToken.objects.filter(expires_at__gt=timezone.now()).values_list('jti', flat=True)
+        )
+        bloom = BloomFilter(
+            max(settings.AUTH_REVOCATION_FILTER_CAPACITY, len(jtis) * 2),
+            settings.AUTH_REVOCATION_FILTER_ERROR_RATE
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    def get_filter(self):
+        """
+        Return the bloom filter. The first call builds it; once it is stale
+        a rebuild starts in the background and the current one is returned.
+        """
+        with self._lock:
+            if self._filter is None:
+                # Nothing to serve yet, so the first build happens inline
+                self._filter = self._build()
+                self._built_at = time.monotonic()
+            elif (self._refreshing is None and
+                    time.monotonic() - self._built_at > settings.AUTH_REVOCATION_REFRESH_INTERVAL):
+                self._refreshing = []
+                self._refresh_thread = threading.Thread(
+                    target=self._refresh, args=(self._generation,),
+                    name='revocation-refresher', daemon=True
+                )
+                self._refresh_thread.start()
+            return self._filter
+
+    def _refresh(self, generation):
+        """Build a new filter outside the lock and swap it in."""
+        try:
+            bloom = self._build()
+        except Exception as e:
+            logger.error(f"Error rebuilding access token revocation filter: {str(e)}")
+            bloom = None
+        finally:
+            # Connections are per-thread; don't hold one between rebuilds
+            connection.close()
+
+        with self._lock:
+            if bloom is not None and generation == self._generation:
+                # Revocations made while the table was being read
+                for jti in self._refreshing:
+                    bloom.add(jti)
+                self._filter = bloom
+                self._built_at = time.monotonic()
+            self._refreshing = None
+
+    def add(self, jti):
+        """Record a revocation made in this process."""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+            if self._refreshing is not None:
+                self._refreshing.append(jti)
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._generation += 1
+
+    def is_revoked(self, jti):
+        """
+        Check if an access token id has been revoked.
+        """
+        if jti not in self.get_filter():
+            return False
+        self.database_checks += 1
+        return RevokedAccessToken.objects.filter(jti=jti).exists()
+
+
+revocation_list = RevocationList()
+
+
+def revoke_access_token(payload, user):
+    """
+    Revoke a decoded access token until its expiry.
+    """
+    jti = payload.get('jti')
+    if not jti:
+        # Issued before tokens carried an id; it lapses at expiry
+        return False
+
+    expires_at = datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+    RevokedAccessToken.objects.get_or_create(
+        jti=jti,
+        defaults={'user': user, 'expires_at': expires_at}
+    )
+    revocation_list.add(jti)
+    return True
+
+
+def prune_revoked_access_tokens(now=None):
+    """Delete revocations of tokens that have expired anyway."""
+    deleted, _ = RevokedAccessToken.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
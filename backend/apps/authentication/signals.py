@@ -0,0 +1,23 @@
+"""
+Signal handlers that invalidate cached authenticated users.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import User
+from .user_cache import bump_user_version
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    # A new user cannot be cached yet
+    if created or raw:
+        return
+    # Bump again after commit so no reader caches the pre-commit row
+    bump_user_version(instance.pk)
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    bump_user_version(instance.pk)
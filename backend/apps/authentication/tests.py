@@ -0,0 +1,318 @@
+"""
+Tests for the authentication app.
+"""
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .audit import LoginLogWriter
+from .authentication import JWTTokenGenerator, prune_refresh_tokens
+from .models import LoginLog, RefreshToken, User
+from .revocation import BloomFilter, RevocationList, revocation_list
+from .tokens import VerifiedTokenCache, get_keyset, reset_keyset, verified_tokens
+from .user_cache import user_cache
+
+
+class UserCacheTests(TestCase):
+    """
+    Authenticated requests reuse the cached user until it changes.
+    """
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        token = JWTTokenGenerator.generate_access_token(self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def _profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/profile/', **self.auth)
+        return response, len(queries)
+
+    def test_second_request_skips_user_query(self):
+        first, first_count = self._profile()
+        second, second_count = self._profile()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second_count, first_count - 1)
+
+    def test_deactivation_invalidates_cached_user(self):
+        self._profile()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        response, _ = self._profile()
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshTokenStoreTests(TestCase):
+    """
+    Refresh tokens are stored as digests and pruned once unusable.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    def test_refresh_rotates_token(self):
+        token = JWTTokenGenerator.generate_refresh_token(self.user)
+        stored = RefreshToken.objects.get()
+        self.assertEqual(stored.token_hash, RefreshToken.hash_token(token))
+
+        response = self.client.post(
+            '/api/auth/refresh/', {'refresh_token': token}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        reused = self.client.post(
+            '/api/auth/refresh/', {'refresh_token': token}, content_type='application/json'
+        )
+        self.assertEqual(reused.status_code, 400)
+
+    def test_prune_deletes_expired_and_revoked(self):
+        JWTTokenGenerator.generate_refresh_token(self.user)
+        JWTTokenGenerator.generate_refresh_token(self.user)
+        live = RefreshToken.objects.get(is_revoked=False)
+        RefreshToken.objects.create(
+            user=self.user,
+            token_hash='0' * 64,
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(prune_refresh_tokens(batch_size=1), 2)
+        self.assertEqual(list(RefreshToken.objects.all()), [live])
+
+
+class LoginLogTests(TestCase):
+    """
+    Successful logins are audited off the response path.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    @override_settings(LOGIN_LOG_ASYNC=False)
+    def test_login_is_logged_with_client_details(self):
+        response = self.client.post(
+            '/api/auth/login/',
+            {'username': 'admin', 'password': 'secret-pass'},
+            content_type='application/json',
+            HTTP_X_FORWARDED_FOR='203.0.113.7, 10.0.0.1',
+            HTTP_USER_AGENT='tests',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        log = LoginLog.objects.get()
+        self.assertEqual((log.user, log.ip_address, log.user_agent), (self.user, '203.0.113.7', 'tests'))
+
+    def test_writer_batches_queued_entries(self):
+        writer = LoginLogWriter(max_queue=10, batch_size=2)
+        for _ in range(3):
+            writer._queue.put(LoginLog(user=self.user, ip_address='10.0.0.1', user_agent=''))
+
+        with CaptureQueriesContext(connection) as queries:
+            writer.flush()
+
+        self.assertEqual(LoginLog.objects.count(), 3)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(writer.stats()['written'], 3)
+        self.assertEqual(writer.stats()['depth'], 0)
+
+
+class AccessTokenRevocationTests(TestCase):
+    """
+    Logout revokes the access token; unrevoked tokens cost no extra query.
+    """
+
+    def setUp(self):
+        revocation_list.reset()
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        token = JWTTokenGenerator.generate_access_token(self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_logout_revokes_access_token(self):
+        self.assertEqual(self.client.get('/api/auth/verify/', **self.auth).status_code, 200)
+        checks = revocation_list.database_checks
+
+        response = self.client.post('/api/auth/logout/', {}, content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(revocation_list.database_checks, checks)
+
+        self.assertEqual(self.client.get('/api/auth/verify/', **self.auth).status_code, 401)
+
+        other = JWTTokenGenerator.generate_access_token(self.user)
+        response = self.client.get('/api/auth/verify/', HTTP_AUTHORIZATION=f'Bearer {other}')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(AUTH_REVOCATION_REFRESH_INTERVAL=0)
+    def test_stale_filter_is_rebuilt_in_the_background(self):
+        revocations = RevocationList()
+        revocations._build = lambda: BloomFilter(capacity=10, error_rate=0.01)
+        current = revocations.get_filter()
+
+        release = threading.Event()
+        rebuilt = BloomFilter(capacity=10, error_rate=0.01)
+        rebuilt.add('revoked-elsewhere')
+
+        def slow_build():
+            release.wait(5)
+            return rebuilt
+
+        revocations._build = slow_build
+        time.sleep(0.001)
+        # Requests keep the current filter while the rebuild runs
+        self.assertIs(revocations.get_filter(), current)
+        self.assertIs(revocations.get_filter(), current)
+        revocations.add('revoked-here')
+
+        release.set()
+        revocations._refresh_thread.join(5)
+        bloom = revocations.get_filter()
+        self.assertIs(bloom, rebuilt)
+        self.assertIn('revoked-elsewhere', bloom)
+        self.assertIn('revoked-here', bloom)
+        revocations._refresh_thread.join(5)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        values = [f'jti-{index}' for index in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f'other-{index}' in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class SigningKeyTests(TestCase):
+    """
+    Tokens are signed with the active key and verified by ``kid``.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(reset_keyset)
+        self.keys_dir = Path(directory.name)
+        (self.keys_dir / 'public').mkdir()
+
+    def _write_key(self, kid):
+        key = ed25519.Ed25519PrivateKey.generate()
+        (self.keys_dir / f'{kid}.key').write_bytes(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+        (self.keys_dir / 'public' / f'{kid}.pem').write_bytes(key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ))
+
+    def _use_key(self, kid):
+        settings = override_settings(
+            JWT_ALGORITHM='EdDSA',
+            JWT_KEY_ID=kid,
+            JWT_PRIVATE_KEY_FILE=str(self.keys_dir / f'{kid}.key'),
+            JWT_PUBLIC_KEYS_DIR=str(self.keys_dir / 'public'),
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        reset_keyset()
+
+    def _verify(self, token):
+        return self.client.get('/api/auth/verify/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_rotated_key_still_verifies_old_tokens(self):
+        self._write_key('2024-01')
+        self._use_key('2024-01')
+        old = JWTTokenGenerator.generate_access_token(self.user)
+        self.assertEqual(jwt.get_unverified_header(old), {'alg': 'EdDSA', 'kid': '2024-01', 'typ': 'JWT'})
+
+        self._write_key('2024-02')
+        self._use_key('2024-02')
+        new = JWTTokenGenerator.generate_access_token(self.user)
+
+        self.assertEqual(jwt.get_unverified_header(new)['kid'], '2024-02')
+        self.assertEqual(self._verify(old).status_code, 200)
+        self.assertEqual(self._verify(new).status_code, 200)
+
+        (self.keys_dir / 'public' / '2024-01.pem').unlink()
+        reset_keyset()
+        self.assertEqual(self._verify(old).status_code, 401)
+        self.assertEqual(self._verify(new).status_code, 200)
+
+    def test_rejects_token_signed_with_other_algorithm(self):
+        self._write_key('2024-01')
+        self._use_key('2024-01')
+        forged = jwt.encode(
+            {'user_id': self.user.id, 'exp': time.time() + 60},
+            'guessed-secret',
+            algorithm='HS256',
+            headers={'kid': '2024-01'},
+        )
+        self.assertEqual(self._verify(forged).status_code, 401)
+
+
+class VerifiedTokenCacheTests(TestCase):
+    """
+    Repeated requests with one access token verify its signature once.
+    """
+
+    def setUp(self):
+        verified_tokens.clear()
+        self.user = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+
+    def test_repeated_token_is_verified_once(self):
+        token = JWTTokenGenerator.generate_access_token(self.user)
+        keyset = get_keyset()
+        decodes = []
+        original = keyset.decode
+
+        def counting_decode(value):
+            decodes.append(value)
+            return original(value)
+
+        keyset.decode = counting_decode
+        self.addCleanup(vars(keyset).pop, 'decode')
+
+        for _ in range(3):
+            response = self.client.get('/api/auth/verify/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(decodes, [token])
+
+    def test_memoized_payload_expires(self):
+        cache = VerifiedTokenCache(max_size=2)
+        cache.set('expired', {'exp': time.time() - 1})
+        cache.set('live', {'exp': time.time() + 60})
+        cache.set('other', {'exp': time.time() + 60})
+
+        self.assertIsNone(cache.get('expired'))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get('live'))
+
+        cache.set('newest', {'exp': time.time() + 60})
+        self.assertIsNone(cache.get('other'))
+        self.assertIsNotNone(cache.get('live'))
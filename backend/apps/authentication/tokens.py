@@ -0,0 +1,175 @@
+"""
+JWT signing keys and verification for the Bluestock IPO platform.
+
+Tokens are signed with the active key of a keyset and carry its ``kid`` in
+the header. HS* algorithms use JWT_SECRET_KEY. Asymmetric algorithms (RS256,
+PS256, ES256, EdDSA) sign with the PEM private key in JWT_PRIVATE_KEY_FILE
+and verify with its public key plus any ``<kid>.pem`` public keys in
+JWT_PUBLIC_KEYS_DIR, so a key can be rotated while tokens signed with the
+previous one are still accepted. Keys are parsed once per process.
+
+Access tokens are verified once and their payloads memoized in a small LRU
+keyed by the token until it expires, so repeated requests with the same
+token skip signature verification.
+"""
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+import jwt
+from django.conf import settings
+
+SYMMETRIC_PREFIX = 'HS'
+
+
+class KeySet:
+    """
+    Signing key and verification keys by ``kid`` for one algorithm.
+    """
+
+    def __init__(self, algorithm, signing_kid, signing_key, verification_keys):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self.signing_key = signing_key
+        self.verification_keys = verification_keys
+
+    @classmethod
+    def from_settings(cls):
+        algorithm = settings.JWT_ALGORITHM
+        kid = settings.JWT_KEY_ID
+
+        if algorithm.startswith(SYMMETRIC_PREFIX):
+            secret = settings.JWT_SECRET_KEY
+            return cls(algorithm, kid, secret, {kid: secret})
+
+        # Asymmetric algorithms need the optional cryptography package
+        from cryptography.hazmat.primitives import serialization
+
+        private_key = serialization.load_pem_private_key(
+            Path(settings.JWT_PRIVATE_KEY_FILE).read_bytes(), password=None
+        )
+        verification_keys = {kid: private_key.public_key()}
+
+        if settings.JWT_PUBLIC_KEYS_DIR:
+            for path in sorted(Path(settings.JWT_PUBLIC_KEYS_DIR).glob('*.pem')):
+                verification_keys.setdefault(
+                    path.stem, serialization.load_pem_public_key(path.read_bytes())
+                )
+
+        return cls(algorithm, kid, private_key, verification_keys)
+
+    def encode(self, payload):
+        return jwt.encode(
+            payload,
+            self.signing_key,
+            algorithm=self.algorithm,
+            headers={'kid': self.signing_kid}
+        )
+
+    def decode(self, token):
+        """
+        Verify a token and return its payload.
+
+        Tokens without a ``kid`` predate key rotation and are checked
+        against the active key.
+        """
+        kid = jwt.get_unverified_header(token).get('kid', self.signing_kid)
+        try:
+            key = self.verification_keys[kid]
+        except KeyError:
+            raise jwt.InvalidTokenError('Unknown signing key')
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+
+_keyset = None
+_keyset_lock = threading.Lock()
+
+
+def get_keyset():
+    """Return the process-wide keyset, loading it on first use."""
+    global _keyset
+
+    with _keyset_lock:
+        if _keyset is None:
+            _keyset = KeySet.from_settings()
+        return _keyset
+
+
+def reset_keyset():
+    """Reload keys on next use, e.g. after rotating them on disk."""
+    global _keyset
+
+    with _keyset_lock:
+        _keyset = None
+    verified_tokens.clear()
+
+
+def encode_token(payload):
+    """Sign a payload with the active key."""
+    return get_keyset().encode(payload)
+
+
+def decode_token(token):
+    """Verify a token with the keyset and return its payload."""
+    return get_keyset().decode(token)
+
+
+class VerifiedTokenCache:
+    """
+    Thread-safe LRU of verified tokens to their payloads, valid until exp.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token):
+        with self._lock:
+            payload = self._entries.get(token)
+            if payload is not None and payload['exp'] <= time.time():
+                del self._entries[token]
+                payload = None
+            if payload is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return payload
+
+    def set(self, token, payload):
+        if self.max_size <= 0 or 'exp' not in payload:
+            return
+        with self._lock:
+            self._entries[token] = payload
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+verified_tokens = VerifiedTokenCache(max_size=settings.JWT_VERIFIED_TOKEN_CACHE_SIZE)
+
+
+def decode_access_token(token):
+    """
+    Verify an access token, reusing the payload of an earlier verification.
+
+    Raises jwt.ExpiredSignatureError once a memoized token expires, the same
+    as a fresh decode would.
+    """
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
+
+    payload = decode_token(token)
+    verified_tokens.set(token, payload)
+    return payload
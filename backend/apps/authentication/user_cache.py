@@ -0,0 +1,116 @@
+"""
+Per-process cache of authenticated users for JWTAuthentication.
+
+Every authenticated request used to load its user from the database. Users
+are now kept in a bounded LRU for AUTH_USER_CACHE_TTL seconds. Each entry
+records the user's version, a counter in the Django cache that User
+save/delete signals bump; an entry whose version no longer matches is
+reloaded, so with a shared cache backend changes apply to every process at
+once, and with locmem other processes pick them up within the TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from .models import User
+
+VERSION_KEY = 'auth:user-version:{}'
+
+
+def get_user_version(user_id):
+    """Return the invalidation version of a user (0 until first bumped)."""
+    return cache.get(VERSION_KEY.format(user_id), 0)
+
+
+def bump_user_version(user_id):
+    """Invalidate cached copies of a user in every process."""
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+    user_cache.discard(user_id)
+
+
+class UserCache:
+    """
+    Thread-safe LRU of active users by id with a time-to-live.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, user_id):
+        """
+        Return a copy of the cached user, or None if missing, expired or
+        invalidated.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                user, version, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                else:
+                    del self._entries[user_id]
+                    entry = None
+
+        if entry is not None and version == get_user_version(user_id):
+            self.hits += 1
+            # Requests may set attributes on request.user; keep ours clean
+            return copy.copy(user)
+
+        self.misses += 1
+        return None
+
+    def set(self, user, version, ttl):
+        """
+        Cache a user loaded from the database.
+
+        ``version`` must be read before the user was loaded, so a change
+        committed in between leaves the entry already invalid.
+        """
+        entry = (copy.copy(user), version, time.monotonic() + ttl)
+        with self._lock:
+            self._entries[user.pk] = entry
+            self._entries.move_to_end(user.pk)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(max_size=settings.AUTH_USER_CACHE_SIZE)
+
+
+def get_active_user(user_id):
+    """
+    Return the active user with the given id, from the cache when possible.
+
+    Raises User.DoesNotExist like ``User.objects.get``.
+    """
+    ttl = settings.AUTH_USER_CACHE_TTL
+    if ttl <= 0:
+        return User.objects.get(id=user_id, is_active=True)
+
+    user = user_cache.get(user_id)
+    if user is None:
+        version = get_user_version(user_id)
+        user = User.objects.get(id=user_id, is_active=True)
+        user_cache.set(user, version, ttl)
+    return user
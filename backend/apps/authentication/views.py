@@ -119,19 +119,23 @@ def refresh_token(request):
         200: openapi.Response(description="Logout successful"),
         400: openapi.Response(description="Invalid request"),
     },
-    operation_description="Logout user and revoke refresh token"
+    operation_description="Logout user and revoke the refresh and access tokens"
 )
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout(request):
     """
-    Logout endpoint - revokes refresh token.
+    Logout endpoint - revokes the refresh token and current access token.
     """
     refresh_token = request.data.get('refresh_token')
     
     if refresh_token:
         JWTTokenGenerator.revoke_refresh_token(refresh_token)
     
+    # Revoke the access token used for this request
+    if isinstance(request.auth, str):
+        JWTTokenGenerator.revoke_access_token(request.auth, request.user)
+    
     # Update login log with logout time
     try:
         login_log = LoginLog.objects.filter(
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['sector', 'name'], name='companies_sector_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['created_at', 'id'], name='companies_created_at_id_idx'),
+        ),
+    ]
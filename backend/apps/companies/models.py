@@ -2,14 +2,37 @@
 Company models for the Bluestock IPO platform.
 """
 from django.db import models
+from django.db.models import Count, Q
 from django.core.validators import RegexValidator, MinValueValidator
 from django.utils import timezone
+from bluestock_backend.loaded_values import LoadedValuesMixin
 
 
-class Company(models.Model):
+class CompanyQuerySet(models.QuerySet):
+    """
+    QuerySet with company-level IPO aggregates.
+    """
+
+    def with_ipo_counts(self):
+        """
+        Annotate total_ipos_count and active_ipos_count in the main query.
+        """
+        return self.annotate(
+            total_ipos_count=Count('ipos', distinct=True),
+            active_ipos_count=Count(
+                'ipos',
+                filter=Q(ipos__status__in=Company.ACTIVE_IPO_STATUSES),
+                distinct=True
+            ),
+        )
+
+
+class Company(LoadedValuesMixin, models.Model):
     """
     Model representing a company that may have IPOs.
     """
+    ACTIVE_IPO_STATUSES = ['upcoming', 'open']
+    
     SECTOR_CHOICES = [
         ('technology', 'Technology'),
         ('healthcare', 'Healthcare'),
@@ -80,11 +103,18 @@ class Company(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CompanyQuerySet.as_manager()
+    
     class Meta:
         db_table = 'companies'
         verbose_name = 'Company'
         verbose_name_plural = 'Companies'
         ordering = ['name']
+        indexes = [
+            # ?sector= listings ordered by name, and the per-sector counts
+            models.Index(fields=['sector', 'name'], name='companies_sector_name_idx'),
+            models.Index(fields=['created_at', 'id'], name='companies_created_at_id_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -97,7 +127,7 @@ class Company(models.Model):
     @property
     def active_ipos(self):
         """Return the number of active IPOs for this company."""
-        return self.ipos.filter(status__in=['upcoming', 'open']).count()
+        return self.ipos.filter(status__in=self.ACTIVE_IPO_STATUSES).count()
 
 
 class CompanyFinancial(models.Model):
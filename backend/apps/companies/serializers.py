@@ -5,6 +5,26 @@ from rest_framework import serializers
 from .models import Company, CompanyFinancial
 
 
+class IPOCountsMixin:
+    """
+    Read IPO counters from queryset annotations when present.
+
+    Querysets built with ``Company.objects.with_ipo_counts()`` carry
+    ``total_ipos_count``/``active_ipos_count``; anything else falls back to
+    the model properties, which run a COUNT each.
+    """
+
+    def get_total_ipos(self, obj):
+        """Return the total number of IPOs for the company."""
+        count = getattr(obj, 'total_ipos_count', None)
+        return obj.total_ipos if count is None else count
+
+    def get_active_ipos(self, obj):
+        """Return the number of active IPOs for the company."""
+        count = getattr(obj, 'active_ipos_count', None)
+        return obj.active_ipos if count is None else count
+
+
 class CompanyFinancialSerializer(serializers.ModelSerializer):
     """
     Serializer for company financial data.
@@ -19,13 +39,13 @@ class CompanyFinancialSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(IPOCountsMixin, serializers.ModelSerializer):
     """
     Serializer for company data.
     """
     financials = CompanyFinancialSerializer(many=True, read_only=True)
-    total_ipos = serializers.ReadOnlyField()
-    active_ipos = serializers.ReadOnlyField()
+    total_ipos = serializers.SerializerMethodField()
+    active_ipos = serializers.SerializerMethodField()
     
     class Meta:
         model = Company
@@ -52,12 +72,12 @@ class CompanySerializer(serializers.ModelSerializer):
         return value.upper()
 
 
-class CompanyListSerializer(serializers.ModelSerializer):
+class CompanyListSerializer(IPOCountsMixin, serializers.ModelSerializer):
     """
     Simplified serializer for company list view.
     """
-    total_ipos = serializers.ReadOnlyField()
-    active_ipos = serializers.ReadOnlyField()
+    total_ipos = serializers.SerializerMethodField()
+    active_ipos = serializers.SerializerMethodField()
     
     class Meta:
         model = Company
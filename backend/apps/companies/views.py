@@ -8,6 +8,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from bluestock_backend.pagination import CursorPaginator, InvalidCursor
+from bluestock_backend.response_cache import cache_response
 from .models import Company
 from .serializers import (
     CompanySerializer, 
@@ -34,6 +36,7 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         openapi.Parameter('is_active', openapi.IN_QUERY, description="Filter by active status", type=openapi.TYPE_BOOLEAN),
         openapi.Parameter('ordering', openapi.IN_QUERY, description="Order by field (name, created_at, market_cap)", type=openapi.TYPE_STRING),
         openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor for keyset pagination; pass an empty value for the first page", type=openapi.TYPE_STRING),
     ],
     responses={200: CompanyListSerializer(many=True)},
     operation_description="Get list of all companies with filtering and search"
@@ -81,6 +84,38 @@ def company_list_create(request):
         if ordering in ['name', '-name', 'created_at', '-created_at', 'market_cap', '-market_cap']:
             companies = companies.order_by(ordering)
         
+        # Annotate IPO counters once the filters are final
+        companies = companies.with_ipo_counts()
+        
+        # Keyset pagination when a cursor is passed
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            if ordering in ['market_cap', '-market_cap']:
+                # market_cap is nullable, so it cannot key a cursor
+                return Response(
+                    {'error': 'Cursor pagination supports ordering by name or created_at only'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if ordering not in ['name', '-name', 'created_at', '-created_at']:
+                ordering = 'name'
+            try:
+                page = CursorPaginator(companies, [ordering], 20).page(cursor)
+            except InvalidCursor as e:
+                return Response(
+                    {'error': str(e)}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            serializer = CompanyListSerializer(page.items, many=True)
+            
+            return Response({
+                'results': serializer.data,
+                'next_cursor': page.next_cursor,
+                'previous_cursor': page.previous_cursor,
+                'has_next': page.has_next(),
+                'has_previous': page.has_previous(),
+            })
+        
         # Pagination
         from django.core.paginator import Paginator
         page_number = request.query_params.get('page', 1)
@@ -146,7 +181,7 @@ def company_detail(request, pk):
     Retrieve, update or delete a company.
     """
     try:
-        company = Company.objects.get(pk=pk)
+        company = Company.objects.with_ipo_counts().get(pk=pk)
     except Company.DoesNotExist:
         return Response(
             {'error': 'Company not found'}, 
@@ -166,7 +201,7 @@ def company_detail(request, pk):
     
     elif request.method == 'DELETE':
         # Check if company has active IPOs
-        if company.ipos.filter(status__in=['upcoming', 'open']).exists():
+        if company.ipos.filter(status__in=Company.ACTIVE_IPO_STATUSES).exists():
             return Response(
                 {'error': 'Cannot delete company with active IPOs'}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -200,6 +235,7 @@ def company_detail(request, pk):
 )
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cache_response('company_sectors')
 def company_sectors(request):
     """
     Get list of available company sectors.
@@ -0,0 +1,204 @@
+"""
+Buffered download accounting for the Bluestock IPO platform.
+
+Downloads are recorded in an in-process buffer instead of writing a log row
+and a counter update per request. A daemon thread flushes the buffer every
+DOWNLOAD_BUFFER_FLUSH_INTERVAL seconds (or sooner once
+DOWNLOAD_BUFFER_MAX_EVENTS are pending, and on interpreter shutdown) with one
+``bulk_create`` of the log rows and one ``F()`` increment per distinct count,
+so concurrent downloads of the same document never lose an increment.
+
+Downloads of documents deleted before the flush (a re-upload replaces the
+document) are dropped and downloads by users deleted since keep no user. A
+batch that still fails DOWNLOAD_BUFFER_MAX_RETRIES flushes in a row is
+written one event at a time and only the events that fail are discarded, so
+one bad event can't stop accounting for good.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from bluestock_backend.request_info import client_ip, user_agent
+from .models import Document, DocumentDownloadLog
+
+logger = logging.getLogger(__name__)
+
+
+def write_downloads(events):
+    """
+    Persist download events: log rows plus aggregated counter increments.
+
+    Events for documents that no longer exist are skipped and events of
+    users that no longer exist are written without one. Returns the number
+    of events written.
+    """
+    if not events:
+        return 0
+
+    with transaction.atomic():
+        existing = set(
+            Document.objects.filter(pk__in={event.document_id for event in events})
+            .values_list('pk', flat=True)
+        )
+        events = [event for event in events if event.document_id in existing]
+        if not events:
+            return 0
+
+        user_ids = {event.user_id for event in events if event.user_id is not None}
+        if user_ids:
+            users = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+            for event in events:
+                if event.user_id is not None and event.user_id not in users:
+                    # Clear the cached instance too, or saving restores its id
+                    event.user = None
+
+        counts = Counter(event.document_id for event in events)
+        documents_by_count = defaultdict(list)
+        for document_id, count in counts.items():
+            documents_by_count[count].append(document_id)
+
+        DocumentDownloadLog.objects.bulk_create(events, batch_size=500)
+        for count, document_ids in documents_by_count.items():
+            Document.objects.filter(pk__in=document_ids).update(
+                download_count=F('download_count') + count
+            )
+    return len(events)
+
+
+class DownloadBuffer:
+    """
+    Thread-safe buffer of pending DocumentDownloadLog rows.
+    """
+
+    def __init__(self, interval, max_events, max_retries=None):
+        self.interval = interval
+        self.max_events = max_events
+        self.max_retries = settings.DOWNLOAD_BUFFER_MAX_RETRIES if max_retries is None else max_retries
+        self._events = []
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def record(self, event):
+        """Queue an unsaved DocumentDownloadLog."""
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.max_events
+            self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Write every pending event. A failed batch is put back, and after
+        max_retries failed flushes in a row is written event by event,
+        dropping only the events that still fail.
+        """
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            try:
+                written = write_downloads(events)
+            except Exception as e:
+                self._failures += 1
+                if self._failures > self.max_retries:
+                    logger.error(
+                        f"Writing {len(events)} download events one by one after "
+                        f"{self._failures} failed flushes: {str(e)}"
+                    )
+                    self._failures = 0
+                    return self._write_each(events)
+                logger.error(f"Error flushing {len(events)} download events: {str(e)}")
+                with self._lock:
+                    self._events[:0] = events
+                return 0
+            self._failures = 0
+            return written
+
+    def _write_each(self, events):
+        written = 0
+        for event in events:
+            try:
+                written += write_downloads([event])
+            except Exception as e:
+                logger.error(f"Discarding download event of document {event.document_id}: {str(e)}")
+        return written
+
+    def _ensure_thread(self):
+        # Started lazily so pre-fork servers get one thread per worker
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name='download-accounting', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # Connections are per-thread; don't hold one between flushes
+                connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_download_buffer():
+    """
+    Return the process-wide buffer, or None when buffering is disabled.
+    """
+    global _buffer
+
+    interval = settings.DOWNLOAD_BUFFER_FLUSH_INTERVAL
+    if interval <= 0:
+        return None
+
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = DownloadBuffer(interval, settings.DOWNLOAD_BUFFER_MAX_EVENTS)
+            atexit.register(_buffer.flush)
+        return _buffer
+
+
+def flush_downloads():
+    """Flush pending download events now; returns the number written."""
+    return _buffer.flush() if _buffer is not None else 0
+
+
+def record_download(request, document):
+    """
+    Account for a download of a document.
+
+    Buffered unless DOWNLOAD_BUFFER_FLUSH_INTERVAL is 0, in which case the
+    log row and counter increment are written immediately.
+    """
+    event = DocumentDownloadLog(
+        document_id=document.pk,
+        ip_address=client_ip(request),
+        user_agent=user_agent(request),
+        user=request.user if request.user.is_authenticated else None,
+        downloaded_at=timezone.now(),
+    )
+
+    buffer = get_download_buffer()
+    if buffer is None:
+        write_downloads([event])
+    else:
+        buffer.record(event)
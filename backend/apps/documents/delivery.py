@@ -0,0 +1,198 @@
+"""
+Document delivery for the Bluestock IPO platform.
+
+Serves stored document files with HTTP validators (ETag/Last-Modified and
+304 responses), single byte-range requests (206/416) for resumable downloads
+and in-browser PDF viewers, and an optional offload mode where the front-end
+server streams the file:
+
+- ``x-accel-redirect``: nginx serves ``DOCUMENT_DOWNLOAD_ACCEL_PREFIX`` +
+  the file's storage name from an ``internal`` location aliased to
+  MEDIA_ROOT.
+- ``x-sendfile``: Apache mod_xsendfile or lighttpd serve the absolute path.
+
+In both modes the worker returns headers only and the front-end handles
+Range itself.
+"""
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.http import (
+    content_disposition_header,
+    http_date,
+    parse_http_date_safe,
+    quote_etag,
+)
+
+OFFLOAD_MODES = ('x-accel-redirect', 'x-sendfile')
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_type_for(document):
+    """Content type sent for a document file."""
+    return 'application/pdf' if document.file_extension == '.pdf' else 'application/octet-stream'
+
+
+def file_validators(stat):
+    """Return (etag, last_modified timestamp) for a stored file."""
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    return etag, int(stat.st_mtime)
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (absent, malformed or a
+    multi-range request, which is answered with the full file), and raises
+    ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or '').replace(' ', ''))
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def _range_applies(request, etag, last_modified):
+    """Check If-Range: serve the range only if the client's copy is current."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _not_modified(request, etag, last_modified):
+    """Evaluate If-None-Match, falling back to If-Modified-Since."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return if_none_match.strip() == '*' or etag in [
+            tag.strip() for tag in if_none_match.split(',')
+        ]
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def iter_file_range(path, start, length, chunk_size=CHUNK_SIZE):
+    """Yield length bytes of a file starting at offset start."""
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload_response(document, mode):
+    """Headers-only response handing the file to the front-end server."""
+    response = HttpResponse(content_type=content_type_for(document))
+    if mode == 'x-accel-redirect':
+        prefix = settings.DOCUMENT_DOWNLOAD_ACCEL_PREFIX.rstrip('/')
+        response['X-Accel-Redirect'] = quote(f'{prefix}/{document.file.name}')
+    else:
+        response['X-Sendfile'] = document.file.path
+    return response
+
+
+def serve_document(request, document):
+    """
+    Build the download response for a document whose file exists.
+
+    Returns 304 when the client's copy is current, 206 or 416 for range
+    requests, 200 otherwise, or a headers-only response when
+    DOCUMENT_DOWNLOAD_OFFLOAD is set.
+    """
+    path = document.file.path
+    stat = os.stat(path)
+    size = stat.st_size
+    etag, last_modified = file_validators(stat)
+    validators = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+    }
+
+    if _not_modified(request, etag, last_modified):
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    mode = settings.DOCUMENT_DOWNLOAD_OFFLOAD
+    if mode in OFFLOAD_MODES:
+        response = _offload_response(document, mode)
+    else:
+        byte_range = None
+        if _range_applies(request, etag, last_modified):
+            try:
+                byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                response['Accept-Ranges'] = 'bytes'
+                return response
+
+        if byte_range is None:
+            # Full file: FileResponse lets the WSGI server use sendfile()
+            response = FileResponse(open(path, 'rb'), content_type=content_type_for(document))
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(path, start, end - start + 1),
+                status=206,
+                content_type=content_type_for(document)
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = content_disposition_header(True, document.original_filename)
+    for header, value in validators.items():
+        response[header] = value
+    return response
+
+
+def counts_as_download(request, response):
+    """
+    Check if a delivery response starts a new download.
+
+    Revalidations and follow-up range requests from resumed downloads or
+    PDF viewers are not counted again.
+    """
+    if response.status_code == 206:
+        return response['Content-Range'].startswith('bytes 0-')
+    if response.status_code != 200:
+        return False
+    if not (response.has_header('X-Accel-Redirect') or response.has_header('X-Sendfile')):
+        return True
+
+    # Offloaded responses leave the Range header to the front-end server
+    match = RANGE_RE.match(request.META.get('HTTP_RANGE', '').replace(' ', ''))
+    return match is None or match.group(1) == '0'
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_download_log_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['uploaded_at'], name='documents_uploaded_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentdownloadlog',
+            index=models.Index(fields=['downloaded_at'], name='doc_download_time_idx'),
+        ),
+    ]
@@ -5,6 +5,9 @@ import os
 from django.db import models
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from bluestock_backend.loaded_values import LoadedValuesMixin
 from apps.ipos.models import IPO
 
 
@@ -16,7 +19,7 @@ def document_upload_path(instance, filename):
     return f'documents/ipo_{instance.ipo.id}/{instance.document_type}/{filename}'
 
 
-class Document(models.Model):
+class Document(LoadedValuesMixin, models.Model):
     """
     Model for storing IPO-related documents (RHP, DRHP, etc.).
     """
@@ -73,6 +76,9 @@ class Document(models.Model):
         verbose_name_plural = 'Documents'
         ordering = ['-uploaded_at']
         unique_together = ['ipo', 'document_type']  # One document per type per IPO
+        indexes = [
+            models.Index(fields=['uploaded_at'], name='documents_uploaded_at_idx'),
+        ]
     
     def __str__(self):
         return f"{self.ipo.company.name} - {self.get_document_type_display()}"
@@ -94,8 +100,8 @@ class Document(models.Model):
     
     def increment_download_count(self):
         """Increment download count."""
-        self.download_count += 1
-        self.save(update_fields=['download_count'])
+        Document.objects.filter(pk=self.pk).update(download_count=F('download_count') + 1)
+        self.refresh_from_db(fields=['download_count'])
     
     def delete(self, *args, **kwargs):
         """Delete file when model instance is deleted."""
@@ -116,7 +122,8 @@ class DocumentDownloadLog(models.Model):
     )
     ip_address = models.GenericIPAddressField()
     user_agent = models.TextField(blank=True)
-    downloaded_at = models.DateTimeField(auto_now_add=True)
+    # Set when the download happens; buffered rows are inserted later
+    downloaded_at = models.DateTimeField(default=timezone.now, editable=False)
     
     # Optional user tracking (if user is logged in)
     user = models.ForeignKey(
@@ -132,6 +139,9 @@ class DocumentDownloadLog(models.Model):
         verbose_name = 'Document Download Log'
         verbose_name_plural = 'Document Download Logs'
         ordering = ['-downloaded_at']
+        indexes = [
+            models.Index(fields=['downloaded_at'], name='doc_download_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.document.title} - {self.downloaded_at}"
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Document presence lookups for IPO serializers.
+"""
+from collections import defaultdict
+from .models import Document
+
+
+class DocumentPresenceIndex:
+    """
+    Map of document types available per IPO.
+
+    Built once per request, either from a ``prefetch_related('documents')``
+    cache or from a single query, so serializers can answer "does this IPO
+    have an RHP?" without touching the database for every row.
+    """
+
+    def __init__(self):
+        self._types_by_ipo = defaultdict(set)
+        self._ipo_ids = set()
+
+    @classmethod
+    def for_ipos(cls, ipos):
+        """Build the index for the given IPO instances."""
+        index = cls()
+        index.extend(ipos)
+        return index
+
+    def extend(self, ipos):
+        """
+        Add IPOs to the index.
+
+        Uses prefetched documents when every IPO carries them, otherwise
+        issues one query over all IPO ids not indexed yet.
+        """
+        ipos = [
+            ipo for ipo in ipos
+            if ipo is not None and ipo.pk is not None and ipo.pk not in self._ipo_ids
+        ]
+        if not ipos:
+            return
+
+        self._ipo_ids.update(ipo.pk for ipo in ipos)
+
+        if all('documents' in getattr(ipo, '_prefetched_objects_cache', {}) for ipo in ipos):
+            for ipo in ipos:
+                self._types_by_ipo[ipo.pk].update(
+                    document.document_type for document in ipo.documents.all()
+                )
+            return
+
+        rows = Document.objects.filter(
+            ipo_id__in=[ipo.pk for ipo in ipos]
+        ).values_list('ipo_id', 'document_type').distinct()
+        for ipo_id, document_type in rows:
+            self._types_by_ipo[ipo_id].add(document_type)
+
+    def covers(self, ipo_id):
+        """Check if the IPO has been indexed."""
+        return ipo_id in self._ipo_ids
+
+    def has(self, ipo_id, document_type):
+        """Check if the IPO has a document of the given type."""
+        return document_type in self._types_by_ipo.get(ipo_id, ())
+
+    def types_for(self, ipo_id):
+        """Return the set of document types available for the IPO."""
+        return frozenset(self._types_by_ipo.get(ipo_id, ()))
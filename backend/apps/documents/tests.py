@@ -0,0 +1,178 @@
+"""
+Tests for the documents app.
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.test import TestCase, override_settings
+from apps.authentication.models import User
+from apps.ipos.tests import create_document, create_ipo
+from .accounting import DownloadBuffer, write_downloads
+from .delivery import parse_range
+from .models import DocumentDownloadLog
+
+CONTENT = bytes(range(256)) * 40
+
+
+class ParseRangeTests(TestCase):
+    """
+    Range headers map to inclusive byte offsets.
+    """
+
+    def test_ranges(self):
+        self.assertEqual(parse_range('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=-100', 1000), (900, 999))
+        self.assertEqual(parse_range('bytes=990-5000', 1000), (990, 999))
+
+    def test_ignored_and_unsatisfiable_ranges(self):
+        self.assertIsNone(parse_range(None, 1000))
+        self.assertIsNone(parse_range('bytes=0-1,5-9', 1000))
+        self.assertIsNone(parse_range('items=0-1', 1000))
+        with self.assertRaises(ValueError):
+            parse_range('bytes=1000-', 1000)
+
+
+@override_settings(DOWNLOAD_BUFFER_FLUSH_INTERVAL=0)
+class DocumentDownloadTests(TestCase):
+    """
+    Downloads support byte ranges and revalidation, and only count once.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        ipo = create_ipo(0)
+        self.document = create_document(ipo, 'rhp')
+        os.makedirs(os.path.dirname(self.document.file.path))
+        with open(self.document.file.path, 'wb') as handle:
+            handle.write(CONTENT)
+        self.url = f'/api/ipos/{ipo.pk}/download/?doc_type=rhp'
+
+    def test_full_and_partial_downloads(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+        self.assertEqual(b''.join(partial.streaming_content), CONTENT[100:200])
+
+        unsatisfiable = self.client.get(self.url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+        revalidated = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.download_count, 1)
+
+    @override_settings(DOCUMENT_DOWNLOAD_OFFLOAD='x-accel-redirect')
+    def test_offload_returns_headers_only(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/protected-media/{self.document.file.name}'
+        )
+
+
+class DownloadBufferTests(TestCase):
+    """
+    Buffered downloads are written in one batch with aggregated counters.
+    """
+
+    def test_flush_writes_logs_and_increments(self):
+        hot = create_document(create_ipo(0), 'rhp')
+        cold = create_document(create_ipo(1), 'drhp')
+        buffer = DownloadBuffer(interval=3600, max_events=100)
+
+        for document in [hot, hot, hot, cold]:
+            buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.1'))
+        self.assertEqual(DocumentDownloadLog.objects.count(), 0)
+
+        self.assertEqual(buffer.flush(), 4)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(DocumentDownloadLog.objects.count(), 4)
+
+        hot.refresh_from_db()
+        cold.refresh_from_db()
+        self.assertEqual((hot.download_count, cold.download_count), (3, 1))
+
+    def test_deleted_document_is_dropped(self):
+        kept = create_document(create_ipo(0), 'rhp')
+        replaced = create_document(create_ipo(1), 'drhp')
+        buffer = DownloadBuffer(interval=3600, max_events=100)
+
+        buffer.record(DocumentDownloadLog(document_id=kept.pk, ip_address='10.0.0.1'))
+        buffer.record(DocumentDownloadLog(document_id=replaced.pk, ip_address='10.0.0.1'))
+        # Re-uploading deletes the old document before the flush
+        replaced.delete()
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(list(DocumentDownloadLog.objects.values_list('document_id', flat=True)), [kept.pk])
+        kept.refresh_from_db()
+        self.assertEqual(kept.download_count, 1)
+
+    def test_deleted_user_keeps_download(self):
+        document = create_document(create_ipo(0), 'rhp')
+        user = User.objects.create_user(username='reader', email='reader@example.com', password='secret-pass')
+        buffer = DownloadBuffer(interval=3600, max_events=100)
+
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.1', user=user))
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.2'))
+        user.delete()
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(list(DocumentDownloadLog.objects.values_list('user_id', flat=True)), [None, None])
+        document.refresh_from_db()
+        self.assertEqual(document.download_count, 2)
+
+    def test_failing_batch_keeps_good_events(self):
+        document = create_document(create_ipo(0), 'rhp')
+        buffer = DownloadBuffer(interval=3600, max_events=100, max_retries=1)
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.1'))
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.99'))
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.2'))
+
+        def fail_on_bad_event(events):
+            if any(event.ip_address == '10.0.0.99' for event in events):
+                raise RuntimeError('bad row')
+            return write_downloads(events)
+
+        with mock.patch('apps.documents.accounting.write_downloads', side_effect=fail_on_bad_event):
+            self.assertEqual(buffer.flush(), 0)
+            self.assertEqual(len(buffer), 3)
+            self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(
+            sorted(DocumentDownloadLog.objects.values_list('ip_address', flat=True)), ['10.0.0.1', '10.0.0.2']
+        )
+        document.refresh_from_db()
+        self.assertEqual(document.download_count, 2)
+
+    def test_failing_batch_is_discarded_after_retries(self):
+        document = create_document(create_ipo(0), 'rhp')
+        buffer = DownloadBuffer(interval=3600, max_events=100, max_retries=2)
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.1'))
+
+        with mock.patch('apps.documents.accounting.write_downloads', side_effect=RuntimeError('db down')):
+            for _ in range(2):
+                self.assertEqual(buffer.flush(), 0)
+                self.assertEqual(len(buffer), 1)
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(len(buffer), 0)
+
+        # Later downloads are accounted again
+        buffer.record(DocumentDownloadLog(document_id=document.pk, ip_address='10.0.0.1'))
+        self.assertEqual(buffer.flush(), 1)
@@ -2,7 +2,7 @@
 Document views for the Bluestock IPO platform.
 """
 import os
-from django.http import HttpResponse, Http404, FileResponse
+from django.http import HttpResponse, Http404
 from django.shortcuts import get_object_or_404
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes, parser_classes
@@ -11,7 +11,9 @@ from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from apps.ipos.models import IPO
-from .models import Document, DocumentDownloadLog
+from .accounting import record_download
+from .delivery import counts_as_download, serve_document
+from .models import Document
 from .serializers import DocumentSerializer, DocumentUploadSerializer
 
 
@@ -92,7 +94,10 @@ def upload_document(request, ipo_id):
     ],
     responses={
         200: openapi.Response(description="File download"),
+        206: openapi.Response(description="Requested byte range"),
+        304: openapi.Response(description="Not modified"),
         404: openapi.Response(description="Document not found"),
+        416: openapi.Response(description="Range not satisfiable"),
     },
     operation_description="Download RHP/DRHP document"
 )
@@ -135,36 +140,20 @@ def download_document(request, ipo_id):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Log the download
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR', '127.0.0.1')
-    
-    DocumentDownloadLog.objects.create(
-        document=document,
-        ip_address=ip,
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        user=request.user if request.user.is_authenticated else None
-    )
-    
-    # Increment download count
-    document.increment_download_count()
-    
-    # Return file response
+    # Build the file response (honours Range and conditional headers)
     try:
-        response = FileResponse(
-            open(document.file.path, 'rb'),
-            content_type='application/pdf' if document.file_extension == '.pdf' else 'application/octet-stream'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{document.original_filename}"'
-        return response
-    except Exception as e:
+        response = serve_document(request, document)
+    except OSError:
         return Response(
             {'error': 'Error serving file'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    
+    # Revalidations and follow-up range requests are not new downloads
+    if counts_as_download(request, response):
+        record_download(request, document)
+    
+    return response
 
 
 @swagger_auto_schema(
@@ -3,4 +3,12 @@ from django.apps import AppConfig
 
 class IposConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.ipos'
\ No newline at end of file
+    name = 'apps.ipos'
+
+    def ready(self):
+        from bluestock_backend.response_cache import warn_if_process_local
+        from . import signals  # noqa: F401
+        from .scheduler import start_scheduler
+
+        warn_if_process_local()
+        start_scheduler()
@@ -0,0 +1,153 @@
+"""
+Subscription history for the Bluestock IPO platform.
+
+Every bulk ingest appends one IPOSubscriptionSnapshot per category row, so
+the intraday subscription curve is kept. Reads are downsampled on the
+server to one point per bucket (the last snapshot in it, since subscription
+figures are cumulative), and a background job rolls raw snapshots older
+than SUBSCRIPTION_HISTORY_RAW_RETENTION_DAYS up into
+SUBSCRIPTION_HISTORY_ROLLUP_BUCKET buckets.
+
+Buckets are aligned to the current time zone's offset so daily buckets
+start at local midnight.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from bluestock_backend.response_cache import schedule_invalidation
+from .models import IPOSubscriptionSnapshot
+from .signals import detail_namespace
+
+BUCKETS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '1h': 3600,
+    '1d': 86400,
+}
+
+SERIES_FIELDS = ('category', 'recorded_at', 'shares_applied', 'applications_received', 'rate_hundredths')
+
+
+def to_hundredths(rate):
+    """Scale a Decimal rate to an integer number of hundredths."""
+    return int(rate.scaleb(2).to_integral_value())
+
+
+def record_snapshots(rows, recorded_at):
+    """
+    Append raw snapshots for (ipo_id, category, shares_applied,
+    applications_received, rate) rows.
+    """
+    IPOSubscriptionSnapshot.objects.bulk_create([
+        IPOSubscriptionSnapshot(
+            ipo_id=ipo_id,
+            category=category,
+            recorded_at=recorded_at,
+            shares_applied=applied,
+            applications_received=applications,
+            rate_hundredths=to_hundredths(rate),
+        )
+        for ipo_id, category, applied, applications, rate in rows
+    ], batch_size=1000)
+
+
+def _utc_offset():
+    return int(timezone.localtime().utcoffset().total_seconds())
+
+
+def downsample(points, bucket_seconds):
+    """
+    Reduce points ordered by (category, recorded_at) to the last point of
+    each bucket. Yields (category, bucket_start, point) tuples.
+    """
+    offset = _utc_offset()
+    current_key = None
+    current = None
+
+    for point in points:
+        epoch = int(point[1].timestamp()) + offset
+        key = (point[0], epoch - epoch % bucket_seconds - offset)
+        if key != current_key and current is not None:
+            yield current_key + (current,)
+        current_key, current = key, point
+
+    if current is not None:
+        yield current_key + (current,)
+
+
+def subscription_history(ipo_id, bucket_seconds, category=None):
+    """
+    Downsampled subscription series of an IPO by category.
+    """
+    snapshots = IPOSubscriptionSnapshot.objects.filter(ipo_id=ipo_id)
+    if category:
+        snapshots = snapshots.filter(category=category)
+    points = snapshots.order_by('category', 'recorded_at').values_list(*SERIES_FIELDS)
+
+    tz = timezone.get_current_timezone()
+    series = {}
+    for category, start, point in downsample(points.iterator(), bucket_seconds):
+        series.setdefault(category, []).append({
+            'time': datetime.fromtimestamp(start, tz=tz).isoformat(),
+            'subscription_rate': str(Decimal(point[4]).scaleb(-2)),
+            'shares_applied': point[2],
+            'applications_received': point[3],
+        })
+    return series
+
+
+def rollup_history(now=None):
+    """
+    Roll raw snapshots past their retention up into coarser buckets, and
+    delete history past SUBSCRIPTION_HISTORY_RETENTION_DAYS (0 keeps it).
+
+    Returns (raw rows rolled up, rollup rows written, rows pruned).
+    """
+    now = now or timezone.now()
+    bucket_seconds = settings.SUBSCRIPTION_HISTORY_ROLLUP_BUCKET
+
+    # Align the cutoff to a bucket boundary so no bucket is split across runs
+    offset = _utc_offset()
+    cutoff = int((now - timedelta(days=settings.SUBSCRIPTION_HISTORY_RAW_RETENTION_DAYS)).timestamp()) + offset
+    cutoff = datetime.fromtimestamp(cutoff - cutoff % bucket_seconds - offset, tz=dt_timezone.utc)
+
+    raw = IPOSubscriptionSnapshot.objects.filter(resolution=0, recorded_at__lt=cutoff)
+    ipo_ids = list(raw.order_by().values_list('ipo_id', flat=True).distinct())
+
+    rolled = written = 0
+    for ipo_id in ipo_ids:
+        with transaction.atomic():
+            points = raw.filter(ipo_id=ipo_id).order_by('category', 'recorded_at').values_list(
+                *SERIES_FIELDS
+            )
+            rollups = [
+                IPOSubscriptionSnapshot(
+                    ipo_id=ipo_id,
+                    category=category,
+                    recorded_at=datetime.fromtimestamp(start, tz=dt_timezone.utc),
+                    resolution=bucket_seconds,
+                    shares_applied=point[2],
+                    applications_received=point[3],
+                    rate_hundredths=point[4],
+                )
+                for category, start, point in downsample(points, bucket_seconds)
+            ]
+            rolled += raw.filter(ipo_id=ipo_id).delete()[0]
+            IPOSubscriptionSnapshot.objects.bulk_create(rollups, batch_size=1000)
+            written += len(rollups)
+
+    pruned = 0
+    if settings.SUBSCRIPTION_HISTORY_RETENTION_DAYS > 0:
+        expired = IPOSubscriptionSnapshot.objects.filter(
+            recorded_at__lt=now - timedelta(days=settings.SUBSCRIPTION_HISTORY_RETENTION_DAYS)
+        )
+        ipo_ids += list(expired.order_by().values_list('ipo_id', flat=True).distinct())
+        pruned = expired.delete()[0]
+
+    if ipo_ids:
+        schedule_invalidation(sorted({detail_namespace(ipo_id) for ipo_id in ipo_ids}))
+    return rolled, written, pruned
@@ -0,0 +1,245 @@
+"""
+Live subscription updates for the Bluestock IPO platform.
+
+Changes to IPOSubscription rows are published, after their transaction
+commits, as compact events to a broker that fans them out to the
+Server-Sent Events streams of ``/api/ipos/live/``. Each stream owns a small
+bounded queue; a client that falls behind loses events and is sent a
+``resync`` event so it can refetch the IPOs it shows.
+
+The broker is chosen by LIVE_EVENTS_BACKEND. ``InProcessBroker`` only
+reaches clients connected to the same process; with several workers use
+``PostgresBroker``, which relays events between processes with
+LISTEN/NOTIFY on the application database.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from decimal import Decimal
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RATE_PLACES = Decimal('0.01')
+
+
+def subscription_event(ipo_id, categories, subscription_rate=None):
+    """
+    Build an event for changed categories of one IPO.
+
+    ``categories`` maps a category to its figures, or to None once deleted.
+    ``subscription_rate`` is the overall IPO rate when it was recomputed.
+    """
+    event = {'ipo': ipo_id, 'categories': categories}
+    if subscription_rate is not None:
+        event['subscription_rate'] = str(subscription_rate)
+    return event
+
+
+def subscription_figures(subscription):
+    """Compact figures of one IPOSubscription row for an event."""
+    return {
+        # save() assigns a float rate; report it as the column stores it
+        'subscription_rate': str(Decimal(str(subscription.subscription_rate)).quantize(RATE_PLACES)),
+        'shares_offered': subscription.shares_offered,
+        'shares_applied': subscription.shares_applied,
+        'applications_received': subscription.applications_received,
+    }
+
+
+class Subscriber:
+    """
+    One stream's bounded queue, filled from any thread.
+    """
+
+    def __init__(self, ipo_ids, max_queue):
+        self.ipo_ids = ipo_ids
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+        self._loop = asyncio.get_running_loop()
+
+    def deliver(self, event):
+        if self.ipo_ids is not None and event['ipo'] not in self.ipo_ids:
+            return
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class InProcessBroker:
+    """
+    Fan events out to the streams connected to this process.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, ipo_ids=None):
+        """Register a stream; must be called from its event loop."""
+        subscriber = Subscriber(ipo_ids, settings.LIVE_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event):
+        """Send an event to every subscribed stream."""
+        self.deliver(event)
+
+    def deliver(self, event):
+        self.published += 1
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.deliver(event)
+            except RuntimeError:
+                # The stream's event loop has closed
+                self.unsubscribe(subscriber)
+
+
+class PostgresBroker(InProcessBroker):
+    """
+    Relay events between processes with PostgreSQL LISTEN/NOTIFY.
+
+    Publishing sends a NOTIFY on LIVE_EVENTS_CHANNEL; a listener thread in
+    each process, started with its first stream, delivers notifications to
+    local streams.
+    """
+
+    def __init__(self):
+        super().__init__()
+        if connection.vendor != 'postgresql':
+            raise ImproperlyConfigured('PostgresBroker requires a PostgreSQL database')
+        self.channel = settings.LIVE_EVENTS_CHANNEL
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def subscribe(self, ipo_ids=None):
+        self._ensure_listener()
+        return super().subscribe(ipo_ids)
+
+    def publish(self, event):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, json.dumps(event)])
+
+    def _ensure_listener(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._listen, name='ipo-live-listener', daemon=True
+                )
+                self._thread.start()
+
+    def _listen(self):
+        import psycopg2
+
+        # A dedicated connection, outside Django's per-thread handling
+        listener = psycopg2.connect(**connection.get_connection_params())
+        listener.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while True:
+                if select.select([listener], [], [], 60) == ([], [], []):
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    notify = listener.notifies.pop(0)
+                    try:
+                        self.deliver(json.loads(notify.payload))
+                    except ValueError as e:
+                        logger.error(f"Invalid live event payload: {str(e)}")
+        except Exception as e:
+            logger.error(f"Live event listener stopped: {str(e)}")
+        finally:
+            listener.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker, creating it on first use."""
+    global _broker
+
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIVE_EVENTS_BACKEND)()
+        return _broker
+
+
+def publish_on_commit(events):
+    """Publish events once the current transaction commits."""
+    if not events:
+        return
+
+    def publish():
+        broker = get_broker()
+        for event in events:
+            try:
+                broker.publish(event)
+            except Exception as e:
+                logger.error(f"Error publishing live event for IPO {event['ipo']}: {str(e)}")
+
+    transaction.on_commit(publish)
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def event_stream(ipo_ids=None):
+    """
+    Yield SSE messages for subscription changes.
+
+    Sends a comment every LIVE_EVENTS_HEARTBEAT seconds to keep proxies from
+    closing the connection, and ends after LIVE_EVENTS_MAX_DURATION seconds;
+    EventSource clients reconnect on their own, which also bounds how long
+    a stream whose client vanished stays subscribed.
+    """
+    broker = get_broker()
+    subscriber = broker.subscribe(ipo_ids)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_EVENTS_MAX_DURATION
+
+    try:
+        yield f'retry: {settings.LIVE_EVENTS_RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscriber.queue.get(), min(settings.LIVE_EVENTS_HEARTBEAT, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            if subscriber.overflowed:
+                subscriber.overflowed = False
+                yield format_event('resync', {})
+            yield format_event('subscription', event)
+    finally:
+        broker.unsubscribe(subscriber)
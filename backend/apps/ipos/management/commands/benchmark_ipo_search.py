@@ -0,0 +1,152 @@
+"""
+Benchmark the legacy icontains search against the IPO search index.
+
+Generates synthetic companies and IPOs inside a transaction that is rolled
+back at the end, so it can run against a development database.
+"""
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from apps.companies.models import Company
+from apps.ipos.models import IPO
+from apps.ipos import search
+
+WORDS = [
+    'solar', 'green', 'energy', 'finance', 'capital', 'micro', 'bank', 'retail',
+    'digital', 'cloud', 'pharma', 'health', 'infra', 'steel', 'auto', 'motors',
+    'foods', 'textile', 'chemical', 'media', 'telecom', 'realty', 'logistics',
+    'fintech', 'agro', 'power', 'ventures', 'systems', 'labs', 'industries',
+]
+
+SYLLABLES = ['ka', 'ro', 'mi', 'ten', 'var', 'lo', 'shi', 'nu', 'pra', 'de', 'zan', 'qui']
+
+QUERIES = ['solar', 'sol', 'green energy', 'pharma labs', 'fin', 'karomi', 'zzz']
+
+IPOS_PER_COMPANY = 5
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare icontains search with the IPO search index at several table sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help='IPO row counts to benchmark (ascending)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per query',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(42)
+        self.repeat = options['repeat']
+        self.companies = []
+        # Descriptions draw from a large vocabulary so terms are selective,
+        # as in real prospectus text
+        self.vocabulary = [
+            ''.join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(2, 4)))
+            for _ in range(20000)
+        ]
+        sizes = sorted(options['sizes'])
+
+        try:
+            with transaction.atomic():
+                created = 0
+                for size in sizes:
+                    self._create_ipos(created, size)
+                    created = size
+                    self._benchmark(size)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Benchmark data rolled back')
+
+    def _sentence(self, length, words=WORDS):
+        return ' '.join(self.random.choice(words) for _ in range(length))
+
+    def _create_companies(self, needed):
+        numbers = range(len(self.companies), needed)
+        self.companies.extend(Company.objects.bulk_create([
+            Company(
+                name=f'Bench {number} {self._sentence(2).title()}',
+                sector=self.random.choice(Company.SECTOR_CHOICES)[0],
+                cin=f'U{number % 100000:05d}BM{2000 + number // 100000:04d}PLC{number:06d}',
+            )
+            for number in numbers
+        ], batch_size=5000))
+
+    def _create_ipos(self, start, stop):
+        self.stdout.write(f'Generating IPOs {start} to {stop}...')
+        self._create_companies(-(-stop // IPOS_PER_COMPANY))
+
+        batch = 5000
+        for offset in range(start, stop, batch):
+            ipos = []
+            for number in range(offset, min(offset + batch, stop)):
+                company = self.companies[number // IPOS_PER_COMPANY]
+                open_date = date(2020, 1, 1) + timedelta(days=number % 2000)
+                ipos.append(IPO(
+                    company=company,
+                    ipo_name=f'{company.name} IPO',
+                    price_band_min=100,
+                    price_band_max=110,
+                    lot_size=10,
+                    issue_size=500,
+                    ipo_open_date=open_date,
+                    ipo_close_date=open_date + timedelta(days=3),
+                    description=self._sentence(40, self.vocabulary),
+                ))
+            IPO.objects.bulk_create(ipos)
+
+        # bulk_create skips signals, so index everything in one pass
+        search.update_search_vectors()
+        search.reset_python_index()
+
+    def _time(self, func):
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    def _benchmark(self, size):
+        base = IPO.objects.filter(is_active=True)
+
+        if not search.uses_search_vector():
+            started = time.perf_counter()
+            search.get_python_index()
+            build_ms = (time.perf_counter() - started) * 1000
+            self.stdout.write(f'  fallback index built in {build_ms:.1f} ms')
+
+        self.stdout.write(f'{size:>9} rows  {"query":<14} {"icontains":>12} {"index":>12}  speedup')
+        for query in QUERIES:
+            def legacy():
+                list(base.filter(
+                    Q(company__name__icontains=query) |
+                    Q(ipo_name__icontains=query) |
+                    Q(description__icontains=query) |
+                    Q(company__sector__icontains=query)
+                ).values_list('id', flat=True)[:50])
+
+            def indexed():
+                list(search.search_ipos(base, query).values_list('id', flat=True)[:50])
+
+            legacy_ms = self._time(legacy)
+            indexed_ms = self._time(indexed)
+            speedup = legacy_ms / indexed_ms if indexed_ms else float('inf')
+            self.stdout.write(
+                f'{"":>14} {query!r:<14} {legacy_ms:>10.2f}ms {indexed_ms:>10.2f}ms  {speedup:6.1f}x'
+            )
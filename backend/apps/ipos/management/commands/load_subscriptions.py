@@ -0,0 +1,67 @@
+"""
+Load IPO subscription figures from CSV or JSON files.
+
+Every file is ingested as one batch: rates are computed, category rows
+upserted and overall IPO rates recomputed in a single transaction.
+"""
+import json
+import sys
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from apps.ipos.subscriptions import SubscriptionIngestError, ingest_subscriptions, read_csv
+
+
+class Command(BaseCommand):
+    help = 'Upsert IPO subscription figures from CSV or JSON files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='CSV or JSON files; "-" reads standard input',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['auto', 'csv', 'json'],
+            default='auto',
+            help='Input format (auto uses the file extension, JSON for stdin)',
+        )
+
+    def _read(self, path, fmt):
+        if path == '-':
+            text = sys.stdin.read()
+            fmt = 'json' if fmt == 'auto' else fmt
+        else:
+            try:
+                text = Path(path).read_text(encoding='utf-8-sig')
+            except OSError as e:
+                raise CommandError(f'Cannot read {path}: {str(e)}')
+            if fmt == 'auto':
+                fmt = 'csv' if path.lower().endswith('.csv') else 'json'
+
+        if fmt == 'csv':
+            return read_csv(text)
+
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise CommandError(f'{path} is not valid JSON: {str(e)}')
+        if isinstance(rows, dict):
+            rows = rows.get('subscriptions')
+        if not isinstance(rows, list):
+            raise CommandError(f'{path} must contain a list of subscription rows')
+        return rows
+
+    def handle(self, *args, **options):
+        for path in options['paths']:
+            rows = self._read(path, options['format'])
+            try:
+                result = ingest_subscriptions(rows)
+            except SubscriptionIngestError as e:
+                for error in e.errors[:20]:
+                    self.stderr.write(f'  row {error["row"]}: {error["errors"]}')
+                raise CommandError(f'{path}: {str(e)}, nothing was written')
+
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: upserted {result["rows"]} rows for {len(result["ipos"])} IPOs'
+            ))
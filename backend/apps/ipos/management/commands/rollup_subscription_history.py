@@ -0,0 +1,29 @@
+"""
+Roll old raw subscription snapshots up into coarser buckets.
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.ipos.history import rollup_history
+
+
+class Command(BaseCommand):
+    help = 'Roll up and prune old subscription history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep running and roll up every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['loop']
+        while True:
+            rolled, written, pruned = rollup_history()
+            self.stdout.write(self.style.SUCCESS(
+                f'Rolled {rolled} raw snapshots into {written} buckets, pruned {pruned}'
+            ))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,40 @@
+"""
+Move IPOs between upcoming, open, closed and listed from their dates.
+"""
+import time
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.ipos.scheduler import advance_statuses
+
+
+class Command(BaseCommand):
+    help = 'Apply due IPO status transitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Treat this day (YYYY-MM-DD) as today instead of the local date',
+        )
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep running and apply transitions every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        interval = options['loop']
+        while True:
+            moved = advance_statuses(today)
+            summary = ', '.join(f'{transition}: {count}' for transition, count in moved.items())
+            self.stdout.write(self.style.SUCCESS(f'IPO statuses updated ({summary or "none due"})'))
+            if interval <= 0:
+                break
+            time.sleep(interval)
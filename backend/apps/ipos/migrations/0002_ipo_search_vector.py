@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 10:30
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """Add the GIN index and backfill vectors on PostgreSQL only."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX IF NOT EXISTS ipos_search_vector_gin ON ipos USING gin (search_vector)"
+    )
+    schema_editor.execute("""
+        UPDATE ipos SET search_vector =
+            setweight(to_tsvector('simple', coalesce(companies.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(ipos.ipo_name, '')), 'A') ||
+            setweight(to_tsvector('simple', replace(coalesce(companies.sector, ''), '_', ' ')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(ipos.description, '')), 'C')
+        FROM companies
+        WHERE companies.id = ipos.company_id
+    """)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS ipos_search_vector_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipos', '0001_initial'),
+        ('companies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ipo',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
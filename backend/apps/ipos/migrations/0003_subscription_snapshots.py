@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipos', '0002_ipo_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IPOSubscriptionSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('retail', 'Retail Individual Investors (RII)'), ('nii', 'Non-Institutional Investors (NII)'), ('qib', 'Qualified Institutional Buyers (QIB)'), ('employee', 'Employee'), ('shareholder', 'Shareholder')], max_length=20)),
+                ('recorded_at', models.DateTimeField()),
+                ('resolution', models.PositiveIntegerField(default=0, help_text='Bucket length in seconds, 0 for raw')),
+                ('shares_applied', models.BigIntegerField()),
+                ('applications_received', models.PositiveIntegerField(default=0)),
+                ('rate_hundredths', models.BigIntegerField(help_text='Subscription rate x 100')),
+                ('ipo', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='subscription_history', to='ipos.ipo')),
+            ],
+            options={
+                'verbose_name': 'IPO Subscription Snapshot',
+                'verbose_name_plural': 'IPO Subscription Snapshots',
+                'db_table': 'ipo_subscription_snapshots',
+                'indexes': [models.Index(fields=['ipo', 'category', 'recorded_at'], name='ipo_sub_snap_series_idx'), models.Index(fields=['resolution', 'recorded_at'], name='ipo_sub_snap_rollup_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipos', '0003_subscription_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(fields=['status', 'ipo_open_date'], name='ipos_status_open_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(fields=['status', 'ipo_close_date'], name='ipos_status_close_date_idx'),
+        ),
+    ]
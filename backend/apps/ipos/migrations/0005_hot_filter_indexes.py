@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipos', '0004_ipo_status_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(fields=['ipo_open_date', 'id'], name='ipos_open_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(fields=['ipo_close_date', 'id'], name='ipos_close_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(fields=['issue_size', 'id'], name='ipos_issue_size_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(fields=['created_at', 'id'], name='ipos_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ipo',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['ipo_open_date', 'id'], name='ipos_active_open_date_idx'),
+        ),
+    ]
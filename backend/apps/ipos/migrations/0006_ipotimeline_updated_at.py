@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ipos', '0005_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ipotimeline',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
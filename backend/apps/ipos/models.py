@@ -1,13 +1,44 @@
 """
 IPO models for the Bluestock IPO platform.
 """
+from decimal import Decimal
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from bluestock_backend.loaded_values import LoadedValuesMixin
 from apps.companies.models import Company
 
 
-class IPO(models.Model):
+class IPOQuerySet(models.QuerySet):
+    """
+    QuerySet with helpers for IPO listings.
+    """
+
+    def with_company_ipo_counts(self):
+        """
+        Annotate the parent company's IPO counters in the main query.
+
+        Adds company_total_ipos_count and company_active_ipos_count as
+        correlated subqueries so nested company serializers do not run two
+        COUNTs per row.
+        """
+        sibling_ipos = IPO.objects.filter(
+            company=OuterRef('company')
+        ).order_by().values('company')
+        total = sibling_ipos.annotate(count=Count('id')).values('count')
+        active = sibling_ipos.filter(
+            status__in=Company.ACTIVE_IPO_STATUSES
+        ).annotate(count=Count('id')).values('count')
+        return self.annotate(
+            company_total_ipos_count=Coalesce(Subquery(total), 0),
+            company_active_ipos_count=Coalesce(Subquery(active), 0),
+        )
+
+
+class IPO(LoadedValuesMixin, models.Model):
     """
     Model representing an Initial Public Offering.
     """
@@ -105,16 +136,36 @@ class IPO(models.Model):
     # Risk factors
     risk_factors = models.TextField(blank=True)
     
+    # Full-text search (PostgreSQL only, maintained by apps.ipos.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Metadata
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = IPOQuerySet.as_manager()
+    
     class Meta:
         db_table = 'ipos'
         verbose_name = 'IPO'
         verbose_name_plural = 'IPOs'
         ordering = ['-ipo_open_date']
+        indexes = [
+            # Date scans of the status scheduler, and ?status= listings
+            models.Index(fields=['status', 'ipo_open_date'], name='ipos_status_open_date_idx'),
+            models.Index(fields=['status', 'ipo_close_date'], name='ipos_status_close_date_idx'),
+            # List orderings; id is the keyset tie-breaker
+            models.Index(fields=['ipo_open_date', 'id'], name='ipos_open_date_id_idx'),
+            models.Index(fields=['ipo_close_date', 'id'], name='ipos_close_date_id_idx'),
+            models.Index(fields=['issue_size', 'id'], name='ipos_issue_size_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='ipos_created_at_id_idx'),
+            models.Index(
+                fields=['ipo_open_date', 'id'],
+                condition=models.Q(is_active=True),
+                name='ipos_active_open_date_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.company.name} IPO - {self.ipo_open_date}"
@@ -138,20 +189,20 @@ class IPO(models.Model):
     def days_to_open(self):
         """Calculate days until IPO opens."""
         if self.status == 'upcoming':
-            return (self.ipo_open_date - timezone.now().date()).days
+            return (self.ipo_open_date - timezone.localdate()).days
         return 0
     
     @property
     def days_to_close(self):
         """Calculate days until IPO closes."""
         if self.status == 'open':
-            return (self.ipo_close_date - timezone.now().date()).days
+            return (self.ipo_close_date - timezone.localdate()).days
         return 0
     
     @property
     def is_open(self):
         """Check if IPO is currently open."""
-        today = timezone.now().date()
+        today = timezone.localdate()
         return (self.ipo_open_date <= today <= self.ipo_close_date and 
                 self.status == 'open')
     
@@ -219,6 +270,45 @@ class IPOSubscription(models.Model):
         super().save(*args, **kwargs)
 
 
+class IPOSubscriptionSnapshot(models.Model):
+    """
+    Append-only history of subscription figures, one row per snapshot.
+    
+    Rates are stored as integer hundredths. Raw snapshots have a resolution
+    of 0; once old they are rolled up into one row per coarser bucket whose
+    resolution is the bucket length in seconds.
+    """
+    ipo = models.ForeignKey(
+        IPO, 
+        on_delete=models.CASCADE, 
+        related_name='subscription_history',
+        db_index=False  # covered by the series index
+    )
+    category = models.CharField(max_length=20, choices=IPOSubscription.CATEGORY_CHOICES)
+    recorded_at = models.DateTimeField()
+    resolution = models.PositiveIntegerField(default=0, help_text="Bucket length in seconds, 0 for raw")
+    
+    shares_applied = models.BigIntegerField()
+    applications_received = models.PositiveIntegerField(default=0)
+    rate_hundredths = models.BigIntegerField(help_text="Subscription rate x 100")
+    
+    class Meta:
+        db_table = 'ipo_subscription_snapshots'
+        verbose_name = 'IPO Subscription Snapshot'
+        verbose_name_plural = 'IPO Subscription Snapshots'
+        indexes = [
+            models.Index(fields=['ipo', 'category', 'recorded_at'], name='ipo_sub_snap_series_idx'),
+            models.Index(fields=['resolution', 'recorded_at'], name='ipo_sub_snap_rollup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.ipo_id} - {self.category} @ {self.recorded_at.isoformat()}"
+    
+    @property
+    def subscription_rate(self):
+        return Decimal(self.rate_hundredths).scaleb(-2)
+
+
 class IPOTimeline(models.Model):
     """
     Model to track important events in IPO timeline.
@@ -247,6 +337,7 @@ class IPOTimeline(models.Model):
     
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'ipo_timeline'
@@ -0,0 +1,122 @@
+"""
+Date-driven IPO status transitions for the Bluestock IPO platform.
+
+``advance_statuses`` moves IPOs between upcoming, open, closed and listed
+from their dates with one set-based UPDATE per transition, each found by an
+indexed (status, date) scan. Transitions run in order, so an IPO whose
+whole window has passed moves through every step in one run. Matching
+IPOTimeline events are marked completed, and ``ipo_status_changed`` is sent
+so caches and the dashboard snapshot follow the bulk update.
+
+Run it with ``manage.py update_ipo_statuses`` or the in-process
+StatusScheduler, started at app load when IPO_STATUS_SCHEDULER_INTERVAL is
+set.
+"""
+import logging
+import threading
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import IPO, IPOTimeline
+from .signals import ipo_status_changed
+
+logger = logging.getLogger(__name__)
+
+
+def transitions(today):
+    """
+    (old status, new status, condition, timeline events completed) in the
+    order they are applied.
+    """
+    return [
+        ('upcoming', 'open', Q(ipo_open_date__lte=today, ipo_close_date__gte=today), ['open']),
+        ('upcoming', 'closed', Q(ipo_close_date__lt=today), ['open', 'close']),
+        ('open', 'closed', Q(ipo_close_date__lt=today), ['close']),
+        ('closed', 'listed', Q(listing_date__lte=today), ['listing']),
+    ]
+
+
+def advance_statuses(today=None):
+    """
+    Apply every due status transition.
+
+    Returns the number of IPOs moved per ``'old->new'`` transition.
+    """
+    today = today or timezone.localdate()
+    now = timezone.now()
+    moved = {}
+
+    for old_status, new_status, condition, events in transitions(today):
+        with transaction.atomic():
+            rows = list(
+                IPO.objects.select_for_update()
+                .filter(condition, status=old_status)
+                .order_by()
+                .values_list('pk', 'company_id')
+            )
+            if not rows:
+                continue
+
+            ipo_ids = [pk for pk, _ in rows]
+            IPO.objects.filter(pk__in=ipo_ids).update(status=new_status, updated_at=now)
+            IPOTimeline.objects.filter(
+                ipo_id__in=ipo_ids, event_type__in=events, is_completed=False
+            ).update(is_completed=True, updated_at=now)
+
+            ipo_status_changed.send(
+                sender=IPO,
+                ipo_ids=ipo_ids,
+                company_ids=sorted({company_id for _, company_id in rows}),
+                old_status=old_status,
+                new_status=new_status,
+            )
+        moved[f'{old_status}->{new_status}'] = len(ipo_ids)
+
+    return moved
+
+
+class StatusScheduler(threading.Thread):
+    """
+    Daemon thread that advances IPO statuses on a fixed interval.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='ipo-status-scheduler', daemon=True)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                advance_statuses()
+            except Exception as e:
+                logger.error(f"Error advancing IPO statuses: {str(e)}")
+            finally:
+                # Connections are per-thread; don't hold one between runs
+                connection.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler(interval=None):
+    """
+    Start the process-wide scheduler once; a zero interval disables it.
+    """
+    global _scheduler
+
+    if interval is None:
+        interval = settings.IPO_STATUS_SCHEDULER_INTERVAL
+    if interval <= 0:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = StatusScheduler(interval)
+            _scheduler.start()
+        return _scheduler
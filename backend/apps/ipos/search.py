@@ -0,0 +1,296 @@
+"""
+IPO search engine for the Bluestock IPO platform.
+
+On PostgreSQL every IPO carries a stored ``search_vector`` (company name,
+IPO name, sector and description, weighted A/A/B/C) behind a GIN index, and
+queries run as prefix ``to_tsquery`` matches ranked with ``ts_rank``.
+
+Other databases use an in-process inverted index with the same tokenizer,
+weights and prefix semantics, built lazily from the database and kept up to
+date by model signals.
+"""
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Value, When
+
+SEARCH_CONFIG = 'simple'
+
+# Same relative weights as PostgreSQL's ts_rank defaults for A/B/C
+FIELD_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+# Prefix-only matches count for less than whole-word matches
+PREFIX_MATCH_FACTOR = 0.5
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+SEARCH_VECTOR_SQL = """
+    UPDATE ipos SET search_vector =
+        setweight(to_tsvector('simple', coalesce(companies.name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(ipos.ipo_name, '')), 'A') ||
+        setweight(to_tsvector('simple', replace(coalesce(companies.sector, ''), '_', ' ')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(ipos.description, '')), 'C')
+    FROM companies
+    WHERE companies.id = ipos.company_id
+"""
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens."""
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def uses_search_vector(using='default'):
+    """Check if the database supports the stored search vector."""
+    return connections[using].vendor == 'postgresql'
+
+
+def update_search_vectors(ipo_ids=None, company_ids=None, using='default'):
+    """
+    Recompute stored search vectors with one set-based UPDATE.
+
+    Limits the update to the given IPO or company ids when provided. A no-op
+    on databases without tsvector support.
+    """
+    if not uses_search_vector(using):
+        return
+
+    sql = SEARCH_VECTOR_SQL
+    params = []
+    if ipo_ids is not None:
+        sql += ' AND ipos.id = ANY(%s)'
+        params.append(list(ipo_ids))
+    if company_ids is not None:
+        sql += ' AND ipos.company_id = ANY(%s)'
+        params.append(list(company_ids))
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+class InvertedIndex:
+    """
+    Pure-Python inverted index over IPO search fields.
+
+    Maps each token to the IPOs containing it with a weighted term score,
+    and keeps a sorted vocabulary so prefix lookups are a bisect plus a
+    short scan.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._vocabulary = []
+        self._vocabulary_dirty = False
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, ipo_id, weighted_texts):
+        """
+        Index an IPO from (text, weight) pairs, replacing any previous entry.
+        """
+        with self._lock:
+            self._remove(ipo_id)
+
+            scores = defaultdict(float)
+            for text, weight in weighted_texts:
+                for token in tokenize(text):
+                    scores[token] += FIELD_WEIGHTS[weight]
+
+            for token, score in scores.items():
+                if token not in self._postings:
+                    self._vocabulary_dirty = True
+                self._postings[token][ipo_id] = score
+            self._documents[ipo_id] = set(scores)
+
+    def remove(self, ipo_id):
+        """Drop an IPO from the index."""
+        with self._lock:
+            self._remove(ipo_id)
+
+    def _remove(self, ipo_id):
+        for token in self._documents.pop(ipo_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(ipo_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary_dirty = True
+
+    def _expand(self, prefix):
+        """Yield vocabulary tokens starting with prefix."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+
+        position = bisect.bisect_left(self._vocabulary, prefix)
+        while position < len(self._vocabulary):
+            token = self._vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            yield token
+            position += 1
+
+    def search(self, terms, limit=None):
+        """
+        Return (ipo_id, score) pairs matching every term as a prefix.
+
+        Results are ordered by descending score, then id.
+        """
+        if not terms:
+            return []
+
+        with self._lock:
+            matches = None
+            for term in terms:
+                term_scores = defaultdict(float)
+                for token in self._expand(term):
+                    factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+                    for ipo_id, score in self._postings[token].items():
+                        term_scores[ipo_id] += score * factor
+
+                if matches is None:
+                    matches = term_scores
+                else:
+                    matches = {
+                        ipo_id: score + term_scores[ipo_id]
+                        for ipo_id, score in matches.items()
+                        if ipo_id in term_scores
+                    }
+                if not matches:
+                    return []
+
+        ranked = sorted(matches.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+
+def ipo_search_texts(ipo_name, description, company_name, sector):
+    """Weighted texts indexed for an IPO, matching the stored vector."""
+    return [
+        (company_name, 'A'),
+        (ipo_name, 'A'),
+        ((sector or '').replace('_', ' '), 'B'),
+        (description, 'C'),
+    ]
+
+
+def build_python_index():
+    """
+    Build an InvertedIndex from every IPO in the database.
+    """
+    from .models import IPO
+
+    index = InvertedIndex()
+    rows = IPO.objects.values_list(
+        'id', 'ipo_name', 'description', 'company__name', 'company__sector'
+    ).order_by().iterator(chunk_size=2000)
+    for ipo_id, ipo_name, description, company_name, sector in rows:
+        index.add(ipo_id, ipo_search_texts(ipo_name, description, company_name, sector))
+    index.built_at = time.monotonic()
+    return index
+
+
+_python_index = None
+_python_index_lock = threading.Lock()
+
+
+def get_python_index():
+    """
+    Return the process-wide fallback index, rebuilding it once it is older
+    than IPO_SEARCH_INDEX_TTL so writes from other processes show up.
+    """
+    global _python_index
+
+    with _python_index_lock:
+        ttl = settings.IPO_SEARCH_INDEX_TTL
+        if (_python_index is None or
+                (ttl and time.monotonic() - _python_index.built_at > ttl)):
+            _python_index = build_python_index()
+        return _python_index
+
+
+def reindex_ipo(ipo):
+    """Update the fallback index for one IPO if it has been built."""
+    if _python_index is not None:
+        company = ipo.company
+        _python_index.add(
+            ipo.pk,
+            ipo_search_texts(ipo.ipo_name, ipo.description, company.name, company.sector)
+        )
+
+
+def reindex_company(company):
+    """Update the fallback index for every IPO of a company if it has been built."""
+    if _python_index is not None:
+        for ipo in company.ipos.all():
+            ipo.company = company
+            reindex_ipo(ipo)
+
+
+def unindex_ipo(ipo_id):
+    """Remove an IPO from the fallback index if it has been built."""
+    if _python_index is not None:
+        _python_index.remove(ipo_id)
+
+
+def reset_python_index():
+    """Discard the fallback index so the next search rebuilds it."""
+    global _python_index
+
+    with _python_index_lock:
+        _python_index = None
+
+
+def search_ipos(queryset, query):
+    """
+    Filter an IPO queryset to rows matching query, ranked by relevance.
+
+    Every word in the query must match the start of a word in the company
+    name, IPO name, sector or description. Rows are annotated with
+    ``search_rank`` and ordered by it; callers can re-order afterwards.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+
+    if uses_search_vector(queryset.db):
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config=SEARCH_CONFIG
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', 'id')
+
+    ranked = get_python_index().search(terms)
+    limit = settings.IPO_SEARCH_FALLBACK_MAX_RESULTS
+    if limit and len(ranked) > limit:
+        # Apply the queryset's own filters before cutting to the limit, so
+        # filtered searches don't lose matches outside the global top results
+        allowed = set(queryset.order_by().values_list('pk', flat=True))
+        ranked = [item for item in ranked if item[0] in allowed][:limit]
+    if not ranked:
+        return queryset.none()
+
+    # One CASE branch per distinct score keeps the rank expression short
+    ids_by_score = defaultdict(list)
+    for ipo_id, score in ranked:
+        ids_by_score[score].append(ipo_id)
+
+    return queryset.filter(pk__in=[ipo_id for ipo_id, _ in ranked]).annotate(
+        search_rank=Case(
+            *[When(pk__in=ids, then=Value(score)) for score, ids in ids_by_score.items()],
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+    ).order_by('-search_rank', 'id')
@@ -3,9 +3,59 @@ Serializers for IPO endpoints.
 """
 from rest_framework import serializers
 from apps.companies.serializers import CompanyListSerializer
+from apps.documents.presence import DocumentPresenceIndex
 from .models import IPO, IPOSubscription, IPOTimeline
 
 
+class DocumentPresenceMixin:
+    """
+    Resolve has_rhp/has_drhp from a per-request DocumentPresenceIndex.
+
+    Views pass the index in ``context['document_index']``; when it is
+    missing, one is built for the whole root instance (page or single IPO)
+    and stored in the context so every row reuses it.
+    """
+
+    def get_document_index(self, obj):
+        index = self.context.get('document_index')
+        if index is None:
+            index = DocumentPresenceIndex()
+            self.context['document_index'] = index
+        if not index.covers(obj.pk):
+            root = self.root
+            if isinstance(root, serializers.ListSerializer) and root.instance is not None:
+                index.extend(root.instance)
+            index.extend([obj])
+        return index
+
+    def get_has_rhp(self, obj):
+        """Check if IPO has RHP document."""
+        return self.get_document_index(obj).has(obj.pk, 'rhp')
+
+    def get_has_drhp(self, obj):
+        """Check if IPO has DRHP document."""
+        return self.get_document_index(obj).has(obj.pk, 'drhp')
+
+
+class IPOCompanySerializer(CompanyListSerializer):
+    """
+    Nested company serializer that picks up counters annotated on the IPO.
+
+    ``IPO.objects.with_company_ipo_counts()`` puts the company's counters on
+    each IPO row; copy them onto the related company so the list serializer
+    reads them instead of running its fallback COUNTs.
+    """
+
+    def get_attribute(self, instance):
+        company = super().get_attribute(instance)
+        if company is not None:
+            for attr in ('total_ipos_count', 'active_ipos_count'):
+                count = getattr(instance, f'company_{attr}', None)
+                if count is not None:
+                    setattr(company, attr, count)
+        return company
+
+
 class IPOTimelineSerializer(serializers.ModelSerializer):
     """
     Serializer for IPO timeline events.
@@ -37,11 +87,11 @@ class IPOSubscriptionSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'subscription_rate', 'updated_at']
 
 
-class IPOSerializer(serializers.ModelSerializer):
+class IPOSerializer(DocumentPresenceMixin, serializers.ModelSerializer):
     """
     Detailed serializer for IPO data.
     """
-    company = CompanyListSerializer(read_only=True)
+    company = IPOCompanySerializer(read_only=True)
     company_id = serializers.IntegerField(write_only=True)
     
     # Calculated fields
@@ -76,14 +126,6 @@ class IPOSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
-    def get_has_rhp(self, obj):
-        """Check if IPO has RHP document."""
-        return obj.documents.filter(document_type='rhp').exists()
-    
-    def get_has_drhp(self, obj):
-        """Check if IPO has DRHP document."""
-        return obj.documents.filter(document_type='drhp').exists()
-    
     def validate(self, attrs):
         """Validate IPO data."""
         if attrs.get('price_band_min') and attrs.get('price_band_max'):
@@ -101,11 +143,11 @@ class IPOSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class IPOListSerializer(serializers.ModelSerializer):
+class IPOListSerializer(DocumentPresenceMixin, serializers.ModelSerializer):
     """
     Simplified serializer for IPO list view.
     """
-    company = CompanyListSerializer(read_only=True)
+    company = IPOCompanySerializer(read_only=True)
     price_band = serializers.ReadOnlyField()
     min_investment = serializers.ReadOnlyField()
     days_to_open = serializers.ReadOnlyField()
@@ -123,14 +165,6 @@ class IPOListSerializer(serializers.ModelSerializer):
             'days_to_open', 'days_to_close', 'is_open',
             'has_rhp', 'has_drhp'
         ]
-    
-    def get_has_rhp(self, obj):
-        """Check if IPO has RHP document."""
-        return obj.documents.filter(document_type='rhp').exists()
-    
-    def get_has_drhp(self, obj):
-        """Check if IPO has DRHP document."""
-        return obj.documents.filter(document_type='drhp').exists()
 
 
 class IPOCreateUpdateSerializer(serializers.ModelSerializer):
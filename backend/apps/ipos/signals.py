@@ -0,0 +1,120 @@
+"""
+Signal handlers that keep the IPO search index and response cache up to
+date and publish live subscription updates.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
+from apps.companies.models import Company
+from apps.documents.models import Document
+from bluestock_backend.response_cache import schedule_invalidation
+from .live import publish_on_commit, subscription_event, subscription_figures
+from .models import IPO, IPOSubscription, IPOTimeline
+from .search import update_search_vectors, reindex_company, reindex_ipo, unindex_ipo
+
+# Document fields that no cached IPO response shows
+UNCACHED_DOCUMENT_FIELDS = {'download_count'}
+
+# Sent inside the transaction after IPO statuses are updated in bulk, with
+# ipo_ids, company_ids, old_status and new_status
+ipo_status_changed = Signal()
+
+
+def detail_namespace(ipo_id):
+    """Response cache namespace of one IPO's detail endpoint."""
+    return f'ipo:{ipo_id}'
+
+
+def company_detail_namespaces(company_ids):
+    """Detail namespaces of every IPO of the given companies."""
+    ipo_ids = IPO.objects.filter(company_id__in=company_ids).values_list('pk', flat=True)
+    return [detail_namespace(ipo_id) for ipo_id in ipo_ids]
+
+
+def invalidate_ipo(ipo, company_ids):
+    # Sibling IPOs show the company's IPO counters, so they change too
+    schedule_invalidation(
+        ['ipo_list', 'ipo_stats', detail_namespace(ipo.pk)] +
+        company_detail_namespaces(company_ids)
+    )
+
+
+@receiver(pre_save, sender=IPO)
+def ipo_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    loaded = instance.__dict__.get('_loaded_values', {})
+    if 'company_id' in loaded:
+        instance._previous_company_id = loaded['company_id']
+        return
+    instance._previous_company_id = IPO.objects.filter(pk=instance.pk).values_list(
+        'company_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=IPO)
+def ipo_saved(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    update_search_vectors(ipo_ids=[instance.pk], using=using)
+    reindex_ipo(instance)
+
+    company_ids = {instance.company_id, getattr(instance, '_previous_company_id', None)}
+    company_ids.discard(None)
+    invalidate_ipo(instance, company_ids)
+
+
+@receiver(post_delete, sender=IPO)
+def ipo_deleted(sender, instance, **kwargs):
+    unindex_ipo(instance.pk)
+    invalidate_ipo(instance, [instance.company_id])
+
+
+@receiver(ipo_status_changed)
+def ipo_statuses_changed(sender, ipo_ids, company_ids, **kwargs):
+    # Company IPO counters change too, so sibling details are included
+    schedule_invalidation(
+        ['ipo_list', 'ipo_stats'] +
+        [detail_namespace(ipo_id) for ipo_id in ipo_ids] +
+        company_detail_namespaces(company_ids)
+    )
+
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, created, raw=False, using='default', **kwargs):
+    # A new company has no IPOs to reindex yet
+    if created or raw:
+        return
+    update_search_vectors(company_ids=[instance.pk], using=using)
+    reindex_company(instance)
+    schedule_invalidation(['ipo_list'] + company_detail_namespaces([instance.pk]))
+
+
+@receiver(post_save, sender=IPOSubscription)
+@receiver(post_delete, sender=IPOSubscription)
+@receiver(post_save, sender=IPOTimeline)
+@receiver(post_delete, sender=IPOTimeline)
+def ipo_detail_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_invalidation([detail_namespace(instance.ipo_id)])
+
+
+@receiver(post_save, sender=IPOSubscription)
+def subscription_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        publish_on_commit([
+            subscription_event(instance.ipo_id, {instance.category: subscription_figures(instance)})
+        ])
+
+
+@receiver(post_delete, sender=IPOSubscription)
+def subscription_deleted(sender, instance, **kwargs):
+    publish_on_commit([subscription_event(instance.ipo_id, {instance.category: None})])
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_delete, sender=Document)
+def document_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and set(update_fields) <= UNCACHED_DOCUMENT_FIELDS):
+        return
+    # has_rhp/has_drhp appear in both the list and the detail
+    schedule_invalidation(['ipo_list', detail_namespace(instance.ipo_id)])
@@ -0,0 +1,238 @@
+"""
+Bulk ingest of IPO subscription figures.
+
+On open days the exchange publishes subscription figures for every category
+of every open IPO every few minutes. ``ingest_subscriptions`` validates a
+batch of rows, computes the category rates in one pass, upserts them with a
+single ``bulk_create(update_conflicts=True)``, appends them to the
+subscription history and recomputes the overall ``IPO.subscription_rate``
+of every IPO in the batch from its category rows, all in one transaction.
+
+Rows are dicts with ``ipo`` (or ``ipo_id``), ``category``,
+``shares_offered``, ``shares_applied`` and optionally
+``applications_received``; CSV input uses the same column names.
+"""
+import csv
+import io
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.parsers import BaseParser
+from bluestock_backend.response_cache import schedule_invalidation
+from .history import record_snapshots
+from .live import publish_on_commit, subscription_event, subscription_figures
+from .models import IPO, IPOSubscription
+from .signals import detail_namespace
+
+CATEGORIES = {choice[0] for choice in IPOSubscription.CATEGORY_CHOICES}
+INTEGER_FIELDS = ('shares_offered', 'shares_applied', 'applications_received')
+UPDATE_FIELDS = ['shares_offered', 'shares_applied', 'applications_received', 'subscription_rate', 'updated_at']
+
+# Largest value each integer column holds (BigIntegerField / PositiveIntegerField)
+MAX_BIG_INT = 2 ** 63 - 1
+MAX_VALUES = {
+    'shares_offered': MAX_BIG_INT,
+    'shares_applied': MAX_BIG_INT,
+    'applications_received': 2 ** 31 - 1,
+}
+
+RATE_PLACES = Decimal('0.01')
+# subscription_rate is DecimalField(max_digits=10, decimal_places=2)
+MAX_RATE = Decimal('99999999.99')
+
+
+class SubscriptionIngestError(ValueError):
+    """
+    Raised when a batch has invalid rows; ``errors`` lists them by row.
+    """
+
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} invalid subscription rows')
+        self.errors = errors
+
+
+def read_csv(text):
+    """Parse CSV text with a header row into row dicts."""
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+class SubscriptionCSVParser(BaseParser):
+    """
+    Parse a ``text/csv`` request body into a list of row dicts.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return read_csv(stream.read().decode(encoding))
+
+
+def _to_int(value, max_value=MAX_BIG_INT):
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, str):
+        value = value.strip()
+    number = int(value)
+    if number < 0 or number > max_value:
+        raise ValueError
+    return number
+
+
+def _clean_rows(rows):
+    """
+    Validate raw rows into (ipo_id, category, offered, applied, applications).
+
+    A later row for the same IPO and category replaces an earlier one.
+    """
+    cleaned = {}
+    errors = []
+
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({'row': index, 'errors': {'non_field_errors': 'Expected an object'}})
+            continue
+
+        row_errors = {}
+        try:
+            ipo_id = _to_int(row.get('ipo', row.get('ipo_id')))
+        except (TypeError, ValueError):
+            row_errors['ipo'] = 'A valid IPO id is required'
+            ipo_id = None
+
+        category = str(row.get('category') or '').strip().lower()
+        if category not in CATEGORIES:
+            row_errors['category'] = f'Must be one of: {", ".join(sorted(CATEGORIES))}'
+
+        values = {}
+        for field in INTEGER_FIELDS:
+            value = row.get(field)
+            if field == 'applications_received' and value in (None, ''):
+                values[field] = 0
+                continue
+            try:
+                values[field] = _to_int(value, MAX_VALUES[field])
+            except (TypeError, ValueError):
+                row_errors[field] = f'A non-negative integer of at most {MAX_VALUES[field]} is required'
+
+        if row_errors:
+            errors.append({'row': index, 'errors': row_errors})
+            continue
+
+        cleaned[(ipo_id, category)] = (
+            index,
+            values['shares_offered'],
+            values['shares_applied'],
+            values['applications_received'],
+        )
+
+    return cleaned, errors
+
+
+def compute_rates(offered, applied):
+    """
+    Subscription rates for parallel sequences of offered and applied shares.
+
+    Rates are rounded to two places; nothing offered means a rate of 0.
+    """
+    return [
+        (Decimal(applied_shares) / Decimal(offered_shares)).quantize(RATE_PLACES, ROUND_HALF_UP)
+        if offered_shares else Decimal('0.00')
+        for offered_shares, applied_shares in zip(offered, applied)
+    ]
+
+
+def recompute_ipo_rates(ipo_ids, now=None):
+    """
+    Set IPO.subscription_rate of the given IPOs from all their category rows.
+
+    Returns {ipo_id: rate}.
+    """
+    totals = (
+        IPOSubscription.objects.filter(ipo_id__in=ipo_ids)
+        .values('ipo_id')
+        .annotate(offered=Sum('shares_offered'), applied=Sum('shares_applied'))
+        .order_by()
+    )
+    totals = list(totals)
+    rates = dict(zip(
+        [total['ipo_id'] for total in totals],
+        compute_rates([total['offered'] for total in totals], [total['applied'] for total in totals]),
+    ))
+
+    now = now or timezone.now()
+    ipos = [IPO(pk=ipo_id, subscription_rate=min(rate, MAX_RATE), updated_at=now) for ipo_id, rate in rates.items()]
+    IPO.objects.bulk_update(ipos, ['subscription_rate', 'updated_at'])
+    return rates
+
+
+def ingest_subscriptions(rows):
+    """
+    Validate and upsert a batch of subscription rows.
+
+    Raises SubscriptionIngestError without writing anything if any row is
+    invalid. Returns a summary with the row count and the new overall rate
+    of every IPO in the batch.
+    """
+    cleaned, errors = _clean_rows(rows)
+
+    ipo_ids = {ipo_id for ipo_id, _ in cleaned}
+    existing = set(IPO.objects.filter(pk__in=ipo_ids).values_list('pk', flat=True))
+    keys = list(cleaned)
+    values = [cleaned[key] for key in keys]
+    rates = compute_rates([value[1] for value in values], [value[2] for value in values])
+
+    for (ipo_id, _), value, rate in zip(keys, values, rates):
+        if ipo_id not in existing:
+            errors.append({'row': value[0], 'errors': {'ipo': f'IPO {ipo_id} does not exist'}})
+        elif rate > MAX_RATE:
+            errors.append({'row': value[0], 'errors': {'shares_applied': 'Subscription rate is too large'}})
+
+    if errors:
+        raise SubscriptionIngestError(sorted(errors, key=lambda error: error['row']))
+
+    now = timezone.now()
+    subscriptions = [
+        IPOSubscription(
+            ipo_id=ipo_id,
+            category=category,
+            shares_offered=offered,
+            shares_applied=applied,
+            applications_received=applications,
+            subscription_rate=rate,
+            updated_at=now,
+        )
+        for (ipo_id, category), (_, offered, applied, applications), rate in zip(keys, values, rates)
+    ]
+
+    with transaction.atomic():
+        IPOSubscription.objects.bulk_create(
+            subscriptions,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['ipo', 'category'],
+            update_fields=UPDATE_FIELDS,
+        )
+        record_snapshots(
+            [
+                (ipo_id, category, applied, applications, rate)
+                for (ipo_id, category), (_, _, applied, applications), rate in zip(keys, values, rates)
+            ],
+            recorded_at=now,
+        )
+        ipo_rates = recompute_ipo_rates(ipo_ids, now=now)
+
+        # bulk writes send no signals, so invalidate and publish here
+        schedule_invalidation(['ipo_list'] + [detail_namespace(ipo_id) for ipo_id in sorted(ipo_ids)])
+        changes = {}
+        for subscription in subscriptions:
+            changes.setdefault(subscription.ipo_id, {})[subscription.category] = subscription_figures(subscription)
+        publish_on_commit([
+            subscription_event(ipo_id, categories, ipo_rates.get(ipo_id))
+            for ipo_id, categories in sorted(changes.items())
+        ])
+
+    return {
+        'rows': len(subscriptions),
+        'ipos': {str(ipo_id): str(rate) for ipo_id, rate in sorted(ipo_rates.items())},
+    }
@@ -0,0 +1,683 @@
+"""
+Tests for the IPOs app.
+"""
+import io
+import tempfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.authentication.authentication import JWTTokenGenerator
+from apps.authentication.models import User
+from apps.admin_dashboard.stats import get_snapshot
+from apps.companies.models import Company
+from apps.documents.models import Document
+from bluestock_backend.response_cache import counters, get_cache
+from .history import rollup_history
+from .scheduler import advance_statuses
+from .search import InvertedIndex, reset_python_index, search_ipos
+from .live import event_stream, get_broker, subscription_event
+from .models import IPO, IPOSubscription, IPOSubscriptionSnapshot, IPOTimeline
+from .serializers import IPOListSerializer
+from .subscriptions import ingest_subscriptions
+
+
+def create_ipo(index, **kwargs):
+    """Create a company and an IPO for it."""
+    company = Company.objects.create(
+        name=f'Company {index}',
+        sector='technology',
+        cin=f'U{index:05d}MH2020PTC{index:06d}',
+    )
+    open_date = date.today() + timedelta(days=index)
+    defaults = {
+        'company': company,
+        'ipo_name': f'Company {index} IPO',
+        'price_band_min': 100,
+        'price_band_max': 110,
+        'lot_size': 10,
+        'issue_size': 500,
+        'ipo_open_date': open_date,
+        'ipo_close_date': open_date + timedelta(days=3),
+    }
+    defaults.update(kwargs)
+    return IPO.objects.create(**defaults)
+
+
+def create_document(ipo, document_type):
+    """Create a document row without touching the filesystem."""
+    return Document.objects.create(
+        ipo=ipo,
+        document_type=document_type,
+        title=f'{ipo.ipo_name} {document_type}',
+        file=f'documents/ipo_{ipo.id}/{document_type}/file.pdf',
+        file_size=1024,
+        original_filename='file.pdf',
+    )
+
+
+class DocumentPresenceTests(TestCase):
+    """
+    has_rhp/has_drhp must not issue a query per row.
+    """
+
+    def _presence_queries(self, ipos):
+        serializer = IPOListSerializer(ipos, many=True)
+        with CaptureQueriesContext(connection) as queries:
+            flags = [
+                (serializer.child.get_has_rhp(ipo), serializer.child.get_has_drhp(ipo))
+                for ipo in ipos
+            ]
+        return len(queries), flags
+
+    def test_query_count_is_constant_per_page(self):
+        ipos = [create_ipo(index) for index in range(12)]
+        for ipo in ipos[::2]:
+            create_document(ipo, 'rhp')
+        create_document(ipos[1], 'drhp')
+
+        small_count, small_flags = self._presence_queries(list(IPO.objects.order_by('id')[:3]))
+        large_count, large_flags = self._presence_queries(list(IPO.objects.order_by('id')))
+
+        self.assertEqual(small_count, 1)
+        self.assertEqual(small_count, large_count)
+        self.assertEqual(small_flags, [(True, False), (False, True), (True, False)])
+        self.assertEqual(len(large_flags), 12)
+
+    def test_prefetched_documents_need_no_queries(self):
+        for index in range(5):
+            create_document(create_ipo(index), 'drhp')
+
+        ipos = list(IPO.objects.prefetch_related('documents'))
+        query_count, flags = self._presence_queries(ipos)
+
+        self.assertEqual(query_count, 0)
+        self.assertTrue(all(flag == (False, True) for flag in flags))
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class IPOListQueryCountTests(TestCase):
+    """
+    A page of the IPO list costs the same number of queries at any size.
+    """
+
+    def _page_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/ipos/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_is_constant_per_page(self):
+        for index in range(2):
+            create_document(create_ipo(index), 'rhp')
+        small_count, small_page = self._page_queries()
+
+        for index in range(2, 15):
+            create_document(create_ipo(index, status='closed'), 'drhp')
+        large_count, large_page = self._page_queries()
+
+        self.assertEqual(len(small_page['results']), 2)
+        self.assertEqual(len(large_page['results']), 15)
+        self.assertEqual(small_count, large_count)
+
+    def test_company_counters_come_from_annotations(self):
+        ipo = create_ipo(0)
+        IPO.objects.create(
+            company=ipo.company,
+            ipo_name='Follow-on',
+            price_band_min=100,
+            price_band_max=110,
+            lot_size=10,
+            issue_size=200,
+            ipo_open_date=ipo.ipo_open_date,
+            ipo_close_date=ipo.ipo_close_date,
+            status='listed',
+        )
+
+        _, page = self._page_queries()
+
+        for row in page['results']:
+            self.assertEqual(row['company']['total_ipos'], 2)
+            self.assertEqual(row['company']['active_ipos'], 1)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(TestCase):
+    """
+    Public IPO reads are cached until a related write invalidates them.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        counters.reset()
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_repeated_reads_are_served_from_cache(self):
+        create_ipo(0)
+
+        first, _ = self._get('/api/ipos/?status=upcoming&page=1')
+        second, query_count = self._get('/api/ipos/?page=1&status=upcoming')
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(query_count, 0)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(counters.snapshot()['views']['ipo_list'], {'hits': 1, 'misses': 1})
+
+        with CaptureQueriesContext(connection) as queries:
+            revalidated = self.client.get('/api/ipos/?page=1&status=upcoming', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+    def test_writes_invalidate_affected_responses(self):
+        ipo = create_ipo(0)
+        other = create_ipo(1)
+        for url in ['/api/ipos/', f'/api/ipos/{ipo.pk}/', f'/api/ipos/{other.pk}/']:
+            self._get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            IPOTimeline.objects.create(
+                ipo=ipo, event_type='open', event_date=ipo.ipo_open_date, description='Opens'
+            )
+
+        self.assertEqual(self._get(f'/api/ipos/{ipo.pk}/')[0]['X-Cache'], 'MISS')
+        self.assertEqual(self._get(f'/api/ipos/{other.pk}/')[0]['X-Cache'], 'HIT')
+        self.assertEqual(self._get('/api/ipos/')[0]['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_document(other, 'rhp')
+
+        response, _ = self._get('/api/ipos/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(
+            {row['id']: row['has_rhp'] for row in response.json()['results']},
+            {ipo.pk: False, other.pk: True}
+        )
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class ConditionalGetTests(TestCase):
+    """
+    Polling clients revalidate with ETag or Last-Modified instead of
+    downloading the body again.
+    """
+
+    def test_matching_etag_returns_304_before_serializing(self):
+        ipo = create_ipo(0)
+        for url in ['/api/ipos/?status=upcoming', f'/api/ipos/{ipo.pk}/']:
+            response = self.client.get(url)
+            with CaptureQueriesContext(connection) as queries:
+                revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated['ETag'], response['ETag'])
+            self.assertEqual(len(queries), 1)
+
+            by_date = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(by_date.status_code, 304)
+
+    def test_subscription_update_changes_detail_etag(self):
+        ipo = create_ipo(0)
+        etag = self.client.get(f'/api/ipos/{ipo.pk}/')['ETag']
+
+        IPOSubscription.objects.create(
+            ipo=ipo, category='retail', shares_offered=1000, shares_applied=2500
+        )
+        response = self.client.get(f'/api/ipos/{ipo.pk}/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['subscriptions']), 1)
+
+    def test_document_upload_changes_list_etag(self):
+        ipo = create_ipo(0)
+        etag = self.client.get('/api/ipos/')['ETag']
+
+        # The list fingerprint doesn't join documents; the cache version covers them
+        with self.captureOnCommitCallbacks(execute=True):
+            create_document(ipo, 'rhp')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/ipos/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('documents', queries[0]['sql'])
+        self.assertTrue(response.json()['results'][0]['has_rhp'])
+
+    def test_document_and_timeline_edits_change_detail_etag(self):
+        ipo = create_ipo(0)
+        document = create_document(ipo, 'drhp')
+        event = IPOTimeline.objects.create(ipo=ipo, event_type='open', event_date=ipo.ipo_open_date)
+        url = f'/api/ipos/{ipo.pk}/'
+
+        etag = self.client.get(url)['ETag']
+        document.document_type = 'rhp'
+        document.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['has_rhp'])
+
+        etag = response['ETag']
+        event.description = 'Opens at 10 AM'
+        event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['timeline'][0]['description'], 'Opens at 10 AM')
+
+        # One query, and relations are not joined together
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('JOIN "ipo_subscriptions"', queries[0]['sql'])
+
+    def test_missing_ipo_is_not_found(self):
+        self.assertEqual(self.client.get('/api/ipos/404/').status_code, 404)
+
+
+class IPOSearchTests(TestCase):
+    """
+    The fallback search index matches word prefixes and ranks by field weight.
+    """
+
+    def setUp(self):
+        reset_python_index()
+        self.addCleanup(reset_python_index)
+
+    def test_prefix_matching(self):
+        index = InvertedIndex()
+        index.add(1, [('Tata Motors', 'A'), ('automobile', 'B')])
+        index.add(2, [('Tata Steel', 'A'), ('metals', 'B')])
+
+        self.assertEqual([ipo_id for ipo_id, _ in index.search(['tat'])], [1, 2])
+        self.assertEqual([ipo_id for ipo_id, _ in index.search(['tata', 'mot'])], [1])
+        self.assertEqual(index.search(['motors', 'steel']), [])
+        self.assertEqual(index.search(['ata']), [])  # prefixes only, not substrings
+
+        index.remove(1)
+        self.assertEqual([ipo_id for ipo_id, _ in index.search(['tata'])], [2])
+
+    def test_ranking_order(self):
+        index = InvertedIndex()
+        index.add(1, [('Solar', 'C')])
+        index.add(2, [('Solar', 'B')])
+        index.add(3, [('Solar', 'A')])
+        index.add(4, [('Solaris', 'A')])
+
+        # Whole-word name match, then prefix-only name match, then sector, then description
+        self.assertEqual([ipo_id for ipo_id, _ in index.search(['solar'])], [3, 4, 2, 1])
+        self.assertEqual(index.search(['solar'], limit=2), index.search(['solar'])[:2])
+
+    def test_search_ipos_ranks_name_matches_first(self):
+        described = create_ipo(0, description='Makes solar panels')
+        named = create_ipo(1, ipo_name='Solar Power IPO')
+
+        results = list(search_ipos(IPO.objects.all(), 'sol'))
+        self.assertEqual(results, [named, described])
+        self.assertGreater(results[0].search_rank, results[1].search_rank)
+
+    @override_settings(IPO_SEARCH_FALLBACK_MAX_RESULTS=2)
+    def test_filters_apply_before_the_result_limit(self):
+        for index in range(4):
+            create_ipo(index)
+        closed = [create_ipo(index, status='closed') for index in range(4, 7)]
+
+        # Every IPO matches; the closed ones rank below the global top two
+        results = search_ipos(IPO.objects.filter(status='closed'), 'company')
+        self.assertEqual(list(results), closed[:2])
+        self.assertEqual(search_ipos(IPO.objects.all(), 'company').count(), 2)
+
+
+class BulkSubscriptionTests(TestCase):
+    """
+    Subscription figures for many IPOs are upserted in one batch.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {JWTTokenGenerator.generate_access_token(admin)}'}
+        self.ipo = create_ipo(0)
+        self.other = create_ipo(1)
+        IPOSubscription.objects.create(
+            ipo=self.ipo, category='qib', shares_offered=1000, shares_applied=1000
+        )
+
+    def _post(self, data, content_type='application/json'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                '/api/ipos/subscriptions/bulk/', data, content_type=content_type, **self.auth
+            )
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_upserts_rows_and_recomputes_ipo_rates(self):
+        self.assertEqual(self.client.get(f'/api/ipos/{self.ipo.pk}/')['X-Cache'], 'MISS')
+
+        response = self._post([
+            {'ipo': self.ipo.pk, 'category': 'retail', 'shares_offered': 1000, 'shares_applied': 3000},
+            {'ipo': self.ipo.pk, 'category': 'qib', 'shares_offered': 1000, 'shares_applied': 2000},
+            {'ipo': self.other.pk, 'category': 'nii', 'shares_offered': 300, 'shares_applied': 100},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'rows': 3,
+            'ipos': {str(self.ipo.pk): '2.50', str(self.other.pk): '0.33'},
+        })
+        self.assertEqual(IPOSubscription.objects.count(), 3)
+        self.assertEqual(
+            IPOSubscription.objects.get(ipo=self.ipo, category='qib').subscription_rate,
+            Decimal('2.00')
+        )
+        self.ipo.refresh_from_db()
+        self.assertEqual(self.ipo.subscription_rate, Decimal('2.50'))
+
+        detail = self.client.get(f'/api/ipos/{self.ipo.pk}/')
+        self.assertEqual(detail['X-Cache'], 'MISS')
+        self.assertEqual(detail.json()['subscription_rate'], '2.50')
+
+    def test_csv_body_is_accepted(self):
+        body = (
+            'ipo,category,shares_offered,shares_applied,applications_received\n'
+            f'{self.other.pk},retail,400,1000,25\n'
+        )
+        response = self._post(body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 200)
+        subscription = IPOSubscription.objects.get(ipo=self.other)
+        self.assertEqual(subscription.applications_received, 25)
+        self.assertEqual(subscription.subscription_rate, Decimal('2.50'))
+
+    def test_invalid_rows_write_nothing(self):
+        response = self._post([
+            {'ipo': self.ipo.pk, 'category': 'retail', 'shares_offered': 1000, 'shares_applied': 3000},
+            {'ipo': 999, 'category': 'retail', 'shares_offered': 1000, 'shares_applied': 3000},
+            {'ipo': self.ipo.pk, 'category': 'hni', 'shares_offered': -1, 'shares_applied': 3000},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['row'] for row in response.json()['rows']], [1, 2])
+        self.assertEqual(IPOSubscription.objects.count(), 1)
+
+    def test_out_of_range_values_are_rejected(self):
+        response = self._post([
+            {'ipo': self.ipo.pk, 'category': 'retail', 'shares_offered': 2 ** 63 - 1, 'shares_applied': 2 ** 63 - 1},
+            {'ipo': self.ipo.pk, 'category': 'nii', 'shares_offered': 1000, 'shares_applied': 2 ** 63},
+            {'ipo': 2 ** 64, 'category': 'qib', 'shares_offered': 1000, 'shares_applied': 3000},
+            {
+                'ipo': self.other.pk, 'category': 'retail', 'shares_offered': 1000,
+                'shares_applied': 3000, 'applications_received': 2 ** 31,
+            },
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [(row['row'], sorted(row['errors'])) for row in response.json()['rows']],
+            [(1, ['shares_applied']), (2, ['ipo']), (3, ['applications_received'])]
+        )
+        self.assertEqual(IPOSubscription.objects.count(), 1)
+
+    def test_requires_admin(self):
+        response = self.client.post('/api/ipos/subscriptions/bulk/', [], content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_load_subscriptions_command(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'subscriptions.csv'
+        path.write_text(
+            'ipo,category,shares_offered,shares_applied\n'
+            f'{self.ipo.pk},retail,1000,1000\n'
+            f'{self.ipo.pk},qib,1000,5000\n'
+        )
+        call_command('load_subscriptions', str(path), stdout=io.StringIO())
+
+        self.ipo.refresh_from_db()
+        self.assertEqual(self.ipo.subscription_rate, Decimal('3.00'))
+
+        path.write_text('ipo,category,shares_offered,shares_applied\n1,retail,x,1\n')
+        with self.assertRaises(CommandError):
+            call_command('load_subscriptions', str(path), stdout=io.StringIO(), stderr=io.StringIO())
+
+
+class SubscriptionHistoryTests(TestCase):
+    """
+    Ingest appends snapshots that are read back downsampled and rolled up.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.ipo = create_ipo(0)
+        self.start = timezone.make_aware(datetime(2024, 1, 15, 10, 0))
+
+    def _snapshot(self, minutes, rate_hundredths, category='retail', **kwargs):
+        return IPOSubscriptionSnapshot.objects.create(
+            ipo=self.ipo,
+            category=category,
+            recorded_at=self.start + timedelta(minutes=minutes),
+            shares_applied=rate_hundredths * 10,
+            rate_hundredths=rate_hundredths,
+            **kwargs
+        )
+
+    def test_ingest_appends_snapshots(self):
+        for applied in (1000, 2000):
+            ingest_subscriptions([
+                {'ipo': self.ipo.pk, 'category': 'retail', 'shares_offered': 1000, 'shares_applied': applied},
+            ])
+
+        self.assertEqual(
+            list(IPOSubscriptionSnapshot.objects.order_by('pk').values_list('rate_hundredths', flat=True)),
+            [100, 200]
+        )
+
+    def test_history_is_downsampled_per_bucket(self):
+        for minutes, rate in [(0, 100), (5, 150), (14, 180), (16, 220), (31, 300)]:
+            self._snapshot(minutes, rate)
+        self._snapshot(3, 500, category='qib')
+
+        response = self.client.get(f'/api/ipos/{self.ipo.pk}/subscriptions/history/?bucket=15m')
+
+        self.assertEqual(response.status_code, 200)
+        series = response.json()['series']
+        self.assertEqual(
+            [(point['time'], point['subscription_rate']) for point in series['retail']],
+            [
+                ('2024-01-15T10:00:00+05:30', '1.80'),
+                ('2024-01-15T10:15:00+05:30', '2.20'),
+                ('2024-01-15T10:30:00+05:30', '3.00'),
+            ]
+        )
+        self.assertEqual(series['qib'][0]['subscription_rate'], '5.00')
+
+        filtered = self.client.get(f'/api/ipos/{self.ipo.pk}/subscriptions/history/?bucket=1h&category=qib')
+        self.assertEqual(list(filtered.json()['series']), ['qib'])
+
+        self.assertEqual(
+            self.client.get(f'/api/ipos/{self.ipo.pk}/subscriptions/history/?bucket=7m').status_code, 400
+        )
+        self.assertEqual(self.client.get('/api/ipos/404/subscriptions/history/').status_code, 404)
+
+    @override_settings(SUBSCRIPTION_HISTORY_RAW_RETENTION_DAYS=7, SUBSCRIPTION_HISTORY_ROLLUP_BUCKET=3600)
+    def test_rollup_keeps_last_point_per_bucket(self):
+        for minutes, rate in [(0, 100), (20, 150), (50, 180), (70, 220)]:
+            self._snapshot(minutes, rate)
+        recent = self._snapshot(60 * 24 * 10, 400)
+
+        rolled, written, pruned = rollup_history(now=self.start + timedelta(days=8))
+
+        self.assertEqual((rolled, written, pruned), (4, 2, 0))
+        self.assertEqual(
+            list(IPOSubscriptionSnapshot.objects.order_by('recorded_at').values_list(
+                'recorded_at', 'resolution', 'rate_hundredths'
+            )),
+            [
+                (self.start, 3600, 180),
+                (self.start + timedelta(hours=1), 3600, 220),
+                (recent.recorded_at, 0, 400),
+            ]
+        )
+
+
+class LiveUpdatesTests(TestCase):
+    """
+    Subscription changes reach Server-Sent Events streams after commit.
+    """
+
+    def setUp(self):
+        self.published = []
+        broker = get_broker()
+        broker.publish = self.published.append
+        self.addCleanup(vars(broker).pop, 'publish')
+
+    def test_subscription_changes_are_published_on_commit(self):
+        ipo = create_ipo(0)
+        other = create_ipo(1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription = IPOSubscription.objects.create(
+                ipo=ipo, category='retail', shares_offered=1000, shares_applied=2500
+            )
+            self.assertEqual(self.published, [])
+        self.assertEqual(self.published, [{
+            'ipo': ipo.pk,
+            'categories': {'retail': {
+                'subscription_rate': '2.50',
+                'shares_offered': 1000,
+                'shares_applied': 2500,
+                'applications_received': 0,
+            }},
+        }])
+
+        self.published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_subscriptions([
+                {'ipo': ipo.pk, 'category': 'qib', 'shares_offered': 1000, 'shares_applied': 500},
+                {'ipo': other.pk, 'category': 'nii', 'shares_offered': 100, 'shares_applied': 300},
+            ])
+        self.assertEqual(
+            [(event['ipo'], list(event['categories']), event['subscription_rate']) for event in self.published],
+            [(ipo.pk, ['qib'], '1.50'), (other.pk, ['nii'], '3.00')]
+        )
+
+        self.published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.delete()
+        self.assertEqual(self.published, [{'ipo': ipo.pk, 'categories': {'retail': None}}])
+
+    def test_stream_requires_asgi(self):
+        self.assertEqual(self.client.get('/api/ipos/live/').status_code, 501)
+
+
+class LiveStreamTests(TestCase):
+    """
+    The SSE stream pushes only events for the IPOs a client asked for.
+    """
+
+    async def test_stream_delivers_matching_events(self):
+        response = await AsyncClient().get('/api/ipos/live/?ipos=1,2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+
+        broker = get_broker()
+        broker.publish(subscription_event(3, {'retail': None}))
+        broker.publish(subscription_event(2, {'retail': None}, subscription_rate='4.10'))
+        self.assertEqual(
+            await anext(stream),
+            b'event: subscription\n'
+            b'data: {"ipo":2,"categories":{"retail":null},"subscription_rate":"4.10"}\n\n'
+        )
+
+
+    @override_settings(LIVE_EVENTS_HEARTBEAT=0.01, LIVE_EVENTS_MAX_DURATION=0.05)
+    async def test_stream_sends_heartbeats_and_ends(self):
+        connected = len(get_broker())
+        messages = [message async for message in event_stream()]
+
+        self.assertEqual(messages[0], 'retry: 3000\n\n')
+        self.assertIn(': keep-alive\n\n', messages)
+        self.assertEqual(len(get_broker()), connected)
+
+    async def test_invalid_filter_is_rejected(self):
+        response = await AsyncClient().get('/api/ipos/live/?ipos=abc')
+        self.assertEqual(response.status_code, 400)
+
+
+class StatusSchedulerTests(TestCase):
+    """
+    IPO statuses follow their dates through bulk transitions.
+    """
+
+    def setUp(self):
+        get_cache().clear()
+        self.today = date(2024, 3, 10)
+
+    def _ipo(self, index, opens_in, closes_in, status='upcoming', lists_in=None):
+        return create_ipo(
+            index,
+            status=status,
+            ipo_open_date=self.today + timedelta(days=opens_in),
+            ipo_close_date=self.today + timedelta(days=closes_in),
+            listing_date=self.today + timedelta(days=lists_in) if lists_in is not None else None,
+        )
+
+    def test_transitions_follow_dates(self):
+        opening = self._ipo(0, 0, 2)
+        future = self._ipo(1, 3, 5)
+        missed = self._ipo(2, -10, -7, lists_in=-2)
+        closing = self._ipo(3, -4, -1, status='open', lists_in=3)
+        cancelled = self._ipo(4, -4, -1, status='cancelled')
+        IPOTimeline.objects.create(ipo=opening, event_type='open', event_date=self.today)
+        IPOTimeline.objects.create(ipo=closing, event_type='listing', event_date=self.today + timedelta(days=3))
+
+        with CaptureQueriesContext(connection) as queries:
+            moved = advance_statuses(self.today)
+
+        self.assertEqual(moved, {'upcoming->open': 1, 'upcoming->closed': 1, 'open->closed': 1, 'closed->listed': 1})
+        # Per transition: savepoint, select, update, timeline update,
+        # sibling lookup for invalidation, release; independent of row count
+        self.assertEqual(len(queries), 4 * 6)
+        self.assertEqual(
+            dict(IPO.objects.values_list('pk', 'status')),
+            {
+                opening.pk: 'open',
+                future.pk: 'upcoming',
+                missed.pk: 'listed',
+                closing.pk: 'closed',
+                cancelled.pk: 'cancelled',
+            }
+        )
+        self.assertEqual(
+            dict(IPOTimeline.objects.values_list('ipo_id', 'is_completed')),
+            {opening.pk: True, closing.pk: False}
+        )
+        self.assertEqual(advance_statuses(self.today), {})
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_status_filter_and_caches_follow_transitions(self):
+        ipo = self._ipo(0, 0, 2)
+        snapshot = get_snapshot(fresh=True)
+        self.assertEqual(snapshot.payload['ipos']['upcoming'], 1)
+        self.assertEqual(self.client.get('/api/ipos/?status=open').json()['count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            advance_statuses(self.today)
+
+        response = self.client.get('/api/ipos/?status=open')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([row['id'] for row in response.json()['results']], [ipo.pk])
+
+        payload = get_snapshot().payload['ipos']
+        self.assertEqual((payload['upcoming'], payload['open']), (0, 1))
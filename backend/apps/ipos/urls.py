@@ -8,7 +8,10 @@ urlpatterns = [
     # IPO Routes as per specification
     path('', views.ipo_list_create, name='ipo-list-create'),  # GET/POST /api/ipos
     path('search/', views.ipo_search, name='ipo-search'),     # GET /api/ipos/search
+    path('subscriptions/bulk/', views.bulk_subscriptions, name='ipo-subscriptions-bulk'),  # POST /api/ipos/subscriptions/bulk
+    path('live/', views.ipo_live, name='ipo-live'),             # GET /api/ipos/live (SSE, ASGI only)
     path('<int:pk>/', views.ipo_detail, name='ipo-detail'),   # GET/PUT/DELETE /api/ipos/:id
+    path('<int:pk>/subscriptions/history/', views.ipo_subscription_history, name='ipo-subscription-history'),
     
     # Document Upload/Download Routes as per specification
     path('<int:pk>/upload/', views.upload_document, name='ipo-upload-document'),      # POST /api/ipos/:id/upload
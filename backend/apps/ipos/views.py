@@ -2,21 +2,34 @@
 IPO views for the Bluestock IPO platform.
 """
 import os
-from django.http import FileResponse
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes, parser_classes
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.response import Response
-from django.db.models import Q
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse, StreamingHttpResponse
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import IPO
+from bluestock_backend.conditional import conditional_get
+from bluestock_backend.pagination import CursorPaginator, InvalidCursor
+from bluestock_backend.response_cache import cache_response, get_version
+from .history import BUCKETS, subscription_history
+from .live import event_stream, get_broker
+from .models import IPO, IPOSubscription, IPOTimeline
+from .search import search_ipos
+from .subscriptions import SubscriptionCSVParser, SubscriptionIngestError, ingest_subscriptions
 from .serializers import (
     IPOSerializer, 
     IPOListSerializer, 
     IPOCreateUpdateSerializer
 )
-from apps.documents.models import Document, DocumentDownloadLog
+from apps.documents.accounting import record_download
+from apps.documents.delivery import counts_as_download, serve_document
+from apps.documents.models import Document
+from apps.documents.presence import DocumentPresenceIndex
 from apps.documents.serializers import DocumentSerializer, DocumentUploadSerializer
 
 
@@ -30,14 +43,114 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role == 'admin'
 
 
+def _ipo_detail_queryset():
+    """
+    Queryset used to render a single IPO with all of its related data.
+    """
+    return IPO.objects.select_related('company').with_company_ipo_counts().prefetch_related(
+        'subscriptions', 'timeline', 'documents'
+    )
+
+
+def _filter_ipos(ipos, request):
+    """
+    Apply the list endpoint's status, sector, is_active and search filters.
+    """
+    status_filter = request.query_params.get('status')
+    if status_filter:
+        ipos = ipos.filter(status=status_filter)
+    
+    sector_filter = request.query_params.get('sector')
+    if sector_filter:
+        ipos = ipos.filter(company__sector=sector_filter)
+    
+    is_active = request.query_params.get('is_active')
+    if is_active is not None:
+        ipos = ipos.filter(is_active=is_active.lower() == 'true')
+    
+    search = request.query_params.get('search')
+    if search:
+        ipos = search_ipos(ipos, search)
+    
+    return ipos
+
+
+def _latest(*timestamps):
+    """Return the most recent of the given timestamps, ignoring None."""
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def _ipo_list_fingerprint(request):
+    """
+    Validators for an IPO list response from one aggregate query.
+    
+    Covers the filtered IPOs and their companies; the count catches
+    deletions. Sibling IPO counters and document presence are covered by
+    the ipo_list response cache version, which their writes bump.
+    """
+    fingerprint = _filter_ipos(IPO.objects.all(), request).order_by().aggregate(
+        ipo_count=Count('id'),
+        updated=Max('updated_at'),
+        company_updated=Max('company__updated_at'),
+    )
+    fingerprint['version'] = get_version('ipo_list')
+    last_modified = _latest(fingerprint['updated'], fingerprint['company_updated'])
+    return sorted(fingerprint.items()), last_modified
+
+
+def _related_stats(name, model, field, outer):
+    """
+    Row count and latest ``updated_at`` of the rows of ``model`` whose
+    ``field`` matches the outer IPO's ``outer``, as scalar subqueries, so
+    relations aren't joined into one cartesian product.
+    """
+    rows = model.objects.filter(**{field: OuterRef(outer)}).order_by().values(field)
+    return {
+        f'{name}_count': Coalesce(Subquery(rows.annotate(count=Count('id')).values('count')), 0),
+        f'{name}_updated': Subquery(rows.annotate(updated=Max('updated_at')).values('updated')),
+    }
+
+
+def _ipo_detail_fingerprint(request, pk):
+    """
+    Validators for an IPO detail response from one query.
+    
+    Covers the IPO, its company and sibling IPOs, subscriptions, timeline
+    and documents, each from its own subquery. Returns None for a missing
+    IPO so the view answers 404.
+    """
+    fingerprint = IPO.objects.filter(pk=pk).values(
+        'updated_at', 'company__updated_at'
+    ).annotate(
+        **_related_stats('company_ipos', IPO, 'company', 'company'),
+        **_related_stats('subscriptions', IPOSubscription, 'ipo', 'pk'),
+        **_related_stats('timeline', IPOTimeline, 'ipo', 'pk'),
+        **_related_stats('documents', Document, 'ipo', 'pk'),
+    ).first()
+    if fingerprint is None:
+        return None
+    
+    last_modified = _latest(
+        fingerprint['updated_at'],
+        fingerprint['company__updated_at'],
+        fingerprint['company_ipos_updated'],
+        fingerprint['subscriptions_updated'],
+        fingerprint['timeline_updated'],
+        fingerprint['documents_updated'],
+    )
+    return sorted(fingerprint.items()), last_modified
+
+
 @swagger_auto_schema(
     method='get',
     manual_parameters=[
-        openapi.Parameter('search', openapi.IN_QUERY, description="Search IPOs by company name or IPO name", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Search IPOs by company name, IPO name, sector or description (prefix match, ranked)", type=openapi.TYPE_STRING),
         openapi.Parameter('status', openapi.IN_QUERY, description="Filter by status", type=openapi.TYPE_STRING),
         openapi.Parameter('sector', openapi.IN_QUERY, description="Filter by company sector", type=openapi.TYPE_STRING),
         openapi.Parameter('ordering', openapi.IN_QUERY, description="Order by field", type=openapi.TYPE_STRING),
         openapi.Parameter('page', openapi.IN_QUERY, description="Page number", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor for keyset pagination; pass an empty value for the first page", type=openapi.TYPE_STRING),
     ],
     responses={200: IPOListSerializer(many=True)},
     operation_description="Get list of all IPOs with filtering and search"
@@ -55,37 +168,24 @@ class IsAdminOrReadOnly(permissions.BasePermission):
 )
 @api_view(['GET', 'POST'])
 @permission_classes([IsAdminOrReadOnly])
+@cache_response('ipo_list')
+@conditional_get(_ipo_list_fingerprint)
 def ipo_list_create(request):
     """
     List all IPOs or create a new IPO.
     """
     if request.method == 'GET':
-        ipos = IPO.objects.select_related('company').prefetch_related('documents')
-        
-        # Apply filters
-        status_filter = request.query_params.get('status')
-        if status_filter:
-            ipos = ipos.filter(status=status_filter)
-        
-        sector_filter = request.query_params.get('sector')
-        if sector_filter:
-            ipos = ipos.filter(company__sector=sector_filter)
-        
-        is_active = request.query_params.get('is_active')
-        if is_active is not None:
-            ipos = ipos.filter(is_active=is_active.lower() == 'true')
+        ipos = _filter_ipos(
+            IPO.objects.select_related('company').with_company_ipo_counts().prefetch_related(
+                Prefetch('documents', queryset=Document.objects.only('id', 'ipo_id', 'document_type'))
+            ),
+            request
+        )
         
-        # Apply search
+        # Apply ordering (search results are ranked by relevance unless
+        # an ordering is given)
         search = request.query_params.get('search')
-        if search:
-            ipos = ipos.filter(
-                Q(company__name__icontains=search) |
-                Q(ipo_name__icontains=search) |
-                Q(description__icontains=search)
-            )
-        
-        # Apply ordering
-        ordering = request.query_params.get('ordering', '-ipo_open_date')
+        ordering = request.query_params.get('ordering', '' if search else '-ipo_open_date')
         valid_orderings = [
             'ipo_open_date', '-ipo_open_date',
             'ipo_close_date', '-ipo_close_date',
@@ -96,13 +196,45 @@ def ipo_list_create(request):
         if ordering in valid_orderings:
             ipos = ipos.order_by(ordering)
         
+        # Keyset pagination when a cursor is passed (search results fall
+        # back to date order since relevance scores are not stable keys)
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            if ordering not in valid_orderings:
+                ordering = '-ipo_open_date'
+            try:
+                page = CursorPaginator(ipos, [ordering], 20).page(cursor)
+            except InvalidCursor as e:
+                return Response(
+                    {'error': str(e)}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            serializer = IPOListSerializer(
+                page.items,
+                many=True,
+                context={'document_index': DocumentPresenceIndex.for_ipos(page.items)}
+            )
+            
+            return Response({
+                'results': serializer.data,
+                'next_cursor': page.next_cursor,
+                'previous_cursor': page.previous_cursor,
+                'has_next': page.has_next(),
+                'has_previous': page.has_previous(),
+            })
+        
         # Pagination
         from django.core.paginator import Paginator
         page_number = request.query_params.get('page', 1)
         paginator = Paginator(ipos, 20)  # 20 IPOs per page
         page_obj = paginator.get_page(page_number)
         
-        serializer = IPOListSerializer(page_obj, many=True)
+        serializer = IPOListSerializer(
+            page_obj,
+            many=True,
+            context={'document_index': DocumentPresenceIndex.for_ipos(page_obj)}
+        )
         
         return Response({
             'results': serializer.data,
@@ -146,17 +278,19 @@ def ipo_search(request):
             'message': 'Search query is required'
         }, status=status.HTTP_400_BAD_REQUEST)
     
-    ipos = IPO.objects.select_related('company').filter(
-        Q(company__name__icontains=search_query) |
-        Q(ipo_name__icontains=search_query) |
-        Q(description__icontains=search_query) |
-        Q(company__sector__icontains=search_query)
-    ).filter(is_active=True)
+    ipos = search_ipos(
+        IPO.objects.select_related('company').with_company_ipo_counts().filter(is_active=True),
+        search_query
+    )
     
     # Limit results to 50
-    ipos = ipos[:50]
+    ipos = list(ipos[:50])
     
-    serializer = IPOListSerializer(ipos, many=True)
+    serializer = IPOListSerializer(
+        ipos,
+        many=True,
+        context={'document_index': DocumentPresenceIndex.for_ipos(ipos)}
+    )
     
     return Response({
         'results': serializer.data,
@@ -196,14 +330,14 @@ def ipo_search(request):
 )
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAdminOrReadOnly])
+@cache_response('ipo:{pk}')
+@conditional_get(_ipo_detail_fingerprint)
 def ipo_detail(request, pk):
     """
     Retrieve, update or delete an IPO.
     """
     try:
-        ipo = IPO.objects.select_related('company').prefetch_related(
-            'subscriptions', 'timeline', 'documents'
-        ).get(pk=pk)
+        ipo = _ipo_detail_queryset().get(pk=pk)
     except IPO.DoesNotExist:
         return Response(
             {'error': 'IPO not found'}, 
@@ -217,7 +351,9 @@ def ipo_detail(request, pk):
     elif request.method == 'PUT':
         serializer = IPOCreateUpdateSerializer(ipo, data=request.data)
         if serializer.is_valid():
-            ipo = serializer.save()
+            serializer.save()
+            # Reload so company counters reflect a changed company or status
+            ipo = _ipo_detail_queryset().get(pk=pk)
             return Response(IPOSerializer(ipo).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -257,6 +393,7 @@ def ipo_detail(request, pk):
 )
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cache_response('ipo_statuses')
 def ipo_statuses(request):
     """
     Get list of available IPO statuses.
@@ -288,6 +425,7 @@ def ipo_statuses(request):
 )
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@cache_response('ipo_stats')
 def ipo_stats(request):
     """
     Get IPO statistics.
@@ -305,6 +443,156 @@ def ipo_stats(request):
     return Response(stats)
 
 
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_ARRAY,
+        items=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'ipo': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'category': openapi.Schema(type=openapi.TYPE_STRING),
+                'shares_offered': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'shares_applied': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'applications_received': openapi.Schema(type=openapi.TYPE_INTEGER),
+            }
+        )
+    ),
+    responses={
+        200: openapi.Response(description="Rows written and overall rate per IPO"),
+        400: openapi.Response(description="Invalid rows; nothing is written"),
+        401: openapi.Response(description="Authentication required"),
+        403: openapi.Response(description="Admin access required"),
+    },
+    operation_description="Upsert subscription figures for many IPOs and categories from JSON or CSV (Admin only)"
+)
+@api_view(['POST'])
+@permission_classes([IsAdminOrReadOnly])
+@parser_classes([JSONParser, SubscriptionCSVParser])
+def bulk_subscriptions(request):
+    """
+    Upsert subscription figures in one transaction.
+    POST /api/ipos/subscriptions/bulk
+    
+    Accepts a JSON list of rows (or {"subscriptions": [...]}) or a text/csv
+    body with the same columns.
+    """
+    rows = request.data
+    if isinstance(rows, dict):
+        rows = rows.get('subscriptions')
+    if not isinstance(rows, list) or not rows:
+        return Response(
+            {'error': 'Expected a non-empty list of subscription rows'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(rows) > settings.SUBSCRIPTION_BULK_MAX_ROWS:
+        return Response(
+            {'error': f'At most {settings.SUBSCRIPTION_BULK_MAX_ROWS} rows per request'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        result = ingest_subscriptions(rows)
+    except SubscriptionIngestError as e:
+        return Response(
+            {'error': str(e), 'rows': e.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response(result)
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('bucket', openapi.IN_QUERY, description=f"Bucket length: {', '.join(BUCKETS)} (default 15m)", type=openapi.TYPE_STRING),
+        openapi.Parameter('category', openapi.IN_QUERY, description="Only this investor category", type=openapi.TYPE_STRING),
+    ],
+    responses={
+        200: openapi.Response(description="Subscription series by category, one point per bucket"),
+        400: openapi.Response(description="Invalid bucket or category"),
+        404: openapi.Response(description="IPO not found"),
+    },
+    operation_description="Get the downsampled subscription history of an IPO"
+)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@cache_response('ipo:{pk}')
+def ipo_subscription_history(request, pk):
+    """
+    Get the subscription curve of an IPO.
+    GET /api/ipos/:id/subscriptions/history?bucket=15m
+    """
+    bucket = request.query_params.get('bucket', '15m')
+    if bucket not in BUCKETS:
+        return Response(
+            {'error': f'bucket must be one of: {", ".join(BUCKETS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    category = request.query_params.get('category')
+    if category and category not in dict(IPOSubscription.CATEGORY_CHOICES):
+        return Response(
+            {'error': 'Invalid category'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if not IPO.objects.filter(pk=pk).exists():
+        return Response(
+            {'error': 'IPO not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    return Response({
+        'ipo': pk,
+        'bucket': bucket,
+        'series': subscription_history(pk, BUCKETS[bucket], category=category),
+    })
+
+
+async def ipo_live(request):
+    """
+    Stream subscription changes as Server-Sent Events.
+    GET /api/ipos/live?ipos=1,2
+    
+    A plain async Django view: it needs the ASGI server, where one
+    connection per client replaces polling the IPO detail endpoint.
+    """
+    if request.method != 'GET':
+        return JsonResponse(
+            {'error': 'Method not allowed'},
+            status=status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+    
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Live updates are served by the ASGI application'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    
+    ipo_ids = None
+    if request.GET.get('ipos'):
+        try:
+            ipo_ids = {int(value) for value in request.GET['ipos'].split(',')}
+        except ValueError:
+            return JsonResponse(
+                {'error': 'ipos must be a comma-separated list of IPO ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    if len(get_broker()) >= settings.LIVE_EVENTS_MAX_CLIENTS:
+        return JsonResponse(
+            {'error': 'Too many live connections, try again later'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    
+    response = StreamingHttpResponse(event_stream(ipo_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 # Document Upload/Download Views as per API specification
 
 @swagger_auto_schema(
@@ -375,7 +663,10 @@ def upload_document(request, pk):
     ],
     responses={
         200: openapi.Response(description="File download"),
+        206: openapi.Response(description="Requested byte range"),
+        304: openapi.Response(description="Not modified"),
         404: openapi.Response(description="Document not found"),
+        416: openapi.Response(description="Range not satisfiable"),
     },
     operation_description="Download RHP/DRHP document"
 )
@@ -419,36 +710,20 @@ def download_document(request, pk):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Log the download
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR', '127.0.0.1')
-    
-    DocumentDownloadLog.objects.create(
-        document=document,
-        ip_address=ip,
-        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        user=request.user if request.user.is_authenticated else None
-    )
-    
-    # Increment download count
-    document.increment_download_count()
-    
-    # Return file response
+    # Build the file response (honours Range and conditional headers)
     try:
-        response = FileResponse(
-            open(document.file.path, 'rb'),
-            content_type='application/pdf' if document.file_extension == '.pdf' else 'application/octet-stream'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{document.original_filename}"'
-        return response
-    except Exception as e:
+        response = serve_document(request, document)
+    except OSError:
         return Response(
             {'error': 'Error serving file'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    
+    # Revalidations and follow-up range requests are not new downloads
+    if counts_as_download(request, response):
+        record_download(request, document)
+    
+    return response
 
 
 @swagger_auto_schema(
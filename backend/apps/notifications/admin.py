@@ -6,7 +6,7 @@ Admin configuration for notifications app
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import AppLinkRequest, SMSTemplate, SMSProvider
+from .models import AppLinkBatch, AppLinkRequest, SMSTemplate, SMSProvider
 
 
 @admin.register(AppLinkRequest)
@@ -23,15 +23,16 @@ class AppLinkRequestAdmin(admin.ModelAdmin):
     ]
     list_filter = ['status', 'provider', 'created_at']
     search_fields = ['phone_number', 'provider_message_id']
-    readonly_fields = ['created_at', 'updated_at', 'sent_at']
+    readonly_fields = ['created_at', 'updated_at', 'sent_at', 'claimed_at']
+    raw_id_fields = ['batch']
     ordering = ['-created_at']
     
     fieldsets = (
         ('Request Details', {
-            'fields': ('phone_number', 'app_link', 'message')
+            'fields': ('phone_number', 'app_link', 'message', 'batch')
         }),
         ('Status', {
-            'fields': ('status', 'error_message')
+            'fields': ('status', 'error_message', 'attempts', 'next_attempt_at', 'claimed_at')
         }),
         ('Provider Details', {
             'fields': ('provider', 'provider_message_id')
@@ -46,6 +47,7 @@ class AppLinkRequestAdmin(admin.ModelAdmin):
         """Display status with color coding"""
         colors = {
             'pending': '#ffc107',
+            'sending': '#fd7e14',
             'sent': '#28a745',
             'failed': '#dc3545',
             'delivered': '#17a2b8'
@@ -66,6 +68,16 @@ class AppLinkRequestAdmin(admin.ModelAdmin):
     view_message.short_description = 'Message'
 
 
+@admin.register(AppLinkBatch)
+class AppLinkBatchAdmin(admin.ModelAdmin):
+    """Admin for app link batches"""
+    
+    list_display = ['id', 'name', 'queued', 'invalid', 'duplicates', 'created_by', 'created_at']
+    search_fields = ['name', 'message']
+    readonly_fields = ['queued', 'invalid', 'duplicates', 'created_by', 'created_at']
+    ordering = ['-created_at']
+
+
 @admin.register(SMSTemplate)
 class SMSTemplateAdmin(admin.ModelAdmin):
     """Admin for SMS templates"""
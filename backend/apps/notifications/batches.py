@@ -0,0 +1,140 @@
+"""
+App Link Batches
+
+Queue one message for many mobile numbers at once, for campaign-style
+blasts. Numbers are normalized in one pass with the same rules as
+SendAppLinkSerializer, deduplicated, and written as pending AppLinkRequest
+rows with bulk_create. The outbox workers then send them through the
+providers' multi-recipient APIs, SMS_BULK_CHUNK_SIZE numbers per request.
+"""
+
+import csv
+import io
+import re
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.parsers import BaseParser
+
+from .models import AppLinkBatch, AppLinkRequest
+from .serializers import INVALID_LENGTH_MESSAGE, INVALID_MOBILE_MESSAGE
+
+NOT_DIGIT_OR_NEWLINE = re.compile(r'[^\d\n]')
+VALID_MOBILE = re.compile(r'(?:91)?[6-9]\d{9}')
+PHONE_COLUMNS = ('phone_number', 'phone', 'mobile', 'mobile_number', 'number')
+
+
+class AppLinkBatchError(Exception):
+    """Raised when a batch has nothing to queue or is too large"""
+
+
+def read_phone_numbers(text):
+    """
+    Phone numbers from CSV text: the phone_number (or phone, mobile, number)
+    column when there is a header row, else the first column.
+    """
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    if not rows:
+        return []
+
+    if any(char.isdigit() for char in rows[0][0]):
+        return [row[0] for row in rows]
+
+    header = [cell.strip().lower() for cell in rows[0]]
+    column = next((header.index(name) for name in PHONE_COLUMNS if name in header), 0)
+    return [row[column] if column < len(row) else '' for row in rows[1:]]
+
+
+class PhoneNumberCSVParser(BaseParser):
+    """
+    Parse a ``text/csv`` request body into a list of phone numbers.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        return read_phone_numbers(stream.read().decode(encoding))
+
+
+def normalize_phone_numbers(values):
+    """
+    Normalize many numbers like normalize_phone_number, in one pass.
+
+    Non-digits are stripped from all values with a single substitution over
+    the joined input instead of per number. Returns (numbers, invalid,
+    duplicates): unique 91-prefixed numbers in input order, a list of
+    {'row', 'value', 'error'} for rejected values (rows count from 1) and
+    the number of repeats skipped.
+    """
+    values = [str(value) for value in values]
+    joined = '\n'.join(value.replace('\n', ' ') for value in values)
+    cleaned = NOT_DIGIT_OR_NEWLINE.sub('', joined).split('\n') if values else []
+
+    numbers = {}
+    invalid = []
+    duplicates = 0
+    for row, digits in enumerate(cleaned, start=1):
+        if VALID_MOBILE.fullmatch(digits):
+            number = digits if len(digits) == 12 else '91' + digits
+            if number in numbers:
+                duplicates += 1
+            else:
+                numbers[number] = None
+            continue
+
+        if len(digits) == 10 or (len(digits) == 12 and digits.startswith('91')):
+            error = INVALID_MOBILE_MESSAGE
+        else:
+            error = INVALID_LENGTH_MESSAGE
+        invalid.append({'row': row, 'value': values[row - 1], 'error': error})
+
+    return list(numbers), invalid, duplicates
+
+
+def queue_app_link_batch(values, message, app_link, name='', user=None):
+    """
+    Validate numbers and queue a pending request for each in one transaction.
+
+    Returns (batch, invalid rows). Raises AppLinkBatchError when there are
+    more than SMS_BULK_MAX_NUMBERS values or none of them is valid.
+    """
+    if len(values) > settings.SMS_BULK_MAX_NUMBERS:
+        raise AppLinkBatchError(f'At most {settings.SMS_BULK_MAX_NUMBERS} numbers per batch')
+
+    numbers, invalid, duplicates = normalize_phone_numbers(values)
+    if not numbers:
+        raise AppLinkBatchError('No valid mobile numbers to send to')
+
+    now = timezone.now()
+    with transaction.atomic():
+        batch = AppLinkBatch.objects.create(
+            name=name,
+            message=message,
+            app_link=app_link,
+            queued=len(numbers),
+            invalid=len(invalid),
+            duplicates=duplicates,
+            created_by=user,
+        )
+        AppLinkRequest.objects.bulk_create([
+            AppLinkRequest(
+                phone_number=number,
+                message=message,
+                app_link=app_link,
+                status='pending',
+                next_attempt_at=now,
+                batch=batch,
+            )
+            for number in numbers
+        ], batch_size=1000)
+
+    return batch, invalid
+
+
+def batch_status_counts(batch):
+    """Number of the batch's requests in each status"""
+    counts = dict.fromkeys(('pending', 'sending', 'sent', 'failed', 'delivered'), 0)
+    rows = batch.requests.order_by().values_list('status').annotate(count=Count('id'))
+    counts.update(dict(rows))
+    return counts
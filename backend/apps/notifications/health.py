@@ -0,0 +1,132 @@
+"""
+SMS Provider Health
+
+Each provider keeps a rolling window of recent send outcomes, from which
+its error rate and p95 latency are read, and a circuit breaker:
+
+- closed: messages are sent; once the window holds SMS_CIRCUIT_MIN_REQUESTS
+  outcomes and the share of failures reaches SMS_CIRCUIT_ERROR_RATE the
+  circuit opens. Sends slower than SMS_CIRCUIT_SLOW_CALL seconds count as
+  failures, so a provider that is timing out is cut off even before its
+  timeouts turn into errors.
+- open: the provider is skipped for SMS_CIRCUIT_COOLDOWN seconds.
+- half-open: one message is let through as a probe; success closes the
+  circuit, failure opens it again.
+
+SMSService routes each message to the healthy provider with the lowest p95
+latency, rounded to SMS_ROUTING_LATENCY_STEP so small differences fall back
+to the configured priority.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderHealth:
+    """Rolling outcomes and circuit state of one provider"""
+
+    def __init__(self, name, clock=time.monotonic):
+        self.name = name
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = None
+        self.window_seconds = settings.SMS_HEALTH_WINDOW_SECONDS
+        self.min_requests = settings.SMS_CIRCUIT_MIN_REQUESTS
+        self.error_rate_threshold = settings.SMS_CIRCUIT_ERROR_RATE
+        self.slow_call = settings.SMS_CIRCUIT_SLOW_CALL
+        self.cooldown = settings.SMS_CIRCUIT_COOLDOWN
+        self._outcomes = deque(maxlen=settings.SMS_HEALTH_WINDOW_SIZE)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now):
+        if self.state != OPEN:
+            logger.warning(f"SMS provider {self.name} circuit opened")
+        self.state = OPEN
+        self.opened_at = now
+        self._probing = False
+        self._outcomes.clear()
+
+    def allow(self):
+        """
+        Whether a message may be sent through the provider now. In
+        half-open state only the first caller gets the probe.
+        """
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+                return True
+            return self.state == CLOSED
+
+    def record(self, success, latency):
+        """Record the outcome of one send that allow() let through"""
+        with self._lock:
+            now = self.clock()
+            failed = not success or latency >= self.slow_call
+
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open(now)
+                    return
+                logger.info(f"SMS provider {self.name} circuit closed")
+                self.state = CLOSED
+                self._probing = False
+
+            self._expire(now)
+            self._outcomes.append((now, failed, latency))
+            if self.state == CLOSED and len(self._outcomes) >= self.min_requests:
+                if self._error_rate() >= self.error_rate_threshold:
+                    self._open(now)
+
+    def _error_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return sum(1 for _, failed, _ in self._outcomes if failed) / len(self._outcomes)
+
+    def _p95(self):
+        if not self._outcomes:
+            return None
+        latencies = sorted(latency for _, _, latency in self._outcomes)
+        return latencies[max(math.ceil(len(latencies) * 0.95) - 1, 0)]
+
+    def routing_latency(self):
+        """
+        p95 latency in SMS_ROUTING_LATENCY_STEP milliseconds; 0 while the
+        provider has no recent outcomes, so it gets tried and measured.
+        """
+        with self._lock:
+            self._expire(self.clock())
+            p95 = self._p95()
+        if p95 is None:
+            return 0
+        return int(p95 * 1000 // settings.SMS_ROUTING_LATENCY_STEP)
+
+    def snapshot(self):
+        with self._lock:
+            self._expire(self.clock())
+            p95 = self._p95()
+            return {
+                'provider': self.name,
+                'state': self.state,
+                'requests': len(self._outcomes),
+                'error_rate': round(self._error_rate(), 3),
+                'p95_ms': round(p95 * 1000, 1) if p95 is not None else None,
+            }
@@ -0,0 +1,101 @@
+"""
+Benchmark SMS provider calls against a local stub provider: a fresh
+connection per message (the old module-level requests calls) against the
+pooled keep-alive sessions of a long-lived SMSService.
+
+Nothing is sent to a real provider and nothing is written to the database.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from apps.notifications.services import SMSService
+from apps.notifications.stubs import StubProviderServer
+
+
+class Command(BaseCommand):
+    help = 'Compare per-message SMS provider latency with and without pooled sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=500,
+            help='Messages sent per measurement',
+        )
+        parser.add_argument(
+            '--provider',
+            choices=['textlocal', 'msg91'],
+            default='textlocal',
+            help='Request format the stub answers',
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=0,
+            help='Latency the stub adds to every response',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Concurrent senders for the pooled concurrent run',
+        )
+        parser.add_argument(
+            '--no-tls',
+            action='store_true',
+            help='Serve plain HTTP (hides the TLS handshake that pooling saves)',
+        )
+
+    def handle(self, *args, **options):
+        messages = options['messages']
+
+        with StubProviderServer(latency=options['latency_ms'] / 1000, tls=not options['no_tls']) as stub:
+            providers = [stub.provider(options['provider'])]
+
+            def fresh(index):
+                # What every message used to cost: new service, new connection
+                service = SMSService(providers)
+                try:
+                    return service.send_sms('919876543210', 'Benchmark', index)
+                finally:
+                    service.close()
+
+            pooled_service = SMSService(providers)
+
+            def pooled(index):
+                return pooled_service.send_sms('919876543210', 'Benchmark', index)
+
+            self.stdout.write(
+                f'{messages} messages to a local {options["provider"]} stub over '
+                f'{"HTTP" if options["no_tls"] else "HTTPS"}, {options["latency_ms"]:g}ms added latency'
+            )
+            self.stdout.write(f'{"mode":<22} {"mean":>9} {"p95":>9} {"msg/s":>9} {"connections":>12}')
+            # Open the pooled connection up front, as a running worker would have
+            pooled(0)
+            stub.counts['connections'] = 0
+            self._run('per-message', fresh, messages, 1, stub)
+            self._run('pooled', pooled, messages, 1, stub)
+            self._run(f'pooled x{options["workers"]}', pooled, messages, options['workers'], stub)
+            pooled_service.close()
+
+    def _run(self, label, send, messages, workers, stub):
+        connections = stub.counts['connections']
+
+        def timed(index):
+            started = time.perf_counter()
+            result = send(index)
+            if not result['success']:
+                raise RuntimeError(result.get('error'))
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies = sorted(pool.map(timed, range(messages)))
+        elapsed = time.perf_counter() - started
+
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:<22} {statistics.mean(latencies):>7.2f}ms {p95:>7.2f}ms '
+            f'{messages / elapsed:>9.0f} {stub.counts["connections"] - connections:>12}'
+        )
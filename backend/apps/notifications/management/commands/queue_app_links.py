@@ -0,0 +1,72 @@
+"""
+Queue an app link SMS for every mobile number in CSV files.
+
+Each file becomes one AppLinkBatch; the send_app_links workers send it
+through the providers' multi-recipient APIs.
+"""
+import sys
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from apps.notifications.batches import AppLinkBatchError, queue_app_link_batch, read_phone_numbers
+from apps.notifications.serializers import SendAppLinkBatchSerializer
+
+
+class Command(BaseCommand):
+    help = 'Queue app link SMS requests for the numbers in CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='+',
+            help='CSV files of numbers (phone_number column or first column); "-" reads standard input',
+        )
+        parser.add_argument(
+            '--message',
+            help='SMS text (default: the app download message)',
+        )
+        parser.add_argument(
+            '--app-link',
+            help='App download link (default: the Play Store listing)',
+        )
+        parser.add_argument(
+            '--name',
+            default='',
+            help='Campaign name shown in the admin',
+        )
+
+    def handle(self, *args, **options):
+        serializer = SendAppLinkBatchSerializer(data={
+            key: value for key, value in (
+                ('message', options['message']),
+                ('app_link', options['app_link']),
+                ('name', options['name']),
+            ) if value
+        })
+        if not serializer.is_valid():
+            raise CommandError(f'Invalid options: {serializer.errors}')
+
+        for path in options['paths']:
+            if path == '-':
+                text = sys.stdin.read()
+            else:
+                try:
+                    text = Path(path).read_text(encoding='utf-8-sig')
+                except OSError as e:
+                    raise CommandError(f'Cannot read {path}: {str(e)}')
+
+            try:
+                batch, invalid = queue_app_link_batch(
+                    read_phone_numbers(text),
+                    message=serializer.validated_data['message'],
+                    app_link=serializer.validated_data['app_link'],
+                    name=serializer.validated_data.get('name') or ('' if path == '-' else Path(path).stem),
+                )
+            except AppLinkBatchError as e:
+                raise CommandError(f'{path}: {str(e)}')
+
+            for row in invalid[:20]:
+                self.stderr.write(f'  row {row["row"]}: {row["value"]!r} {row["error"]}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: batch {batch.id} queued {batch.queued} numbers '
+                f'({batch.invalid} invalid, {batch.duplicates} duplicates)'
+            ))
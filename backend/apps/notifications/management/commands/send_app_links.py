@@ -0,0 +1,50 @@
+"""
+Send queued app link SMS requests from the outbox.
+
+Several workers may run at once; each claims its own rows.
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.notifications.outbox import process_outbox
+from apps.notifications.services import get_sms_service
+
+
+class Command(BaseCommand):
+    help = 'Send pending app link SMS requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Requests claimed per batch (default SMS_OUTBOX_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Concurrent sends (default SMS_OUTBOX_WORKERS)',
+        )
+        parser.add_argument(
+            '--loop',
+            type=int,
+            default=0,
+            help='Keep running and drain the outbox every N seconds',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['loop']
+        while True:
+            counts = process_outbox(batch_size=options['batch_size'], workers=options['workers'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Sent {counts["sent"]} app links, {counts["retry"]} to retry, {counts["failed"]} failed'
+            ))
+            if options['verbosity'] >= 2:
+                for health in get_sms_service().health_snapshot():
+                    self.stdout.write(
+                        f'  {health["provider"]}: {health["state"]}, {health["requests"]} recent sends, '
+                        f'{health["error_rate"]:.0%} failed, p95 {health["p95_ms"]}ms'
+                    )
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:30
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applinkrequest',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Delivery attempts so far'),
+        ),
+        migrations.AddField(
+            model_name='applinkrequest',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a worker claimed it for sending', null=True),
+        ),
+        migrations.AddField(
+            model_name='applinkrequest',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time a worker may send it'),
+        ),
+        migrations.AlterField(
+            model_name='applinkrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('delivered', 'Delivered')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='applinkrequest',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='app_link_outbox_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notifications', '0002_app_link_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppLinkBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, help_text='Campaign name', max_length=100)),
+                ('message', models.TextField(help_text='SMS message content')),
+                ('app_link', models.URLField(help_text='App download link')),
+                ('queued', models.PositiveIntegerField(default=0, help_text='Requests queued')),
+                ('invalid', models.PositiveIntegerField(default=0, help_text='Numbers rejected as invalid')),
+                ('duplicates', models.PositiveIntegerField(default=0, help_text='Repeated numbers skipped')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='app_link_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'app_link_batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='applinkrequest',
+            name='batch',
+            field=models.ForeignKey(blank=True, help_text='Campaign the request was queued by', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='requests', to='notifications.applinkbatch'),
+        ),
+    ]
@@ -4,10 +4,37 @@ Notifications Models
 Models for handling SMS notifications and app link requests
 """
 
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
 
+class AppLinkBatch(models.Model):
+    """Model for a campaign sending one message to many mobile numbers"""
+    
+    name = models.CharField(max_length=100, blank=True, help_text="Campaign name")
+    message = models.TextField(help_text="SMS message content")
+    app_link = models.URLField(help_text="App download link")
+    queued = models.PositiveIntegerField(default=0, help_text="Requests queued")
+    invalid = models.PositiveIntegerField(default=0, help_text="Numbers rejected as invalid")
+    duplicates = models.PositiveIntegerField(default=0, help_text="Repeated numbers skipped")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='app_link_batches'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'app_link_batches'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"App link batch {self.name or self.id} - {self.queued} numbers"
+
+
 class AppLinkRequest(models.Model):
     """Model to track app link requests sent to mobile numbers"""
     
@@ -18,6 +45,7 @@ class AppLinkRequest(models.Model):
         max_length=20,
         choices=[
             ('pending', 'Pending'),
+            ('sending', 'Sending'),
             ('sent', 'Sent'),
             ('failed', 'Failed'),
             ('delivered', 'Delivered'),
@@ -33,6 +61,19 @@ class AppLinkRequest(models.Model):
     provider = models.CharField(max_length=50, blank=True, help_text="SMS provider used")
     provider_message_id = models.CharField(max_length=100, blank=True, help_text="Provider's message ID")
     
+    # Outbox delivery state (see apps.notifications.outbox)
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Delivery attempts so far")
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="Earliest time a worker may send it")
+    claimed_at = models.DateTimeField(null=True, blank=True, help_text="When a worker claimed it for sending")
+    batch = models.ForeignKey(
+        AppLinkBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='requests',
+        help_text="Campaign the request was queued by"
+    )
+    
     class Meta:
         db_table = 'app_link_requests'
         ordering = ['-created_at']
@@ -40,6 +81,7 @@ class AppLinkRequest(models.Model):
             models.Index(fields=['phone_number']),
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'next_attempt_at'], name='app_link_outbox_idx'),
         ]
     
     def __str__(self):
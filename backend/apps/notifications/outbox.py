@@ -0,0 +1,196 @@
+"""
+SMS Outbox
+
+App link requests are stored as pending AppLinkRequest rows and sent by
+workers (``manage.py send_app_links``) instead of inside the request, so a
+slow provider no longer holds a web worker for its whole timeout.
+
+A worker claims due rows with ``select_for_update(skip_locked=True)``, so
+any number of workers can drain the outbox without sending a message
+twice, marks them ``sending`` and sends them concurrently from a thread
+pool. Failed sends are retried with a doubling delay up to
+SMS_OUTBOX_MAX_ATTEMPTS; a claim left behind by a worker that died is
+released after SMS_OUTBOX_CLAIM_TIMEOUT.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, CharField, F, Value, When
+from django.utils import timezone
+
+from .models import AppLinkRequest
+from .services import get_sms_service
+
+logger = logging.getLogger(__name__)
+
+
+def release_stale_claims(now=None):
+    """Return requests claimed longer than SMS_OUTBOX_CLAIM_TIMEOUT ago to pending."""
+    now = now or timezone.now()
+    return AppLinkRequest.objects.filter(
+        status='sending',
+        claimed_at__lt=now - timedelta(seconds=settings.SMS_OUTBOX_CLAIM_TIMEOUT),
+    ).update(status='pending', next_attempt_at=now, updated_at=now)
+
+
+def claim_batch(limit, now=None):
+    """
+    Claim up to ``limit`` due pending requests for this worker.
+
+    Single send-app-link requests are claimed before batch rows, so a
+    queued campaign never delays a user waiting for their link. Rows
+    locked by another worker's claim are skipped rather than waited on.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        due = (
+            AppLinkRequest.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+        )
+        ids = list(due.filter(batch__isnull=True).values_list('id', flat=True)[:limit])
+        if len(ids) < limit:
+            ids += due.filter(batch__isnull=False).values_list('id', flat=True)[:limit - len(ids)]
+        if not ids:
+            return []
+        AppLinkRequest.objects.filter(id__in=ids).update(
+            status='sending', claimed_at=now, attempts=F('attempts') + 1, updated_at=now
+        )
+    return list(AppLinkRequest.objects.filter(id__in=ids).order_by('id'))
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt after ``attempts`` failures."""
+    return settings.SMS_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def record_results(pairs, now=None):
+    """
+    Store the outcomes of sent (request, result) pairs with one UPDATE per
+    group of equal outcomes rather than one per request. Returns each
+    pair's outcome: 'sent', 'retry' or 'failed'.
+
+    Only rows still held by the claim that sent them are updated, so a
+    worker whose claim went stale and was taken over cannot overwrite a
+    later result.
+    """
+    now = now or timezone.now()
+    outcomes = []
+    groups = {}
+    for item, result in pairs:
+        error = result.get('error', 'Unknown error')
+        if result['success']:
+            key = ('sent', item.claimed_at, result.get('provider') or '')
+        elif item.attempts < settings.SMS_OUTBOX_MAX_ATTEMPTS:
+            key = ('retry', item.claimed_at, item.attempts, error)
+        else:
+            key = ('failed', item.claimed_at, error)
+        groups.setdefault(key, []).append((item, result))
+        outcomes.append(key[0])
+
+    for key, group in groups.items():
+        claim = AppLinkRequest.objects.filter(
+            id__in=[item.id for item, _ in group], status='sending', claimed_at=key[1]
+        )
+        if key[0] == 'sent':
+            message_ids = {item.id: result.get('message_id') or '' for item, result in group}
+            if len(set(message_ids.values())) == 1:
+                message_id = next(iter(message_ids.values()))
+            else:
+                message_id = Case(
+                    *[When(id=pk, then=Value(value)) for pk, value in message_ids.items()],
+                    output_field=CharField(),
+                )
+            claim.update(
+                status='sent',
+                sent_at=now,
+                provider=key[2],
+                provider_message_id=message_id,
+                error_message='',
+                updated_at=now,
+            )
+        elif key[0] == 'retry':
+            claim.update(
+                status='pending',
+                next_attempt_at=now + timedelta(seconds=retry_delay(key[2])),
+                error_message=key[3],
+                updated_at=now,
+            )
+        else:
+            claim.update(status='failed', error_message=key[2], updated_at=now)
+
+    return outcomes
+
+
+def group_by_message(items, chunk_size):
+    """
+    Split claimed requests into chunks of up to ``chunk_size`` sharing a
+    message, so each chunk can go out as one multi-recipient request.
+    """
+    groups = {}
+    for item in items:
+        groups.setdefault(item.message, []).append(item)
+    for group in groups.values():
+        for start in range(0, len(group), chunk_size):
+            yield group[start:start + chunk_size]
+
+
+def _send(sms_service, items):
+    """Send a chunk of requests; returns [(request, result)]"""
+    try:
+        if len(items) == 1:
+            result = sms_service.send_sms(
+                phone_number=items[0].phone_number,
+                message=items[0].message,
+                request_id=items[0].id,
+            )
+            return [(items[0], result)]
+
+        results = sms_service.send_bulk_sms([item.phone_number for item in items], items[0].message)
+        return [(item, results[item.phone_number]) for item in items]
+    except Exception as e:
+        return [(item, {'success': False, 'error': str(e), 'provider': None}) for item in items]
+
+
+def process_outbox(batch_size=None, workers=None, sms_service=None):
+    """
+    Send every due request, one claimed batch at a time.
+
+    Requests sharing a message are sent together, SMS_BULK_CHUNK_SIZE per
+    provider request. Sends run on a thread pool; results are written from
+    the calling thread, so pool threads never open database connections.
+    Returns counts of 'sent', 'retry' and 'failed' outcomes.
+    """
+    batch_size = batch_size or settings.SMS_OUTBOX_BATCH_SIZE
+    workers = workers or settings.SMS_OUTBOX_WORKERS
+    sms_service = sms_service or get_sms_service()
+    counts = {'sent': 0, 'retry': 0, 'failed': 0}
+
+    release_stale_claims()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sms-outbox') as pool:
+        while True:
+            batch = claim_batch(batch_size)
+            if not batch:
+                break
+
+            futures = [
+                pool.submit(_send, sms_service, chunk)
+                for chunk in group_by_message(batch, settings.SMS_BULK_CHUNK_SIZE)
+            ]
+            for future in as_completed(futures):
+                pairs = future.result()
+                try:
+                    outcomes = record_results(pairs)
+                except Exception as e:
+                    # Leave the claims for release_stale_claims to retry
+                    logger.error(f"Error recording SMS results for {len(pairs)} requests: {str(e)}")
+                    continue
+                for (item, result), outcome in zip(pairs, outcomes):
+                    counts[outcome] += 1
+                    if outcome != 'sent':
+                        logger.warning(f"App link request {item.id} not sent ({outcome}): {result.get('error')}")
+
+    return counts
@@ -6,7 +6,37 @@ Serializers for handling app link requests and SMS notifications
 
 from rest_framework import serializers
 import re
-from .models import AppLinkRequest, SMSTemplate
+from .models import AppLinkBatch, AppLinkRequest, SMSTemplate
+
+NON_DIGITS = re.compile(r'\D')
+INDIAN_MOBILE = re.compile(r'^91[6-9]\d{9}$')
+INVALID_LENGTH_MESSAGE = "Please enter a valid 10-digit mobile number"
+INVALID_MOBILE_MESSAGE = "Please enter a valid Indian mobile number"
+
+DEFAULT_APP_LINK = 'https://play.google.com/store/apps/details?id=in.bluestock.app'
+DEFAULT_MESSAGE = "Download the Bluestock App and start your investment journey today! {app_link}"
+
+
+def normalize_phone_number(value):
+    """Return an Indian mobile number with its 91 country code, or raise ValidationError"""
+    # Remove any non-digit characters
+    cleaned_number = NON_DIGITS.sub('', value)
+    
+    # Check if it's a valid Indian mobile number
+    if len(cleaned_number) == 10:
+        # Add country code
+        cleaned_number = '91' + cleaned_number
+    elif len(cleaned_number) == 12 and cleaned_number.startswith('91'):
+        # Already has country code
+        pass
+    else:
+        raise serializers.ValidationError(INVALID_LENGTH_MESSAGE)
+    
+    # Validate Indian mobile number pattern
+    if not INDIAN_MOBILE.match(cleaned_number):
+        raise serializers.ValidationError(INVALID_MOBILE_MESSAGE)
+    
+    return cleaned_number
 
 
 class AppLinkRequestSerializer(serializers.ModelSerializer):
@@ -14,29 +44,12 @@ class AppLinkRequestSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AppLinkRequest
-        fields = ['id', 'phone_number', 'message', 'app_link', 'status', 'created_at', 'sent_at']
-        read_only_fields = ['id', 'status', 'created_at', 'sent_at']
+        fields = ['id', 'phone_number', 'message', 'app_link', 'status', 'attempts', 'created_at', 'sent_at']
+        read_only_fields = ['id', 'status', 'attempts', 'created_at', 'sent_at']
     
     def validate_phone_number(self, value):
         """Validate phone number format"""
-        # Remove any non-digit characters
-        cleaned_number = re.sub(r'\D', '', value)
-        
-        # Check if it's a valid Indian mobile number
-        if len(cleaned_number) == 10:
-            # Add country code
-            cleaned_number = '91' + cleaned_number
-        elif len(cleaned_number) == 12 and cleaned_number.startswith('91'):
-            # Already has country code
-            pass
-        else:
-            raise serializers.ValidationError("Please enter a valid 10-digit mobile number")
-        
-        # Validate Indian mobile number pattern
-        if not re.match(r'^91[6-9]\d{9}$', cleaned_number):
-            raise serializers.ValidationError("Please enter a valid Indian mobile number")
-        
-        return cleaned_number
+        return normalize_phone_number(value)
 
 
 class SendAppLinkSerializer(serializers.Serializer):
@@ -48,38 +61,37 @@ class SendAppLinkSerializer(serializers.Serializer):
     
     def validate_phone_number(self, value):
         """Validate phone number format"""
-        # Remove any non-digit characters
-        cleaned_number = re.sub(r'\D', '', value)
-        
-        # Check if it's a valid Indian mobile number
-        if len(cleaned_number) == 10:
-            # Add country code
-            cleaned_number = '91' + cleaned_number
-        elif len(cleaned_number) == 12 and cleaned_number.startswith('91'):
-            # Already has country code
-            pass
-        else:
-            raise serializers.ValidationError("Please enter a valid 10-digit mobile number")
-        
-        # Validate Indian mobile number pattern
-        if not re.match(r'^91[6-9]\d{9}$', cleaned_number):
-            raise serializers.ValidationError("Please enter a valid Indian mobile number")
-        
-        return cleaned_number
+        return normalize_phone_number(value)
     
     def validate(self, attrs):
         """Validate the entire payload"""
         # Set default app link if not provided
         if not attrs.get('app_link'):
-            attrs['app_link'] = 'https://play.google.com/store/apps/details?id=in.bluestock.app'
+            attrs['app_link'] = DEFAULT_APP_LINK
         
         # Set default message if not provided
         if not attrs.get('message'):
-            attrs['message'] = f"Download the Bluestock App and start your investment journey today! {attrs['app_link']}"
+            attrs['message'] = DEFAULT_MESSAGE.format(app_link=attrs['app_link'])
         
         return attrs
 
 
+class SendAppLinkBatchSerializer(SendAppLinkSerializer):
+    """Serializer for the message of a batch of app link requests"""
+    
+    phone_number = None
+    name = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class AppLinkBatchSerializer(serializers.ModelSerializer):
+    """Serializer for app link batches"""
+    
+    class Meta:
+        model = AppLinkBatch
+        fields = ['id', 'name', 'message', 'app_link', 'queued', 'invalid', 'duplicates', 'created_at']
+        read_only_fields = fields
+
+
 class SMSTemplateSerializer(serializers.ModelSerializer):
     """Serializer for SMS templates"""
     
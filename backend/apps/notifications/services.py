@@ -6,26 +6,108 @@ Service for sending SMS notifications through various providers
 
 import requests
 import logging
+import threading
+import time
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 from typing import Dict, Any
+from urllib3.util.retry import Retry
+
+from .health import ProviderHealth
 
 logger = logging.getLogger(__name__)
 
+TEXTLOCAL_URL = 'https://api.textlocal.in/send/'
+MSG91_URL = 'https://api.msg91.com/api/sendhttp.php'
+
+
+def build_session(pool_size=None, connect_retries=None) -> requests.Session:
+    """
+    Build a Session that keeps connections to a provider alive.
+
+    Only failures to connect are retried: once a request has reached the
+    provider, sending it again could deliver the SMS twice.
+    """
+    pool_size = pool_size or settings.SMS_HTTP_POOL_SIZE
+    if connect_retries is None:
+        connect_retries = settings.SMS_HTTP_CONNECT_RETRIES
+
+    retry = Retry(
+        total=connect_retries,
+        connect=connect_retries,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=0.2,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 
 class SMSService:
     """Service for sending SMS notifications"""
     
-    def __init__(self):
-        self.providers = self._get_available_providers()
+    def __init__(self, providers: list = None):
+        self.providers = self._get_available_providers(providers)
+        self.timeout = (settings.SMS_HTTP_CONNECT_TIMEOUT, settings.SMS_HTTP_READ_TIMEOUT)
+        self._sessions = {}
+        self._twilio_clients = {}
+        self._lock = threading.Lock()
+        self.health = {
+            provider['name'].lower(): ProviderHealth(provider['name'].lower())
+            for provider in self.providers
+        }
+    
+    def route(self) -> list:
+        """Active providers, lowest p95 latency first, then by priority"""
+        ranked = [
+            (self.health[provider['name'].lower()].routing_latency(), index, provider)
+            for index, provider in enumerate(self.providers)
+            if provider.get('active', True)
+        ]
+        return [provider for _, _, provider in sorted(ranked, key=lambda x: x[:2])]
+    
+    def health_snapshot(self) -> list:
+        """Circuit state, error rate and p95 latency of each provider"""
+        return [health.snapshot() for health in self.health.values()]
     
-    def _get_available_providers(self) -> list:
+    def session(self, provider: dict) -> requests.Session:
+        """Pooled session of a provider, shared by every thread sending through it"""
+        name = provider['name'].lower()
+        with self._lock:
+            if name not in self._sessions:
+                self._sessions[name] = build_session()
+            return self._sessions[name]
+    
+    def twilio_client(self, account_sid: str, auth_token: str):
+        """Twilio client per account; it keeps its own pooled session"""
+        from twilio.rest import Client
+        
+        with self._lock:
+            key = (account_sid, auth_token)
+            if key not in self._twilio_clients:
+                self._twilio_clients[key] = Client(account_sid, auth_token)
+            return self._twilio_clients[key]
+    
+    def close(self):
+        """Close pooled provider connections"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._twilio_clients.clear()
+    
+    def _get_available_providers(self, providers: list = None) -> list:
         """Get list of available SMS providers"""
-        providers = []
         
-        # Add providers based on settings
-        if hasattr(settings, 'SMS_PROVIDERS'):
+        # Add providers based on settings unless given explicitly
+        if providers is None and hasattr(settings, 'SMS_PROVIDERS'):
             providers = settings.SMS_PROVIDERS
-        else:
+        elif providers is None:
             # Default mock provider for development
             providers = [{
                 'name': 'mock',
@@ -37,7 +119,7 @@ class SMSService:
     
     def send_sms(self, phone_number: str, message: str, request_id: int = None) -> Dict[str, Any]:
         """
-        Send SMS using the first available provider
+        Send SMS using the fastest healthy provider, falling back to the others
         
         Args:
             phone_number: Mobile number to send SMS to
@@ -48,27 +130,118 @@ class SMSService:
             Dict with success status and details
         """
         
-        # Try each provider in priority order
-        for provider in self.providers:
-            if not provider.get('active', True):
+        return self._send_with_failover(
+            lambda provider: self._send_via_provider(provider, phone_number, message, request_id)
+        )
+    
+    def send_bulk_sms(self, phone_numbers: list, message: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Send one message to many numbers through multi-recipient provider APIs
+        
+        Numbers go out in chunks of SMS_BULK_CHUNK_SIZE, one provider request
+        per chunk, failing over between providers chunk by chunk.
+        
+        Returns:
+            Dict mapping each number to a send_sms-style result
+        """
+        
+        phone_numbers = list(dict.fromkeys(phone_numbers))
+        results = {}
+        chunk_size = settings.SMS_BULK_CHUNK_SIZE
+        
+        for start in range(0, len(phone_numbers), chunk_size):
+            chunk = phone_numbers[start:start + chunk_size]
+            result = self._send_with_failover(
+                lambda provider: self._send_bulk_via_provider(provider, chunk, message),
+                messages=len(chunk)
+            )
+            
+            for number in chunk:
+                if not result['success']:
+                    results[number] = result
+                elif number in result['rejected']:
+                    results[number] = {
+                        'success': False,
+                        'error': result['rejected'][number],
+                        'provider': result['provider']
+                    }
+                else:
+                    results[number] = {
+                        'success': True,
+                        'message_id': result['message_ids'].get(number),
+                        'provider': result['provider']
+                    }
+        
+        return results
+    
+    def _send_with_failover(self, send, messages: int = 1) -> Dict[str, Any]:
+        """
+        Call send(provider) on each provider whose circuit lets it through until one succeeds
+        
+        A call sending ``messages`` messages is recorded with its latency per
+        message, so bulk chunks neither trip the slow-call limit nor skew the
+        p95 that single messages are routed on.
+        """
+        
+        attempted = False
+        
+        for provider in self.route():
+            health = self.health[provider['name'].lower()]
+            if not health.allow():
                 continue
             
+            attempted = True
+            started = time.monotonic()
             try:
-                result = self._send_via_provider(provider, phone_number, message, request_id)
-                if result['success']:
-                    return result
-                else:
-                    logger.warning(f"Provider {provider['name']} failed: {result.get('error')}")
+                result = send(provider)
             except Exception as e:
                 logger.error(f"Error with provider {provider['name']}: {str(e)}")
-                continue
+                result = {'success': False, 'error': str(e), 'provider': provider['name']}
+            health.record(result['success'], (time.monotonic() - started) / messages)
+            
+            if result['success']:
+                return result
+            logger.warning(f"Provider {provider['name']} failed: {result.get('error')}")
         
         return {
             'success': False,
-            'error': 'All SMS providers failed',
+            'error': 'All SMS providers failed' if attempted else 'No SMS provider available',
             'provider': None
         }
     
+    def _send_bulk_via_provider(self, provider: dict, phone_numbers: list, message: str) -> Dict[str, Any]:
+        """Send one message to several numbers via a specific provider"""
+        
+        provider_name = provider['name'].lower()
+        
+        if provider_name == 'textlocal':
+            return self._send_bulk_via_textlocal(provider, phone_numbers, message)
+        elif provider_name == 'msg91':
+            return self._send_bulk_via_msg91(provider, phone_numbers, message)
+        
+        # No multi-recipient API: one request per number
+        message_ids = {}
+        rejected = {}
+        for number in phone_numbers:
+            result = self._send_via_provider(provider, number, message)
+            if result['success']:
+                message_ids[number] = result.get('message_id')
+            else:
+                rejected[number] = result.get('error', 'Unknown error')
+        
+        if not message_ids:
+            return {
+                'success': False,
+                'error': next(iter(rejected.values()), 'No numbers to send to'),
+                'provider': provider_name
+            }
+        return {
+            'success': True,
+            'message_ids': message_ids,
+            'rejected': rejected,
+            'provider': provider_name
+        }
+    
     def _send_via_provider(self, provider: dict, phone_number: str, message: str, request_id: int = None) -> Dict[str, Any]:
         """Send SMS via specific provider"""
         
@@ -113,8 +286,6 @@ class SMSService:
         """Send SMS via Twilio"""
         
         try:
-            from twilio.rest import Client
-            
             account_sid = provider.get('account_sid')
             auth_token = provider.get('auth_token')
             from_number = provider.get('from_number')
@@ -126,7 +297,7 @@ class SMSService:
                     'provider': 'twilio'
                 }
             
-            client = Client(account_sid, auth_token)
+            client = self.twilio_client(account_sid, auth_token)
             
             # Format phone number for Twilio
             to_number = f"+{phone_number}"
@@ -165,7 +336,7 @@ class SMSService:
                     'provider': 'textlocal'
                 }
             
-            url = 'https://api.textlocal.in/send/'
+            url = provider.get('api_url', TEXTLOCAL_URL)
             
             data = {
                 'apikey': api_key,
@@ -174,7 +345,9 @@ class SMSService:
                 'sender': sender
             }
             
-            response = requests.post(url, data=data, timeout=30)
+            response = self.session(provider).post(
+                url, data=data, timeout=self.timeout, verify=provider.get('verify', True)
+            )
             response.raise_for_status()
             
             result = response.json()
@@ -215,7 +388,7 @@ class SMSService:
                     'provider': 'msg91'
                 }
             
-            url = 'https://api.msg91.com/api/sendhttp.php'
+            url = provider.get('api_url', MSG91_URL)
             
             params = {
                 'authkey': auth_key,
@@ -226,7 +399,9 @@ class SMSService:
                 'response': 'json'
             }
             
-            response = requests.get(url, params=params, timeout=30)
+            response = self.session(provider).get(
+                url, params=params, timeout=self.timeout, verify=provider.get('verify', True)
+            )
             response.raise_for_status()
             
             result = response.json()
@@ -250,4 +425,129 @@ class SMSService:
                 'success': False,
                 'error': f'MSG91 error: {str(e)}',
                 'provider': 'msg91'
-            }
\ No newline at end of file
+            }
+    
+    def _send_bulk_via_textlocal(self, provider: dict, phone_numbers: list, message: str) -> Dict[str, Any]:
+        """Send one SMS to several numbers in a single TextLocal request"""
+        
+        try:
+            api_key = provider.get('api_key')
+            if not api_key:
+                return {
+                    'success': False,
+                    'error': 'Missing TextLocal API key',
+                    'provider': 'textlocal'
+                }
+            
+            data = {
+                'apikey': api_key,
+                'numbers': ','.join(phone_numbers),
+                'message': message,
+                'sender': provider.get('sender', 'BLUESTOCK')
+            }
+            
+            response = self.session(provider).post(
+                provider.get('api_url', TEXTLOCAL_URL),
+                data=data, timeout=self.timeout, verify=provider.get('verify', True)
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            
+            if result.get('status') != 'success':
+                return {
+                    'success': False,
+                    'error': result.get('errors', [{}])[0].get('message', 'Unknown TextLocal error'),
+                    'provider': 'textlocal'
+                }
+            
+            return {
+                'success': True,
+                'message_ids': {
+                    str(item.get('recipient')): item.get('id') for item in result.get('messages', [])
+                },
+                'rejected': {},
+                'provider': 'textlocal'
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'TextLocal error: {str(e)}',
+                'provider': 'textlocal'
+            }
+    
+    def _send_bulk_via_msg91(self, provider: dict, phone_numbers: list, message: str) -> Dict[str, Any]:
+        """Send one SMS to several numbers in a single MSG91 request"""
+        
+        try:
+            auth_key = provider.get('auth_key')
+            if not auth_key:
+                return {
+                    'success': False,
+                    'error': 'Missing MSG91 auth key',
+                    'provider': 'msg91'
+                }
+            
+            params = {
+                'authkey': auth_key,
+                'mobiles': ','.join(phone_numbers),
+                'message': message,
+                'sender': provider.get('sender_id', 'BLUESTOCK'),
+                'route': provider.get('route', '4'),
+                'response': 'json'
+            }
+            
+            response = self.session(provider).get(
+                provider.get('api_url', MSG91_URL),
+                params=params, timeout=self.timeout, verify=provider.get('verify', True)
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            
+            if result.get('type') != 'success':
+                return {
+                    'success': False,
+                    'error': result.get('message', 'Unknown MSG91 error'),
+                    'provider': 'msg91'
+                }
+            
+            # MSG91 returns one request ID for all recipients
+            return {
+                'success': True,
+                'message_ids': dict.fromkeys(phone_numbers, result.get('message')),
+                'rejected': {},
+                'provider': 'msg91'
+            }
+        
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'MSG91 error: {str(e)}',
+                'provider': 'msg91'
+            }
+
+
+_sms_service = None
+_sms_service_lock = threading.Lock()
+
+
+def get_sms_service() -> SMSService:
+    """Return the process-wide SMSService, creating it on first use"""
+    global _sms_service
+    
+    with _sms_service_lock:
+        if _sms_service is None:
+            _sms_service = SMSService()
+        return _sms_service
+
+
+def reset_sms_service():
+    """Drop the process-wide SMSService, e.g. after SMS_PROVIDERS changes"""
+    global _sms_service
+    
+    with _sms_service_lock:
+        if _sms_service is not None:
+            _sms_service.close()
+        _sms_service = None
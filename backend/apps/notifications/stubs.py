@@ -0,0 +1,185 @@
+"""
+Stub SMS Providers
+
+A local HTTP server answering TextLocal- and MSG91-style send requests, for
+benchmarks and tests. It speaks HTTP/1.1 keep-alive, optionally over TLS
+with a throwaway self-signed certificate, counts the connections it
+accepts and can inject latency and failures.
+"""
+
+import json
+import os
+import random
+import shutil
+import ssl
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def write_self_signed_cert(directory):
+    """Write a certificate and key for 127.0.0.1/localhost; returns their paths"""
+    import datetime
+    import ipaddress
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .add_extension(x509.SubjectAlternativeName([
+            x509.DNSName('localhost'),
+            x509.IPAddress(ipaddress.ip_address('127.0.0.1')),
+        ]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = os.path.join(directory, 'stub.pem')
+    key_path = os.path.join(directory, 'stub.key')
+    with open(cert_path, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stub.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.respond(parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.respond(parse_qs(self.rfile.read(length).decode()))
+
+    def respond(self, params):
+        stub = self.server.stub
+        message_id = stub.count('requests')
+        provider = urlparse(self.path).path.strip('/')
+        numbers = ','.join(params.get('numbers') or params.get('mobiles') or [])
+        stub.received.append((provider, numbers))
+
+        if stub.latency:
+            time.sleep(stub.latency)
+        failed = stub.failure_rate and stub.random.random() < stub.failure_rate
+
+        if provider == 'msg91':
+            body = {'type': 'error', 'message': 'Stub failure'} if failed else {
+                'type': 'success', 'message': f'stub{message_id}'
+            }
+        else:
+            body = {'status': 'failure', 'errors': [{'message': 'Stub failure'}]} if failed else {
+                'status': 'success',
+                'messages': [
+                    {'id': f'stub{message_id}_{index}', 'recipient': int(number)}
+                    for index, number in enumerate(numbers.split(','))
+                    if number.isdigit()
+                ],
+            }
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubProviderServer:
+    """
+    Stub SMS provider on 127.0.0.1; ``latency`` (seconds) and
+    ``failure_rate`` may be changed while it runs.
+    """
+
+    def __init__(self, latency=0.0, failure_rate=0.0, tls=False, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.tls = tls
+        self.random = random.Random(seed)
+        self.counts = {'connections': 0, 'requests': 0}
+        self.received = []
+        self.ca_file = None
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._tempdir = None
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+            return self.counts[name]
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'{"https" if self.tls else "http"}://{host}:{port}/'
+
+    def provider(self, name='textlocal', **options):
+        """An SMS_PROVIDERS entry sending through this stub"""
+        config = {
+            'name': name,
+            'priority': 1,
+            'active': True,
+            'api_key': 'stub',
+            'auth_key': 'stub',
+            'api_url': f'{self.url}{name}/',
+        }
+        if self.tls:
+            config['verify'] = self.ca_file
+        config.update(options)
+        return config
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self
+
+        if self.tls:
+            self._tempdir = tempfile.mkdtemp(prefix='sms-stub-')
+            self.ca_file, key_file = write_self_signed_cert(self._tempdir)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.ca_file, key_file)
+            self._httpd.socket = context.wrap_socket(self._httpd.socket, server_side=True)
+
+        threading.Thread(target=self._httpd.serve_forever, name='sms-stub', daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._tempdir is not None:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+            self._tempdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
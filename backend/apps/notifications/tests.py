@@ -0,0 +1,484 @@
+"""
+Tests for the notifications app.
+"""
+import io
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import serializers
+from apps.authentication.authentication import JWTTokenGenerator
+from apps.authentication.models import User
+from bluestock_backend.request_info import client_ip
+from .batches import normalize_phone_numbers, queue_app_link_batch, read_phone_numbers
+from .health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+from .models import AppLinkBatch, AppLinkRequest
+from .outbox import claim_batch, process_outbox, record_results
+from .serializers import normalize_phone_number
+from .services import SMSService, get_sms_service, reset_sms_service
+from .stubs import StubProviderServer
+from .throttling import (
+    CacheRateLimitBackend, LocalRateLimitBackend, acquire_dedup_lock, release_dedup_lock, reset_rate_limit_backend,
+)
+
+MOCK_PROVIDERS = [{'name': 'mock', 'priority': 1, 'active': True}]
+
+
+@override_settings(SMS_PROVIDERS=MOCK_PROVIDERS, SMS_OUTBOX_MAX_ATTEMPTS=2, SMS_OUTBOX_RETRY_DELAY=30)
+class SMSOutboxTests(TestCase):
+    """
+    send-app-link only queues; workers claim, send and retry.
+    """
+
+    def setUp(self):
+        reset_sms_service()
+        self.addCleanup(reset_sms_service)
+        reset_rate_limit_backend()
+        self.addCleanup(reset_rate_limit_backend)
+
+    def queue(self, phone_number):
+        response = self.client.post(
+            '/api/send-app-link/', {'phone_number': phone_number}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        return response.json()['request_id']
+
+    def test_view_queues_without_sending(self):
+        request_id = self.queue('9876543210')
+
+        app_link_request = AppLinkRequest.objects.get(id=request_id)
+        self.assertEqual(app_link_request.status, 'pending')
+        self.assertEqual(app_link_request.attempts, 0)
+
+        status = self.client.get(f'/api/app-link-status/{request_id}/').json()['data']
+        self.assertEqual(status['status'], 'pending')
+
+    def test_worker_sends_and_retries(self):
+        sent_id = self.queue('9876543210')
+        failing_id = self.queue('9876540000')
+
+        self.assertEqual(process_outbox(batch_size=1, workers=2), {'sent': 1, 'retry': 1, 'failed': 0})
+        sent = AppLinkRequest.objects.get(id=sent_id)
+        self.assertEqual((sent.status, sent.provider, sent.attempts), ('sent', 'mock', 1))
+        self.assertEqual(sent.provider_message_id, f'mock_{sent_id}_3210')
+
+        # Not due again until the retry delay has passed
+        failing = AppLinkRequest.objects.get(id=failing_id)
+        self.assertEqual(failing.status, 'pending')
+        self.assertGreater(failing.next_attempt_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(process_outbox(), {'sent': 0, 'retry': 0, 'failed': 0})
+
+        AppLinkRequest.objects.filter(id=failing_id).update(next_attempt_at=timezone.now())
+        self.assertEqual(process_outbox(), {'sent': 0, 'retry': 0, 'failed': 1})
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), ('failed', 2))
+        self.assertEqual(failing.error_message, 'All SMS providers failed')
+
+    def test_claimed_requests_are_not_claimed_again(self):
+        self.queue('9876543210')
+
+        claimed = claim_batch(10)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(claimed[0].status, 'sending')
+        self.assertEqual(claim_batch(10), [])
+
+    def test_single_requests_are_claimed_before_batches(self):
+        batch, _ = queue_app_link_batch(
+            [f'98765432{index:02d}' for index in range(5)], message='Campaign', app_link='https://example.com'
+        )
+        request_id = self.queue('9876543299')
+
+        claimed = {item.id: item.batch_id for item in claim_batch(3)}
+        self.assertEqual(claimed.pop(request_id), None)
+        self.assertEqual(list(claimed.values()), [batch.id, batch.id])
+        self.assertEqual(len(claim_batch(10)), 3)
+
+    def test_stale_claim_is_released_and_old_result_ignored(self):
+        request_id = self.queue('9876543210')
+        stale = claim_batch(10)[0]
+        AppLinkRequest.objects.filter(id=request_id).update(
+            claimed_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(process_outbox(), {'sent': 1, 'retry': 0, 'failed': 0})
+        self.assertEqual(AppLinkRequest.objects.get(id=request_id).attempts, 2)
+
+        # The first worker finishing late must not overwrite the result
+        record_results([(stale, {'success': False, 'error': 'timeout'})])
+        self.assertEqual(AppLinkRequest.objects.get(id=request_id).status, 'sent')
+
+
+class PooledProviderTests(TestCase):
+    """
+    Provider calls reuse keep-alive connections from a shared service.
+    """
+
+    def setUp(self):
+        self.stub = StubProviderServer().start()
+        self.addCleanup(self.stub.stop)
+
+    def test_messages_share_one_connection(self):
+        for name in ('textlocal', 'msg91'):
+            service = SMSService([self.stub.provider(name)])
+            for index in range(5):
+                result = service.send_sms('919876543210', 'Hello', index)
+                self.assertTrue(result['success'])
+                self.assertEqual(result['provider'], name)
+            service.close()
+
+        self.assertEqual(self.stub.counts, {'connections': 2, 'requests': 10})
+        self.assertEqual(self.stub.received[0], ('textlocal', '919876543210'))
+        self.assertEqual(self.stub.received[-1], ('msg91', '919876543210'))
+
+    def test_provider_errors_are_reported(self):
+        self.stub.failure_rate = 1
+        result = SMSService([self.stub.provider('msg91')]).send_sms('919876543210', 'Hello')
+        self.assertFalse(result['success'])
+
+    def test_process_wide_service(self):
+        self.addCleanup(reset_sms_service)
+        with override_settings(SMS_PROVIDERS=[self.stub.provider()]):
+            reset_sms_service()
+            service = get_sms_service()
+            self.assertIs(get_sms_service(), service)
+            self.assertEqual(service.providers[0]['api_url'], self.stub.provider()['api_url'])
+
+            reset_sms_service()
+            self.assertIsNot(get_sms_service(), service)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(
+    SMS_CIRCUIT_MIN_REQUESTS=3, SMS_CIRCUIT_ERROR_RATE=0.5, SMS_CIRCUIT_SLOW_CALL=1,
+    SMS_CIRCUIT_COOLDOWN=30, SMS_HEALTH_WINDOW_SECONDS=60, SMS_ROUTING_LATENCY_STEP=20,
+)
+class ProviderHealthTests(TestCase):
+    """
+    Circuits open on errors or slow sends and probe once when half-open;
+    messages go to the fastest healthy provider.
+    """
+
+    def test_circuit_opens_and_probes(self):
+        clock = FakeClock()
+        health = ProviderHealth('textlocal', clock=clock)
+
+        health.record(True, 0.01)
+        health.record(False, 0.01)
+        self.assertEqual(health.state, CLOSED)
+        health.record(True, 2.0)  # slow, counted as a failure
+        self.assertEqual(health.state, OPEN)
+        self.assertFalse(health.allow())
+
+        clock.now += 30
+        self.assertTrue(health.allow())
+        self.assertEqual(health.state, HALF_OPEN)
+        self.assertFalse(health.allow())  # one probe at a time
+        health.record(False, 0.01)
+        self.assertEqual(health.state, OPEN)
+
+        clock.now += 30
+        self.assertTrue(health.allow())
+        health.record(True, 0.01)
+        self.assertEqual(health.state, CLOSED)
+        self.assertTrue(health.allow())
+
+    def test_outcomes_expire(self):
+        clock = FakeClock()
+        health = ProviderHealth('msg91', clock=clock)
+        health.record(False, 0.05)
+        health.record(False, 0.05)
+        self.assertEqual(health.snapshot()['error_rate'], 1.0)
+        self.assertEqual(health.routing_latency(), 2)
+
+        clock.now += 61
+        health.record(False, 0.05)
+        self.assertEqual(health.state, CLOSED)
+        self.assertEqual(health.snapshot()['requests'], 1)
+
+    def test_routes_to_fastest_provider(self):
+        with StubProviderServer(latency=0.06) as slow, StubProviderServer() as fast:
+            service = SMSService([slow.provider('textlocal', priority=1), fast.provider('msg91', priority=2)])
+            providers = [service.send_sms('919876543210', 'Hello', index)['provider'] for index in range(6)]
+            service.close()
+
+        # Each provider is measured once, then the faster one takes the traffic
+        self.assertEqual(providers, ['textlocal'] + ['msg91'] * 5)
+        self.assertEqual((slow.counts['requests'], fast.counts['requests']), (1, 5))
+
+    def test_open_circuit_skips_failing_provider(self):
+        with StubProviderServer(failure_rate=1) as failing, StubProviderServer() as healthy:
+            service = SMSService([failing.provider('textlocal', priority=1), healthy.provider('msg91', priority=2)])
+            clock = FakeClock()
+            service.health['textlocal'].clock = clock
+
+            for index in range(6):
+                self.assertEqual(service.send_sms('919876543210', 'Hello', index)['provider'], 'msg91')
+            self.assertEqual(failing.counts['requests'], 3)
+            self.assertEqual(service.health['textlocal'].state, OPEN)
+
+            # After the cooldown one message probes the recovered provider
+            failing.failure_rate = 0
+            clock.now += 30
+            service.send_sms('919876543210', 'Hello', 7)
+            self.assertEqual(failing.counts['requests'], 4)
+            self.assertEqual(service.health['textlocal'].state, CLOSED)
+            service.close()
+
+    def test_no_provider_available(self):
+        with StubProviderServer(failure_rate=1) as failing:
+            service = SMSService([failing.provider('msg91')])
+            for index in range(3):
+                self.assertEqual(service.send_sms('919876543210', 'Hello')['error'], 'All SMS providers failed')
+            result = service.send_sms('919876543210', 'Hello')
+            service.close()
+
+        self.assertEqual(result['error'], 'No SMS provider available')
+        self.assertEqual(failing.counts['requests'], 3)
+
+    @override_settings(SMS_BULK_CHUNK_SIZE=10, SMS_CIRCUIT_SLOW_CALL=0.05)
+    def test_bulk_chunks_are_recorded_per_message(self):
+        service = SMSService(MOCK_PROVIDERS)
+
+        def send_slowly(phone_number, message, request_id=None):
+            time.sleep(0.01)
+            return {'success': True, 'message_id': phone_number, 'provider': 'mock'}
+
+        # Each chunk of ten one-by-one sends takes twice the slow-call limit
+        with mock.patch.object(service, '_send_via_mock', side_effect=send_slowly):
+            results = service.send_bulk_sms([f'9198765432{index:02d}' for index in range(30)], 'Hello')
+
+        self.assertTrue(all(result['success'] for result in results.values()))
+        snapshot = service.health['mock'].snapshot()
+        self.assertEqual((snapshot['state'], snapshot['requests'], snapshot['error_rate']), (CLOSED, 3, 0))
+        self.assertLess(snapshot['p95_ms'], 50)
+
+
+@override_settings(SMS_BULK_CHUNK_SIZE=3)
+class AppLinkBatchTests(TestCase):
+    """
+    Campaigns queue many numbers at once and go out as multi-recipient sends.
+    """
+
+    def setUp(self):
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='secret-pass', role='admin'
+        )
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {JWTTokenGenerator.generate_access_token(admin)}'}
+        self.stub = StubProviderServer().start()
+        self.addCleanup(self.stub.stop)
+        reset_sms_service()
+        self.addCleanup(reset_sms_service)
+
+    def test_normalize_matches_serializer(self):
+        values = [
+            '9876543210', '+91 98765 43210', '919876543211', '098765-43212', '5876543210',
+            '915876543210', '12345', '929876543210', '', 'none', '98765\n43213',
+        ]
+        numbers, invalid, duplicates = normalize_phone_numbers(values)
+
+        expected, errors = [], {}
+        for row, value in enumerate(values, start=1):
+            try:
+                number = normalize_phone_number(value.replace('\n', ' '))
+            except serializers.ValidationError as e:
+                errors[row] = str(e.detail[0])
+                continue
+            if number not in expected:
+                expected.append(number)
+
+        self.assertEqual(numbers, expected)
+        self.assertEqual({row['row']: row['error'] for row in invalid}, errors)
+        self.assertEqual(duplicates, 1)
+
+    def test_read_phone_numbers(self):
+        self.assertEqual(read_phone_numbers('9876543210\n9876543211\n'), ['9876543210', '9876543211'])
+        self.assertEqual(read_phone_numbers('name,mobile\nA,9876543210\nB\n'), ['9876543210', ''])
+
+    def test_bulk_endpoint_queues_batch(self):
+        response = self.client.post('/api/send-app-link/bulk/', {
+            'phone_numbers': ['9876543210', '98765 43210', '12345', '9876543211'],
+            'message': 'Bluestock IPO opens tomorrow',
+            'name': 'ipo-alert',
+        }, content_type='application/json', **self.auth)
+
+        self.assertEqual(response.status_code, 202)
+        body = response.json()
+        self.assertEqual(
+            (body['batch']['queued'], body['batch']['invalid'], body['batch']['duplicates']), (2, 1, 1)
+        )
+        self.assertEqual(body['invalid_numbers'][0]['row'], 3)
+
+        batch = AppLinkBatch.objects.get()
+        self.assertEqual(
+            sorted(batch.requests.values_list('phone_number', 'message', 'status')),
+            [('919876543210', 'Bluestock IPO opens tomorrow', 'pending'),
+             ('919876543211', 'Bluestock IPO opens tomorrow', 'pending')]
+        )
+
+    def test_bulk_endpoint_accepts_csv_and_requires_admin(self):
+        csv = 'phone_number\n9876543210\n9876543211\n'
+        response = self.client.post('/api/send-app-link/bulk/?name=csv', csv, content_type='text/csv')
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post('/api/send-app-link/bulk/?name=csv', csv, content_type='text/csv', **self.auth)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['batch']['name'], 'csv')
+        self.assertEqual(AppLinkRequest.objects.count(), 2)
+
+        response = self.client.post('/api/send-app-link/bulk/', {'phone_numbers': ['12345']},
+                                    content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_goes_out_in_multi_recipient_chunks(self):
+        numbers = [f'98765432{index:02d}' for index in range(7)]
+        for name in ('msg91', 'textlocal'):
+            with self.subTest(provider=name), override_settings(SMS_PROVIDERS=[self.stub.provider(name)]):
+                reset_sms_service()
+                self.stub.received.clear()
+                AppLinkRequest.objects.all().delete()
+                self.client.post('/api/send-app-link/bulk/', {'phone_numbers': numbers},
+                                 content_type='application/json', **self.auth)
+
+                self.assertEqual(process_outbox(), {'sent': 7, 'retry': 0, 'failed': 0})
+                self.assertEqual(
+                    sorted(len(received.split(',')) for _, received in self.stub.received), [1, 3, 3]
+                )
+                self.assertEqual(
+                    set(AppLinkRequest.objects.values_list('status', 'provider')), {('sent', name)}
+                )
+                message_ids = set(AppLinkRequest.objects.values_list('provider_message_id', flat=True))
+                # MSG91 returns one ID per request, TextLocal one per recipient
+                self.assertEqual(len(message_ids), 3 if name == 'msg91' else 7)
+
+        batch = AppLinkBatch.objects.latest('id')
+        status = self.client.get(f'/api/app-link-batches/{batch.id}/', **self.auth).json()['data']
+        self.assertEqual(status['statuses']['sent'], 7)
+
+    def test_queue_app_links_command(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = Path(directory.name) / 'campaign.csv'
+        path.write_text('phone\n9876543210\nbad\n9876543211\n')
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command('queue_app_links', str(path), '--message', 'IPO opens tomorrow', stdout=out, stderr=err)
+        batch = AppLinkBatch.objects.get()
+        self.assertEqual((batch.name, batch.queued, batch.invalid), ('campaign', 2, 1))
+        self.assertIn("row 2: 'bad'", err.getvalue())
+
+
+@override_settings(
+    SMS_RATE_LIMIT_PER_IP=5, SMS_RATE_LIMIT_IP_PERIOD=3600,
+    SMS_RATE_LIMIT_PER_NUMBER=2, SMS_RATE_LIMIT_NUMBER_PERIOD=3600,
+    SMS_DEDUP_WINDOW_MINUTES=5,
+)
+class SendAppLinkThrottleTests(TestCase):
+    """
+    Abuse is rejected before any write; repeat taps reuse the last request.
+    """
+
+    def setUp(self):
+        reset_rate_limit_backend()
+        self.addCleanup(reset_rate_limit_backend)
+
+    def post(self, phone_number, ip='203.0.113.7', **extra):
+        return self.client.post(
+            '/api/send-app-link/', {'phone_number': phone_number},
+            content_type='application/json', REMOTE_ADDR=ip, **extra
+        )
+
+    def test_repeat_within_window_returns_existing_request(self):
+        first = self.post('9876543210').json()
+        repeat = self.post('98765 43210')
+
+        self.assertEqual(repeat.status_code, 200)
+        self.assertEqual(repeat.json()['request_id'], first['request_id'])
+        self.assertTrue(repeat.json()['duplicate'])
+        self.assertEqual(AppLinkRequest.objects.count(), 1)
+
+        # Outside the window, or after a failure, a new request is queued
+        AppLinkRequest.objects.update(created_at=timezone.now() - timedelta(minutes=6))
+        self.assertEqual(self.post('9876543210').status_code, 202)
+        AppLinkRequest.objects.update(status='failed')
+        self.assertEqual(self.post('9876543210').status_code, 429)  # third send to the number this hour
+        self.assertEqual(AppLinkRequest.objects.count(), 2)
+
+    def test_ip_limit_rejects_before_any_write(self):
+        for index in range(5):
+            self.assertEqual(self.post(f'98765432{index:02d}').status_code, 202)
+
+        with self.assertNumQueries(0):
+            response = self.post('9876543299')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertFalse(response.json()['success'])
+
+        # Other clients are unaffected
+        self.assertEqual(self.post('9876543299', ip='198.51.100.1').status_code, 202)
+
+    def test_forwarded_for_trusts_only_configured_proxies(self):
+        request = type('Request', (), {'META': {
+            'REMOTE_ADDR': '10.0.0.1', 'HTTP_X_FORWARDED_FOR': '1.2.3.4, 198.51.100.9'
+        }})()
+        self.assertEqual(client_ip(request, num_proxies=1), '198.51.100.9')
+        self.assertEqual(client_ip(request, num_proxies=5), '1.2.3.4')
+        self.assertEqual(client_ip(request, num_proxies=0), '10.0.0.1')
+
+        # A spoofed X-Forwarded-For doesn't dodge the per-IP limit
+        with override_settings(SMS_RATE_LIMIT_PER_IP=1):
+            self.assertEqual(self.post('9876543210', HTTP_X_FORWARDED_FOR='1.1.1.1').status_code, 202)
+            self.assertEqual(self.post('9876543211', HTTP_X_FORWARDED_FOR='2.2.2.2').status_code, 429)
+
+    @override_settings(SMS_RATE_LIMIT_PER_IP=1)
+    def test_proxy_address_without_hop_count_skips_ip_limit(self):
+        # nginx on 127.0.0.1 with SMS_RATE_LIMIT_NUM_PROXIES unset: every
+        # client would share one bucket, so only the per-number limit applies
+        with mock.patch('apps.notifications.throttling._warned_behind_proxy', False), \
+                self.assertLogs('apps.notifications.throttling', 'WARNING'):
+            for index in range(3):
+                self.assertEqual(self.post(f'98765432{index:02d}', ip='127.0.0.1').status_code, 202)
+
+        with override_settings(SMS_RATE_LIMIT_NUM_PROXIES=1):
+            forwarded = {'ip': '127.0.0.1', 'HTTP_X_FORWARDED_FOR': '1.1.1.1'}
+            self.assertEqual(self.post('9876543290', **forwarded).status_code, 202)
+            self.assertEqual(self.post('9876543291', **forwarded).status_code, 429)
+            self.assertEqual(self.post('9876543292', ip='127.0.0.1', HTTP_X_FORWARDED_FOR='2.2.2.2').status_code, 202)
+
+    def test_concurrent_repeat_does_not_queue_twice(self):
+        # Another request for the number is between its lookup and insert
+        self.assertTrue(acquire_dedup_lock('919876543210'))
+        response = self.post('9876543210')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['duplicate'])
+        self.assertEqual(AppLinkRequest.objects.count(), 0)
+
+        release_dedup_lock('919876543210')
+        self.assertEqual(self.post('9876543210').status_code, 202)
+        self.assertEqual(self.post('9876543210').status_code, 200)
+        self.assertEqual(AppLinkRequest.objects.count(), 1)
+
+    def test_backends_refill(self):
+        for backend in (LocalRateLimitBackend(), CacheRateLimitBackend()):
+            with self.subTest(backend=type(backend).__name__):
+                key = f'test:{type(backend).__name__}'
+                self.assertEqual([backend.consume(key, 2, 60) for _ in range(2)], [0, 0])
+                self.assertGreater(backend.consume(key, 2, 60), 0)
+
+        # A local bucket refills one token every period / limit seconds
+        backend = LocalRateLimitBackend()
+        backend.consume('refill', 2, 0.1)
+        backend.consume('refill', 2, 0.1)
+        self.assertGreater(backend.consume('refill', 2, 0.1), 0)
+        time.sleep(0.06)
+        self.assertEqual(backend.consume('refill', 2, 0.1), 0)
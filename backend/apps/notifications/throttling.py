@@ -0,0 +1,191 @@
+"""
+Rate Limiting
+
+send-app-link is public, so every request spends a token from two buckets
+before anything is written: one per client IP and one per phone number.
+A bucket holds up to ``limit`` tokens and refills at ``limit / period``
+tokens a second, which allows a short burst and then a steady rate.
+
+Backends are chosen by SMS_RATE_LIMIT_BACKEND:
+
+- ``LocalRateLimitBackend`` keeps exact token buckets in process memory;
+  every worker process enforces the limit on its own.
+- ``CacheRateLimitBackend`` shares limits between processes through a
+  Django cache (Redis or memcached). The cache API has no compare-and-set,
+  so it approximates the bucket with a sliding-window counter built on
+  atomic ``add``/``incr``.
+
+Repeat requests for a number are deduplicated under a short lock taken
+with the same cache's atomic ``add``, so two concurrent taps can't both
+miss the lookup and queue two messages. The lock only spans processes
+that share SMS_RATE_LIMIT_CACHE_ALIAS, so with several workers that cache
+must be a shared backend such as Redis.
+"""
+
+import ipaddress
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from bluestock_backend.request_info import client_ip
+
+logger = logging.getLogger(__name__)
+
+# Loopback and private networks a reverse proxy connects from
+PROXY_NETWORKS = [
+    ipaddress.ip_network(network) for network in (
+        '127.0.0.0/8', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '::1/128', 'fc00::/7',
+    )
+]
+
+# Seconds a dedup lock outlives a request that died while holding it
+DEDUP_LOCK_TIMEOUT = 10
+
+
+class LocalRateLimitBackend:
+    """Token buckets in this process's memory"""
+
+    def __init__(self, max_keys=None):
+        self.max_keys = max_keys or settings.SMS_RATE_LIMIT_MAX_KEYS
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, limit, period):
+        """
+        Take a token from the bucket of ``key``. Returns 0 when allowed,
+        else the seconds until a token is available.
+        """
+        rate = limit / period
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (limit, now))
+            tokens = min(limit, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+
+            # Forget the least recently used buckets; a forgotten bucket is full
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+
+class CacheRateLimitBackend:
+    """Sliding-window counters in a shared cache"""
+
+    def __init__(self):
+        self.cache = caches[settings.SMS_RATE_LIMIT_CACHE_ALIAS]
+
+    def consume(self, key, limit, period):
+        now = time.time()
+        window = int(now // period)
+        elapsed = now - window * period
+        current_key = f'sms-rate:{key}:{window}'
+
+        self.cache.add(current_key, 0, timeout=period * 2)
+        try:
+            count = self.cache.incr(current_key)
+        except ValueError:
+            # Evicted between add and incr
+            self.cache.add(current_key, 1, timeout=period * 2)
+            count = 1
+        previous = self.cache.get(f'sms-rate:{key}:{window - 1}', 0)
+
+        # The previous window's count, weighted by how much of it still overlaps
+        if previous * (period - elapsed) / period + count <= limit:
+            return 0
+
+        # Rejected requests don't count against the limit
+        self.cache.decr(current_key)
+        if count > limit or not previous:
+            return period - elapsed
+        return min((previous * (period - elapsed) / period + count - limit) * period / previous, period - elapsed)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_rate_limit_backend():
+    """Return the process-wide rate limit backend, creating it on first use"""
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            _backend = import_string(settings.SMS_RATE_LIMIT_BACKEND)()
+        return _backend
+
+
+def reset_rate_limit_backend():
+    """Drop the process-wide backend and its local buckets"""
+    global _backend
+
+    with _backend_lock:
+        _backend = None
+
+
+def throttle(scope, identifier, limit, period):
+    """
+    Spend a token of ``scope`` for ``identifier``. Returns 0 when allowed,
+    else whole seconds to wait; a limit of 0 disables the check.
+    """
+    if not settings.SMS_RATE_LIMIT_ENABLED or limit <= 0:
+        return 0
+    wait = get_rate_limit_backend().consume(f'{scope}:{identifier}', limit, period)
+    return math.ceil(wait)
+
+
+_warned_behind_proxy = False
+
+
+def rate_limit_ip(request):
+    """
+    Client IP to rate limit on, or None when it can't be told apart.
+
+    Behind a reverse proxy REMOTE_ADDR is the proxy, so with
+    SMS_RATE_LIMIT_NUM_PROXIES unset a loopback or private REMOTE_ADDR
+    would put every client in one bucket; the per-IP limit is skipped
+    then, with a warning, and the per-number limit still applies.
+    """
+    num_proxies = settings.SMS_RATE_LIMIT_NUM_PROXIES
+    ip = client_ip(request, num_proxies=num_proxies)
+    if num_proxies:
+        return ip
+
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return ip
+    if not any(address in network for network in PROXY_NETWORKS):
+        return ip
+
+    global _warned_behind_proxy
+    if not _warned_behind_proxy:
+        _warned_behind_proxy = True
+        logger.warning(
+            f"send-app-link request from {ip} with SMS_RATE_LIMIT_NUM_PROXIES=0; "
+            "skipping the per-IP limit. Set it to the number of proxies in front of the app."
+        )
+    return None
+
+
+def acquire_dedup_lock(phone_number):
+    """
+    Serialize queueing for a number across concurrent requests. Returns
+    False while another request for the number holds the lock.
+    """
+    cache = caches[settings.SMS_RATE_LIMIT_CACHE_ALIAS]
+    return cache.add(f'sms-dedup:{phone_number}', 1, timeout=DEDUP_LOCK_TIMEOUT)
+
+
+def release_dedup_lock(phone_number):
+    caches[settings.SMS_RATE_LIMIT_CACHE_ALIAS].delete(f'sms-dedup:{phone_number}')
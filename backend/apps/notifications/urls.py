@@ -12,6 +12,8 @@ app_name = 'notifications'
 urlpatterns = [
     # App link endpoints
     path('send-app-link/', views.send_app_link, name='send_app_link'),
+    path('send-app-link/bulk/', views.send_app_link_batch, name='send_app_link_batch'),
+    path('app-link-batches/<int:batch_id>/', views.app_link_batch_status, name='app_link_batch_status'),
     path('app-link-status/<int:request_id>/', views.app_link_status, name='app_link_status'),
     path('app-link-requests/', views.AppLinkRequestListView.as_view(), name='app_link_requests'),
     
@@ -4,30 +4,115 @@ Notifications Views
 Views for handling app link requests and SMS notifications
 """
 
-from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import status, generics, permissions
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.utils import timezone
 from django.conf import settings
 import logging
+import math
 import requests
 import json
+from datetime import timedelta
 
-from .models import AppLinkRequest, SMSTemplate
-from .serializers import SendAppLinkSerializer, AppLinkRequestSerializer
-from .services import SMSService
+from .batches import AppLinkBatchError, PhoneNumberCSVParser, batch_status_counts, queue_app_link_batch
+from .models import AppLinkBatch, AppLinkRequest, SMSTemplate
+from .serializers import (
+    AppLinkBatchSerializer,
+    AppLinkRequestSerializer,
+    SendAppLinkBatchSerializer,
+    SendAppLinkSerializer,
+)
+from .services import get_sms_service
+from .throttling import acquire_dedup_lock, rate_limit_ip, release_dedup_lock, throttle
 
 logger = logging.getLogger(__name__)
 
 
+class IsAdmin(permissions.BasePermission):
+    """
+    Custom permission to only allow admin users.
+    """
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role == 'admin'
+
+
+def too_many_requests(wait):
+    """429 response asking the client to retry after ``wait`` seconds"""
+    minutes = max(1, math.ceil(wait / 60))
+    response = Response({
+        'success': False,
+        'message': f'Too many requests. Please try again in {minutes} minute{"s" if minutes > 1 else ""}.'
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+def already_queued(request_id=None, request_status='pending'):
+    """200 response for a repeat request of a number already being sent to"""
+    return Response({
+        'success': True,
+        'message': 'Your app link is already on its way to your mobile number!',
+        'request_id': request_id,
+        'status': request_status,
+        'duplicate': True
+    }, status=status.HTTP_200_OK)
+
+
+def queue_app_link(phone_number, message, app_link):
+    """
+    Queue an app link request unless one for the number is recent or its
+    rate limit is spent; the send_app_links worker delivers it.
+    """
+    # Repeated taps get the request that is already on its way
+    if settings.SMS_DEDUP_WINDOW_MINUTES > 0:
+        existing = AppLinkRequest.objects.filter(
+            phone_number=phone_number,
+            created_at__gte=timezone.now() - timedelta(minutes=settings.SMS_DEDUP_WINDOW_MINUTES)
+        ).exclude(status='failed').order_by('-created_at').first()
+        if existing:
+            return already_queued(existing.id, existing.status)
+    
+    wait = throttle('phone', phone_number, settings.SMS_RATE_LIMIT_PER_NUMBER, settings.SMS_RATE_LIMIT_NUMBER_PERIOD)
+    if wait:
+        return too_many_requests(wait)
+    
+    app_link_request = AppLinkRequest.objects.create(
+        phone_number=phone_number,
+        message=message,
+        app_link=app_link,
+        status='pending'
+    )
+
+    return Response({
+        'success': True,
+        'message': 'Your app link is on its way to your mobile number!',
+        'request_id': app_link_request.id,
+        'status': app_link_request.status
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def send_app_link(request):
     """
     Send app download link to mobile number via SMS
+    
+    Requests are rate limited per client IP and per number before anything
+    is written, and a repeat for the same number within
+    SMS_DEDUP_WINDOW_MINUTES returns the earlier request instead of
+    sending another SMS. The lookup and insert for a number run under a
+    lock, so concurrent repeats can't both queue a message.
     """
     try:
+        ip_address = rate_limit_ip(request)
+        if ip_address is not None:
+            wait = throttle('ip', ip_address, settings.SMS_RATE_LIMIT_PER_IP, settings.SMS_RATE_LIMIT_IP_PERIOD)
+            if wait:
+                return too_many_requests(wait)
+        
         serializer = SendAppLinkSerializer(data=request.data)
         
         if not serializer.is_valid():
@@ -42,40 +127,16 @@ def send_app_link(request):
         message = validated_data['message']
         app_link = validated_data['app_link']
         
-        # Create app link request record
-        app_link_request = AppLinkRequest.objects.create(
-            phone_number=phone_number,
-            message=message,
-            app_link=app_link,
-            status='pending'
-        )
-        
-        # Initialize SMS service
-        sms_service = SMSService()
+        if settings.SMS_DEDUP_WINDOW_MINUTES <= 0:
+            return queue_app_link(phone_number, message, app_link)
         
-        # Send SMS
-        result = sms_service.send_sms(
-            phone_number=phone_number,
-            message=message,
-            request_id=app_link_request.id
-        )
-        
-        if result['success']:
-            app_link_request.mark_as_sent(result.get('message_id'))
-            
-            return Response({
-                'success': True,
-                'message': 'App link sent successfully to your mobile number!',
-                'request_id': app_link_request.id
-            }, status=status.HTTP_200_OK)
-        else:
-            app_link_request.mark_as_failed(result.get('error', 'Unknown error'))
-            
-            return Response({
-                'success': False,
-                'message': result.get('error', 'Failed to send app link. Please try again.'),
-                'request_id': app_link_request.id
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if not acquire_dedup_lock(phone_number):
+            # Another request for the number is being queued right now
+            return already_queued()
+        try:
+            return queue_app_link(phone_number, message, app_link)
+        finally:
+            release_dedup_lock(phone_number)
     
     except Exception as e:
         logger.error(f"Error sending app link: {str(e)}")
@@ -85,6 +146,80 @@ def send_app_link(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+@parser_classes([JSONParser, PhoneNumberCSVParser])
+def send_app_link_batch(request):
+    """
+    Queue one app link SMS for many mobile numbers (Admin only)
+    
+    Accepts JSON {"phone_numbers": [...], "message", "app_link", "name"} or
+    a text/csv body of numbers with message, app_link and name as query
+    parameters. Invalid numbers are reported and skipped.
+    """
+    if isinstance(request.data, list):
+        phone_numbers, options = request.data, request.query_params
+    else:
+        phone_numbers, options = request.data.get('phone_numbers'), request.data
+    
+    if not isinstance(phone_numbers, list) or not phone_numbers:
+        return Response({
+            'success': False,
+            'message': 'Expected a non-empty list of phone numbers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = SendAppLinkBatchSerializer(data={
+        key: options[key] for key in ('message', 'app_link', 'name') if key in options
+    })
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Invalid data provided',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        batch, invalid = queue_app_link_batch(
+            phone_numbers,
+            message=serializer.validated_data['message'],
+            app_link=serializer.validated_data['app_link'],
+            name=serializer.validated_data.get('name', ''),
+            user=request.user,
+        )
+    except AppLinkBatchError as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'success': True,
+        'message': f'{batch.queued} app links queued',
+        'batch': AppLinkBatchSerializer(batch).data,
+        'invalid_numbers': invalid[:100]
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def app_link_batch_status(request, batch_id):
+    """
+    Get delivery progress of an app link batch (Admin only)
+    """
+    try:
+        batch = AppLinkBatch.objects.get(id=batch_id)
+    except AppLinkBatch.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'App link batch not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'success': True,
+        'data': {**AppLinkBatchSerializer(batch).data, 'statuses': batch_status_counts(batch)}
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def app_link_status(request, request_id):
@@ -159,11 +294,8 @@ def test_sms_service(request):
                 'message': 'Phone number is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Initialize SMS service
-        sms_service = SMSService()
-        
-        # Send test SMS
-        result = sms_service.send_sms(
+        # Send test SMS through the shared service
+        result = get_sms_service().send_sms(
             phone_number=phone_number,
             message=message
         )
@@ -0,0 +1,94 @@
+"""
+Conditional GET support for read endpoints.
+
+Views declare a cheap fingerprint of the rows their response is built from
+(typically one aggregate query over timestamps and row counts). The ETag is
+a hash of that fingerprint plus the request path and query, so a client
+revalidating with ``If-None-Match`` or ``If-Modified-Since`` gets a 304
+before the view queries and serializes anything.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def normalize_query(query_params):
+    """Encode query parameters with sorted keys so equivalent URLs match."""
+    return urlencode(sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        for value in values
+    ))
+
+
+def make_etag(request, parts):
+    """Build a strong ETag from fingerprint parts and the request URL."""
+    raw = '|'.join([
+        request.path,
+        normalize_query(request.query_params),
+        # Computed fields such as days_to_open change at midnight
+        timezone.localdate().isoformat(),
+        *(str(part) for part in parts),
+    ])
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def not_modified(request, headers):
+    """
+    Return a 304 response if the request's validators match the given
+    ETag/Last-Modified headers, otherwise None.
+    """
+    last_modified = headers.get('Last-Modified')
+    response = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+    )
+    if response is not None:
+        for header in VALIDATOR_HEADERS:
+            if header in headers:
+                response[header] = headers[header]
+    return response
+
+
+def conditional_get(fingerprint):
+    """
+    Add ETag/Last-Modified validators to a DRF function view's GET responses.
+
+    Apply below ``@api_view``. ``fingerprint(request, *args, **kwargs)``
+    returns ``(parts, last_modified)`` where parts change whenever the
+    response would, or None to skip validation (e.g. for a missing object).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            result = fingerprint(request, *args, **kwargs)
+            if result is None:
+                return view(request, *args, **kwargs)
+
+            parts, last_modified = result
+            headers = {'ETag': make_etag(request, parts)}
+            if last_modified is not None:
+                headers['Last-Modified'] = http_date(last_modified.timestamp())
+
+            response = not_modified(request, headers)
+            if response is not None:
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+
+        return wrapped
+
+    return decorator
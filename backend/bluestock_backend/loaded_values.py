@@ -0,0 +1,22 @@
+"""
+Remember the field values a model instance was loaded with.
+
+Save handlers that need a row's previous values (e.g. to adjust counters)
+can read ``instance._loaded_values`` instead of querying the row again
+before every save.
+"""
+
+
+class LoadedValuesMixin:
+    """
+    Model mixin setting ``_loaded_values`` to {attname: value} of the
+    fields fetched from the database.
+
+    Instances created in Python have none; deferred fields are missing.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
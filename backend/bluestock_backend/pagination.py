@@ -0,0 +1,166 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Page-number pagination runs a COUNT(*) over the whole filtered queryset and
+skips rows with OFFSET, so deep pages get slower linearly. Cursor pagination
+instead remembers the ordering values of the last row served and filters
+past them, which an index on the ordering columns answers directly.
+"""
+import base64
+import binascii
+import datetime
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder keeping full datetime precision.
+
+    DjangoJSONEncoder truncates microseconds, which would make a cursor on a
+    timestamp column skip or repeat rows.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded or belongs to another ordering."""
+
+
+def _normalize_ordering(ordering):
+    """
+    Return [(field, descending)] for the ordering with a unique id tie-breaker.
+    """
+    keys = []
+    for field in ordering:
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        if name == 'pk':
+            name = 'id'
+        keys.append((name, descending))
+
+    if not any(name == 'id' for name, _ in keys):
+        keys.append(('id', keys[-1][1] if keys else False))
+    return keys
+
+
+def _row_value(obj, field):
+    """Read a possibly related (``company__name``) ordering value from a row."""
+    value = obj
+    for part in field.split('__'):
+        value = getattr(value, part, None)
+        if value is None:
+            break
+    return value
+
+
+class CursorPage:
+    """
+    One page of a keyset-paginated queryset.
+    """
+
+    def __init__(self, items, next_cursor, previous_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator:
+    """
+    Paginate a queryset by the values of its ordering columns.
+
+    ``ordering`` is a list of field names as passed to ``order_by``; ``id``
+    is appended as a tie-breaker so every row has a unique position.
+    Cursors are opaque URL-safe strings bound to the ordering they were
+    issued for. Ordering fields must not be nullable.
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset
+        self.keys = _normalize_ordering(ordering)
+        self.page_size = page_size
+        self.signature = ','.join(
+            f"{'-' if descending else ''}{name}" for name, descending in self.keys
+        )
+
+    def encode_cursor(self, obj, backwards=False):
+        payload = {
+            'o': self.signature,
+            'v': [_row_value(obj, name) for name, _ in self.keys],
+        }
+        if backwards:
+            payload['b'] = 1
+        raw = json.dumps(payload, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            values = payload['v']
+            signature = payload['o']
+            backwards = bool(payload.get('b'))
+        except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+            raise InvalidCursor('Invalid cursor')
+
+        if signature != self.signature or len(values) != len(self.keys):
+            raise InvalidCursor('Cursor does not match the requested ordering')
+        return values, backwards
+
+    def _seek(self, values, backwards):
+        """Build the filter for rows strictly after (or before) the cursor."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            after_descending = descending != backwards
+            lookup = 'lt' if after_descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page(self, cursor=None):
+        """
+        Return the page following the cursor, or the first page.
+        """
+        backwards = False
+        queryset = self.queryset
+        if cursor:
+            values, backwards = self.decode_cursor(cursor)
+            queryset = queryset.filter(self._seek(values, backwards))
+
+        order_by = [
+            f"{'-' if descending != backwards else ''}{name}"
+            for name, descending in self.keys
+        ]
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if backwards:
+            rows.reverse()
+            has_next = bool(cursor)
+            has_previous = has_more
+        else:
+            has_next = has_more
+            has_previous = bool(cursor)
+
+        next_cursor = self.encode_cursor(rows[-1]) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], backwards=True) if rows and has_previous else None
+        return CursorPage(rows, next_cursor, previous_cursor)
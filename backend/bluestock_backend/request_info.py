@@ -0,0 +1,27 @@
+"""
+Helpers for reading client details from requests.
+"""
+
+
+def client_ip(request, num_proxies=None):
+    """
+    Return the client IP.
+
+    By default the first X-Forwarded-For hop is preferred, which is fine for
+    logging. Clients can send any X-Forwarded-For value, so callers that
+    enforce limits pass ``num_proxies``, the number of trusted proxies in
+    front of the app: the hop added by the outermost of them is used, or
+    REMOTE_ADDR when it is 0.
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for and num_proxies is None:
+        return x_forwarded_for.split(',')[0].strip()
+    if x_forwarded_for and num_proxies:
+        hops = [hop.strip() for hop in x_forwarded_for.split(',')]
+        return hops[-min(num_proxies, len(hops))]
+    return request.META.get('REMOTE_ADDR') or '127.0.0.1'
+
+
+def user_agent(request):
+    """Return the request's User-Agent header."""
+    return request.META.get('HTTP_USER_AGENT', '')
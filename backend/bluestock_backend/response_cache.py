@@ -0,0 +1,187 @@
+"""
+Response cache for public read endpoints.
+
+Cached views store their response data under a key built from a namespace,
+the namespace's current version, the request path and the normalized query
+string. Writes invalidate by bumping the version of the namespaces they
+affect, so every key of an old version is simply never read again and ages
+out of the cache on its own. Versions live in the cache too, which keeps
+invalidation consistent across processes sharing a backend such as Redis or
+memcached; on a per-process backend like locmem a write only invalidates the
+worker that made it, so the cache is off there unless enabled explicitly.
+"""
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+from .conditional import VALIDATOR_HEADERS, normalize_query, not_modified
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'response'
+
+
+def get_cache():
+    """Return the cache backend configured for responses."""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def warn_if_process_local():
+    """
+    Log a warning when responses are cached in a per-process backend.
+
+    Called once at startup; other workers would keep serving responses for
+    up to RESPONSE_CACHE_TIMEOUT after a write invalidated them.
+    """
+    if settings.RESPONSE_CACHE_ENABLED and isinstance(get_cache(), LocMemCache):
+        logger.warning(
+            f"RESPONSE_CACHE_ENABLED with the per-process locmem cache "
+            f"'{settings.RESPONSE_CACHE_ALIAS}'; writes only invalidate their own worker. "
+            "Point CACHE_BACKEND at Redis or memcached when running more than one worker."
+        )
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:version:{namespace}'
+
+
+def get_version(namespace):
+    """Return the current version of a namespace, starting it at 1."""
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_versions(namespaces):
+    """
+    Invalidate every cached response in the given namespaces.
+    """
+    cache = get_cache()
+    for namespace in set(namespaces):
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Never read yet, so nothing is cached under it
+            cache.add(key, 1, timeout=None)
+
+
+def schedule_invalidation(namespaces):
+    """
+    Bump namespace versions once the current transaction commits.
+
+    Bumping earlier would let a concurrent read cache the pre-commit rows
+    under the new version.
+    """
+    namespaces = list(namespaces)
+
+    def apply():
+        try:
+            bump_versions(namespaces)
+        except Exception as e:
+            logger.error(f"Error invalidating response cache: {str(e)}")
+
+    transaction.on_commit(apply)
+
+
+def response_key(namespace, version, request):
+    raw = f'{request.path}?{normalize_query(request.query_params)}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{namespace}:{version}:{digest}'
+
+
+class CacheCounters:
+    """
+    Thread-safe per-process hit/miss counters by namespace group.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def record(self, group, hit):
+        with self._lock:
+            self._counts[group]['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            groups = {group: dict(counts) for group, counts in self._counts.items()}
+
+        hits = sum(counts['hits'] for counts in groups.values())
+        misses = sum(counts['misses'] for counts in groups.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+            'views': groups,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+counters = CacheCounters()
+
+
+def cache_response(namespace, timeout=None):
+    """
+    Cache successful GET responses of a DRF function view.
+
+    Apply below ``@api_view``. ``namespace`` is formatted with the view's
+    URL kwargs, e.g. ``'ipo:{pk}'``, so one object's responses can be
+    invalidated without touching the others. Responses carry an
+    ``X-Cache: HIT|MISS`` header, and validators set by ``conditional_get``
+    are cached with the data so revalidation on a hit needs no queries.
+    """
+    group = namespace.split(':', 1)[0]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            if request.method != 'GET' or not settings.RESPONSE_CACHE_ENABLED:
+                return view(request, *args, **kwargs)
+
+            cache = get_cache()
+            resolved = namespace.format(**kwargs)
+            key = response_key(resolved, get_version(resolved), request)
+
+            cached = cache.get(key)
+            if cached is not None:
+                counters.record(group, hit=True)
+                data, headers = cached
+                response = not_modified(request, headers) or Response(data)
+                for header, value in headers.items():
+                    response[header] = value
+                response['X-Cache'] = 'HIT'
+                return response
+
+            counters.record(group, hit=False)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                headers = {
+                    header: response[header]
+                    for header in VALIDATOR_HEADERS
+                    if response.has_header(header)
+                }
+                cache.set(
+                    key,
+                    (response.data, headers),
+                    settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+                )
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapped
+
+    return decorator
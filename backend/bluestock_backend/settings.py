@@ -171,13 +171,83 @@ CORS_ALLOW_ALL_ORIGINS = DEBUG  # Only in development
 # JWT Configuration
 JWT_SECRET_KEY = config('JWT_SECRET_KEY', default=SECRET_KEY)
 JWT_ALGORITHM = config('JWT_ALGORITHM', default='HS256')
+JWT_KEY_ID = config('JWT_KEY_ID', default='default')  # kid of the signing key
+JWT_PRIVATE_KEY_FILE = config('JWT_PRIVATE_KEY_FILE', default='')  # PEM, for RS256/EdDSA
+JWT_PUBLIC_KEYS_DIR = config('JWT_PUBLIC_KEYS_DIR', default='')  # <kid>.pem keys still accepted
+JWT_VERIFIED_TOKEN_CACHE_SIZE = config('JWT_VERIFIED_TOKEN_CACHE_SIZE', default=4096, cast=int)  # 0 disables
 JWT_ACCESS_TOKEN_LIFETIME = config('JWT_ACCESS_TOKEN_LIFETIME', default=3600, cast=int)
 JWT_REFRESH_TOKEN_LIFETIME = config('JWT_REFRESH_TOKEN_LIFETIME', default=86400, cast=int)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)  # seconds, 0 disables
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=1024, cast=int)
+AUTH_REVOCATION_REFRESH_INTERVAL = config('AUTH_REVOCATION_REFRESH_INTERVAL', default=30, cast=int)  # seconds
+AUTH_REVOCATION_FILTER_CAPACITY = config('AUTH_REVOCATION_FILTER_CAPACITY', default=100000, cast=int)
+AUTH_REVOCATION_FILTER_ERROR_RATE = config('AUTH_REVOCATION_FILTER_ERROR_RATE', default=0.001, cast=float)
+
+# Login Audit Log Configuration (written by a background thread)
+LOGIN_LOG_ASYNC = config('LOGIN_LOG_ASYNC', default=True, cast=bool)
+LOGIN_LOG_QUEUE_SIZE = config('LOGIN_LOG_QUEUE_SIZE', default=10000, cast=int)
+LOGIN_LOG_BATCH_SIZE = config('LOGIN_LOG_BATCH_SIZE', default=200, cast=int)
+
+# Cache Configuration (locmem by default; point CACHE_BACKEND/CACHE_LOCATION
+# at Redis or memcached to share the cache between worker processes)
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='bluestock-default'),
+    }
+}
+
+# Response Cache Configuration (public IPO read endpoints; invalidation only
+# reaches other workers through a shared cache, so off by default on locmem)
+RESPONSE_CACHE_ENABLED = config(
+    'RESPONSE_CACHE_ENABLED', default=not CACHE_BACKEND.endswith('LocMemCache'), cast=bool
+)
+RESPONSE_CACHE_ALIAS = config('RESPONSE_CACHE_ALIAS', default='default')
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)  # seconds
+
+# IPO Search Configuration (fallback index used on non-PostgreSQL databases)
+IPO_SEARCH_INDEX_TTL = config('IPO_SEARCH_INDEX_TTL', default=300, cast=int)  # seconds, 0 never rebuilds
+IPO_SEARCH_FALLBACK_MAX_RESULTS = config('IPO_SEARCH_FALLBACK_MAX_RESULTS', default=1000, cast=int)
+
+# IPO Status Scheduler Configuration (runs in every process started with it
+# set; with several workers run `update_ipo_statuses --loop` once instead)
+IPO_STATUS_SCHEDULER_INTERVAL = config('IPO_STATUS_SCHEDULER_INTERVAL', default=0, cast=int)  # seconds, 0 disables
+
+# IPO Subscription Ingest Configuration
+SUBSCRIPTION_BULK_MAX_ROWS = config('SUBSCRIPTION_BULK_MAX_ROWS', default=10000, cast=int)  # per API request
+SUBSCRIPTION_HISTORY_RAW_RETENTION_DAYS = config('SUBSCRIPTION_HISTORY_RAW_RETENTION_DAYS', default=7, cast=int)
+SUBSCRIPTION_HISTORY_ROLLUP_BUCKET = config('SUBSCRIPTION_HISTORY_ROLLUP_BUCKET', default=3600, cast=int)  # seconds
+SUBSCRIPTION_HISTORY_RETENTION_DAYS = config('SUBSCRIPTION_HISTORY_RETENTION_DAYS', default=0, cast=int)  # 0 keeps rollups
+
+# Live Subscription Updates (Server-Sent Events, served by bluestock_backend.asgi)
+LIVE_EVENTS_BACKEND = config('LIVE_EVENTS_BACKEND', default='apps.ipos.live.InProcessBroker')  # or apps.ipos.live.PostgresBroker
+LIVE_EVENTS_CHANNEL = config('LIVE_EVENTS_CHANNEL', default='ipo_live')
+LIVE_EVENTS_QUEUE_SIZE = config('LIVE_EVENTS_QUEUE_SIZE', default=100, cast=int)  # events buffered per client
+LIVE_EVENTS_MAX_CLIENTS = config('LIVE_EVENTS_MAX_CLIENTS', default=1000, cast=int)  # per process
+LIVE_EVENTS_HEARTBEAT = config('LIVE_EVENTS_HEARTBEAT', default=15, cast=int)  # seconds
+LIVE_EVENTS_MAX_DURATION = config('LIVE_EVENTS_MAX_DURATION', default=300, cast=int)  # seconds before clients reconnect
+LIVE_EVENTS_RETRY_MS = config('LIVE_EVENTS_RETRY_MS', default=3000, cast=int)
+
+# Admin Dashboard Configuration
+ACTIVITY_TIMELINE_MAX_DAYS = config('ACTIVITY_TIMELINE_MAX_DAYS', default=366, cast=int)
+# Rebuilds the snapshot in every process started with it set; with several
+# workers run `refresh_dashboard_stats --loop` once instead
+DASHBOARD_STATS_REFRESH_INTERVAL = config('DASHBOARD_STATS_REFRESH_INTERVAL', default=0, cast=int)  # seconds, 0 disables
 
 # File Upload Configuration
 MAX_UPLOAD_SIZE = config('MAX_UPLOAD_SIZE', default=10485760, cast=int)  # 10MB
 ALLOWED_FILE_TYPES = config('ALLOWED_FILE_TYPES', default='pdf,doc,docx').split(',')
 
+# Document Download Configuration
+# '' streams files from Django; 'x-accel-redirect' (nginx) or 'x-sendfile'
+# (Apache/lighttpd) hand the transfer to the front-end server
+DOCUMENT_DOWNLOAD_OFFLOAD = config('DOCUMENT_DOWNLOAD_OFFLOAD', default='')
+DOCUMENT_DOWNLOAD_ACCEL_PREFIX = config('DOCUMENT_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+DOWNLOAD_BUFFER_FLUSH_INTERVAL = config('DOWNLOAD_BUFFER_FLUSH_INTERVAL', default=5, cast=int)  # seconds, 0 writes synchronously
+DOWNLOAD_BUFFER_MAX_EVENTS = config('DOWNLOAD_BUFFER_MAX_EVENTS', default=500, cast=int)
+DOWNLOAD_BUFFER_MAX_RETRIES = config('DOWNLOAD_BUFFER_MAX_RETRIES', default=3, cast=int)  # failed flushes before a batch is dropped
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -261,4 +331,42 @@ SMS_PROVIDERS = [
     #     'sender_id': config('MSG91_SENDER_ID', default='BLUESTOCK'),
     #     'route': config('MSG91_ROUTE', default='4'),
     # },
-]
\ No newline at end of file
+]
+
+# SMS Outbox Configuration (app link requests are sent by manage.py send_app_links)
+SMS_OUTBOX_BATCH_SIZE = config('SMS_OUTBOX_BATCH_SIZE', default=500, cast=int)  # requests claimed per batch
+SMS_OUTBOX_WORKERS = config('SMS_OUTBOX_WORKERS', default=8, cast=int)  # concurrent sends per process
+SMS_OUTBOX_MAX_ATTEMPTS = config('SMS_OUTBOX_MAX_ATTEMPTS', default=3, cast=int)
+SMS_OUTBOX_RETRY_DELAY = config('SMS_OUTBOX_RETRY_DELAY', default=30, cast=int)  # seconds, doubled per attempt
+SMS_OUTBOX_CLAIM_TIMEOUT = config('SMS_OUTBOX_CLAIM_TIMEOUT', default=300, cast=int)  # seconds before a stuck claim is retried
+
+# SMS Provider HTTP Configuration (one pooled keep-alive session per provider)
+SMS_HTTP_POOL_SIZE = config('SMS_HTTP_POOL_SIZE', default=SMS_OUTBOX_WORKERS, cast=int)  # connections kept per provider
+SMS_HTTP_CONNECT_RETRIES = config('SMS_HTTP_CONNECT_RETRIES', default=2, cast=int)  # only failed connects are retried
+SMS_HTTP_CONNECT_TIMEOUT = config('SMS_HTTP_CONNECT_TIMEOUT', default=5, cast=int)  # seconds
+SMS_HTTP_READ_TIMEOUT = config('SMS_HTTP_READ_TIMEOUT', default=30, cast=int)  # seconds
+
+# SMS Provider Health Configuration (circuit breaker and latency-aware routing)
+SMS_HEALTH_WINDOW_SECONDS = config('SMS_HEALTH_WINDOW_SECONDS', default=300, cast=int)  # outcomes older than this are dropped
+SMS_HEALTH_WINDOW_SIZE = config('SMS_HEALTH_WINDOW_SIZE', default=100, cast=int)  # outcomes kept per provider
+SMS_CIRCUIT_MIN_REQUESTS = config('SMS_CIRCUIT_MIN_REQUESTS', default=5, cast=int)
+SMS_CIRCUIT_ERROR_RATE = config('SMS_CIRCUIT_ERROR_RATE', default=0.5, cast=float)  # failure share that opens the circuit
+SMS_CIRCUIT_SLOW_CALL = config('SMS_CIRCUIT_SLOW_CALL', default=10, cast=float)  # seconds; slower sends count as failures
+SMS_CIRCUIT_COOLDOWN = config('SMS_CIRCUIT_COOLDOWN', default=30, cast=float)  # seconds open before a probe
+SMS_ROUTING_LATENCY_STEP = config('SMS_ROUTING_LATENCY_STEP', default=50, cast=int)  # ms; closer p95s keep priority order
+
+# SMS Batch Configuration (campaign blasts via send-app-link/bulk and queue_app_links)
+SMS_BULK_MAX_NUMBERS = config('SMS_BULK_MAX_NUMBERS', default=50000, cast=int)  # numbers per batch
+SMS_BULK_CHUNK_SIZE = config('SMS_BULK_CHUNK_SIZE', default=100, cast=int)  # recipients per provider request
+
+# SMS Rate Limit Configuration (send-app-link token buckets; 0 disables a limit)
+SMS_RATE_LIMIT_ENABLED = config('SMS_RATE_LIMIT_ENABLED', default=True, cast=bool)
+SMS_RATE_LIMIT_BACKEND = config('SMS_RATE_LIMIT_BACKEND', default='apps.notifications.throttling.LocalRateLimitBackend')  # or apps.notifications.throttling.CacheRateLimitBackend
+SMS_RATE_LIMIT_CACHE_ALIAS = config('SMS_RATE_LIMIT_CACHE_ALIAS', default='default')
+SMS_RATE_LIMIT_MAX_KEYS = config('SMS_RATE_LIMIT_MAX_KEYS', default=100000, cast=int)  # buckets kept per process (local backend)
+SMS_RATE_LIMIT_PER_NUMBER = config('SMS_RATE_LIMIT_PER_NUMBER', default=3, cast=int)  # requests per number per period
+SMS_RATE_LIMIT_NUMBER_PERIOD = config('SMS_RATE_LIMIT_NUMBER_PERIOD', default=3600, cast=int)  # seconds
+SMS_RATE_LIMIT_PER_IP = config('SMS_RATE_LIMIT_PER_IP', default=20, cast=int)  # requests per client IP per period
+SMS_RATE_LIMIT_IP_PERIOD = config('SMS_RATE_LIMIT_IP_PERIOD', default=3600, cast=int)  # seconds
+SMS_RATE_LIMIT_NUM_PROXIES = config('SMS_RATE_LIMIT_NUM_PROXIES', default=0, cast=int)  # trusted proxies setting X-Forwarded-For; 1 behind nginx
+SMS_DEDUP_WINDOW_MINUTES = config('SMS_DEDUP_WINDOW_MINUTES', default=5, cast=int)  # repeat requests reuse the last one; 0 disables